@@ -0,0 +1,308 @@
+"""
+Interchangeable engines for the clean -> aggregate step the report scripts share.
+
+    python backends.py              # cleaning rules on fixed edge cases, parity of every aggregate, timings
+    python backends.py --repeat 20  # more timing runs
+
+'pandas' applies gang_data's cleaning rules with pandas string methods and aggregates with
+pd.crosstab/groupby. 'arrow' applies the same rules with pyarrow.compute kernels and
+Table.group_by, which work on Arrow buffers without Python objects and spread over
+pyarrow's thread pool. Both hand back the (small) aggregate tables as pandas DataFrames,
+so the plotting code is the same whichever backend produced them.
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:
+    pa = pc = None
+
+from excel_dates import decode_excel_dates
+from gang_data import clean_flag, clean_race, clean_zip, distinct_subjects, yearly_flag_trends
+
+# --- Configuration ---
+BACKEND = 'pandas'   # 'pandas' or 'arrow' (needs pyarrow)
+
+# Cleaning rules Backend.clean applies to a column:
+#   'raw'      - unchanged
+#   'race'     - gang_data.clean_race (missing/'NULL' -> 'Unknown')
+#   'zip'      - gang_data.clean_zip (5-digit string or '')
+#   'yes_no'   - 'Y' where the stripped, upper-cased value is 'Y', else 'N' (gang_data.clean_flag)
+#   'flag'     - the same test as 1/0, for summing (gang_data.clean_flag)
+#   'nonempty' - True where the value is present and not blank (escalation's "flagged")
+
+
+# --- Pandas ---
+
+class PandasBackend:
+    """The reference implementation: gang_data's cleaners, pd.crosstab and groupby."""
+
+    name = 'pandas'
+
+    CLEANERS = {
+        'raw': lambda series: series,
+        'race': clean_race,
+        'zip': clean_zip,
+        'yes_no': lambda series: clean_flag(series).map({0: 'N', 1: 'Y'}),
+        'flag': clean_flag,
+        'nonempty': lambda series: series.notna() & (series.astype(str).str.strip() != ''),
+    }
+
+    def clean(self, df, rules):
+        """A table holding the columns of `rules` ({column: rule}), each cleaned by its rule."""
+        return pd.DataFrame({column: self.CLEANERS[rule](df[column]) for column, rule in rules.items()}, index=df.index)
+
+    def crosstab(self, table, row, column):
+        """Record counts of every (row, column) pair, like pd.crosstab."""
+        return pd.crosstab(table[row], table[column])
+
+    def distinct_crosstab(self, table, row, column, ids):
+        """Distinct `ids` per (row, column) pair with 'Total' margins (gang_data.distinct_subjects)."""
+        return distinct_subjects(table[row], table[column], table[ids])
+
+    def group_sum(self, table, key, columns):
+        """Per-`key` sums of `columns` (True counts as 1)."""
+        return table[columns].groupby(table[key]).sum()
+
+    def distinct_count(self, table, key, ids):
+        """Per-`key` number of distinct `ids`."""
+        return table[ids].groupby(table[key]).nunique()
+
+    def yearly_flag_trends(self, df, date_column, flag_columns):
+        """gang_data.yearly_flag_trends."""
+        return yearly_flag_trends(df, date_column, flag_columns)
+
+
+# --- Arrow ---
+
+class ArrowBackend:
+    """The same rules and aggregates on pyarrow.compute kernels and Table.group_by."""
+
+    name = 'arrow'
+
+    @staticmethod
+    def _strings(series):
+        """A column as an Arrow string array with the values astype(str) would give (missing -> null)."""
+        if pd.api.types.is_string_dtype(series.dtype) and series.dtype != object:
+            return pa.array(series, type=pa.string(), from_pandas=True)
+        if series.dtype == object:
+            # Mixed numbers and text (e.g. address_zip) are turned into text once on the way in
+            series = series.astype(str)
+            return pa.array(series, type=pa.string(), from_pandas=True)
+        return pc.cast(pa.array(series, from_pandas=True), pa.string())
+
+    def _clean_column(self, series, rule):
+        if rule == 'raw':
+            if series.dtype == object:
+                return self._strings(series)
+            return pa.array(series, from_pandas=True)
+
+        text = self._strings(series)
+        if rule == 'race':
+            race = pc.replace_substring_regex(pc.utf8_trim_whitespace(text), '(?i)NULL', 'Unknown')
+            race = pc.fill_null(race, 'Unknown')
+            return pc.if_else(pc.equal(race, 'nan'), 'Unknown', race)
+        if rule == 'zip':
+            zips = pc.replace_substring_regex(text, r'\..*', '')
+            zips = pc.utf8_slice_codeunits(pc.utf8_trim_whitespace(zips), 0, 5)
+            valid = pc.fill_null(pc.match_substring_regex(zips, r'^\d{5}$'), False)
+            return pc.if_else(valid, zips, '')
+        if rule in ('yes_no', 'flag'):
+            yes = pc.fill_null(pc.equal(pc.utf8_upper(pc.utf8_trim_whitespace(text)), 'Y'), False)
+            return pc.if_else(yes, 'Y', 'N') if rule == 'yes_no' else pc.cast(yes, pa.int8())
+        if rule == 'nonempty':
+            return pc.fill_null(pc.not_equal(pc.utf8_trim_whitespace(text), ''), False)
+        raise ValueError(f"Unknown cleaning rule: {rule}")
+
+    def clean(self, df, rules):
+        """An Arrow table holding the columns of `rules` ({column: rule}), each cleaned by its rule."""
+        return pa.table({column: self._clean_column(df[column], rule) for column, rule in rules.items()})
+
+    @staticmethod
+    def _present(table, keys):
+        """Rows whose grouping keys are all present (pandas drops missing keys when grouping)."""
+        mask = pc.and_(*[pc.is_valid(table[key]) for key in keys]) if len(keys) > 1 else pc.is_valid(table[keys[0]])
+        return table.filter(mask)
+
+    def crosstab(self, table, row, column):
+        """Record counts of every (row, column) pair, like pd.crosstab."""
+        pairs = self._present(table.select([row, column]), [row, column])
+        counts = pairs.group_by([row, column]).aggregate([([], 'count_all')]).to_pandas()
+        result = counts.pivot(index=row, columns=column, values='count_all').fillna(0).astype('int64')
+        return result.sort_index().sort_index(axis=1)
+
+    def distinct_crosstab(self, table, row, column, ids):
+        """Distinct `ids` per (row, column) pair with 'Total' margins."""
+        pairs = self._present(table.select([row, column, ids]), [row, column])
+        cells = pairs.group_by([row, column]).aggregate([(ids, 'count_distinct')]).to_pandas()
+        result = cells.pivot(index=row, columns=column, values=f'{ids}_count_distinct').fillna(0)
+        result = result.sort_index().sort_index(axis=1)
+
+        row_totals = pairs.group_by(row).aggregate([(ids, 'count_distinct')]).to_pandas().set_index(row)
+        column_totals = pairs.group_by(column).aggregate([(ids, 'count_distinct')]).to_pandas().set_index(column)
+        result['Total'] = row_totals[f'{ids}_count_distinct']
+        result.loc['Total'] = column_totals[f'{ids}_count_distinct']
+        result.loc['Total', 'Total'] = pc.count_distinct(pairs[ids]).as_py()
+        return result.astype(int)
+
+    def group_sum(self, table, key, columns):
+        """Per-`key` sums of `columns` (True counts as 1)."""
+        present = self._present(table.select([key] + columns), [key])
+        sums = present.group_by(key).aggregate([(column, 'sum') for column in columns]).to_pandas()
+        sums = sums.rename(columns={f'{column}_sum': column for column in columns}).set_index(key).sort_index()
+        return sums[columns].astype('int64')
+
+    def distinct_count(self, table, key, ids):
+        """Per-`key` number of distinct `ids`."""
+        present = self._present(table.select([key, ids]), [key])
+        counts = present.group_by(key).aggregate([(ids, 'count_distinct')]).to_pandas()
+        return counts.set_index(key).sort_index()[f'{ids}_count_distinct'].rename(ids).astype('int64')
+
+    def yearly_flag_trends(self, df, date_column, flag_columns):
+        """gang_data.yearly_flag_trends, grouped by Arrow."""
+        years = pc.year(pa.array(decode_excel_dates(df[date_column]), type=pa.timestamp('us')))
+        table = self.clean(df, {column: 'nonempty' for column in flag_columns}).append_column('Year', years)
+        present = self._present(table, ['Year'])
+        grouped = present.group_by('Year').aggregate([([], 'count_all')] + [(column, 'sum') for column in flag_columns])
+        grouped = grouped.to_pandas().set_index('Year').sort_index()
+
+        trends = grouped[['count_all']].rename(columns={'count_all': 'Total_Records'})
+        # Same index dtype as the pandas path (.dt.year of the decoded dates)
+        trends.index = trends.index.astype(pd.Series(np.array([], dtype='datetime64[us]')).dt.year.dtype)
+        for column in flag_columns:
+            trends[f'{column}_Count'] = grouped[f'{column}_sum'].astype(float)
+            trends[f'{column}_Percent'] = trends[f'{column}_Count'] / trends['Total_Records'] * 100
+        return trends
+
+
+BACKENDS = {'pandas': PandasBackend, 'arrow': ArrowBackend}
+
+
+def get_backend(name=BACKEND):
+    """The backend called `name`; falls back to pandas (with a warning) when pyarrow isn't installed."""
+    if name == 'arrow' and pa is None:
+        print("WARNING: pyarrow is not installed. Using the pandas backend.")
+        name = 'pandas'
+    return BACKENDS[name]()
+
+
+# --- Parity and Benchmark ---
+
+def report_aggregates(backend, df):
+    """Every aggregate the report scripts take from a backend, by name (heatmap, race, colors, gang_colors, escalation)."""
+    from gang_data import COLUMN_CREATE_DATE, COLUMN_ID, COLUMN_RACE, COLUMN_ZIP
+    flags = ['Subject_Armed', 'Subject_Felon', 'Subject_Probation']
+    records = backend.clean(df, {COLUMN_ZIP: 'zip', COLUMN_RACE: 'race', COLUMN_ID: 'raw',
+                                 'Subject_Admits_Gang': 'yes_no', 'Subject_Wears_Colors': 'yes_no'})
+    flagged = backend.clean(df, {COLUMN_ZIP: 'zip', **{flag: 'flag' for flag in flags}})
+    return {
+        'race x zip': backend.crosstab(records, COLUMN_ZIP, COLUMN_RACE),
+        'flags by zip': backend.group_sum(flagged, COLUMN_ZIP, flags),
+        'subjects by zip': backend.distinct_count(records, COLUMN_ZIP, COLUMN_ID),
+        'race x admits': backend.crosstab(records, COLUMN_RACE, 'Subject_Admits_Gang'),
+        'race x admits subjects': backend.distinct_crosstab(records, COLUMN_RACE, 'Subject_Admits_Gang', COLUMN_ID),
+        'colors x admits': backend.crosstab(records, 'Subject_Wears_Colors', 'Subject_Admits_Gang'),
+        'yearly flag trends': backend.yearly_flag_trends(df, COLUMN_CREATE_DATE, flags),
+    }
+
+
+# Fixed inputs for every cleaning rule, with the values both backends must produce. They
+# cover what the workbook happens not to contain: padded and upper-case 'null', the 'nan'
+# text pandas 2's astype(str) left behind, blank strings, numbers mixed into an object ZIP
+# column, float ZIPs and all-missing columns.
+RULE_CASES = [
+    ('race', pd.Series([' null ', 'NULL', 'nan', None, '', ' Black ', np.nan], dtype=object),
+     ['Unknown', 'Unknown', 'Unknown', 'Unknown', '', 'Black', 'Unknown']),
+    ('race', pd.Series([' null ', 'nan', None, ' Hispanic '], dtype='str'),
+     ['Unknown', 'Unknown', 'Unknown', 'Hispanic']),
+    ('race', pd.Series([None, None], dtype=object), ['Unknown', 'Unknown']),
+    ('zip', pd.Series([60623, 60623.0, '60608', ' 60608 ', '6062', None, 'abc', '60623-1234', ''], dtype=object),
+     ['60623', '60623', '60608', '60608', '', '', '', '60623', '']),
+    ('zip', pd.Series([60623.0, np.nan, 6062.0]), ['60623', '', '']),
+    ('zip', pd.Series([60623, 46320]), ['60623', '46320']),
+    ('zip', pd.Series([np.nan, np.nan]), ['', '']),
+    ('yes_no', pd.Series(['Y', ' y ', 'N', 'NULL', None, '', ' ', 'nan'], dtype=object),
+     ['Y', 'Y', 'N', 'N', 'N', 'N', 'N', 'N']),
+    ('yes_no', pd.Series([None, None], dtype=object), ['N', 'N']),
+    ('flag', pd.Series(['Y', ' y ', 'N', 'NULL', None, '', ' ', 'nan'], dtype='str'),
+     [1, 1, 0, 0, 0, 0, 0, 0]),
+    ('flag', pd.Series([np.nan, np.nan]), [0, 0]),
+    ('nonempty', pd.Series(['Y', 'NULL', 'nan', None, '', ' ', np.nan], dtype=object),
+     [True, True, True, False, False, False, False]),
+    ('nonempty', pd.Series([np.nan, np.nan]), [False, False]),
+    ('raw', pd.Series(['S1', None, 'S2'], dtype='str'), ['S1', None, 'S2']),
+    ('raw', pd.Series([1, 2, 3]), [1, 2, 3]),
+]
+
+
+def _as_list(column):
+    """A cleaned column (pandas Series or Arrow array) as a list, with every missing value as None."""
+    values = column.to_pylist() if hasattr(column, 'to_pylist') else column.tolist()
+    return [None if value is None or (isinstance(value, float) and np.isnan(value)) else value for value in values]
+
+
+def check_rules(backend, cases=RULE_CASES):
+    """The RULE_CASES a backend gets wrong (value or type), one line each."""
+    failures = []
+    for rule, values, expected in cases:
+        cleaned = _as_list(backend.clean(pd.DataFrame({'value': values}), {'value': rule})['value'])
+        # 1 == True, so compare types too: 'flag' must give numbers and 'nonempty' booleans
+        if cleaned != expected or [type(v) for v in cleaned] != [type(v) for v in expected]:
+            failures.append(f"{rule} on {values.dtype} {values.tolist()}: got {cleaned}, expected {expected}")
+    return failures
+
+
+def check_parity(expected, actual):
+    """Names of the aggregates that differ (values, labels or dtypes) between two backends."""
+    differences = []
+    for name, table in expected.items():
+        try:
+            if isinstance(table, pd.Series):
+                pd.testing.assert_series_equal(table, actual[name], check_names=False)
+            else:
+                pd.testing.assert_frame_equal(table, actual[name], check_names=False)
+        except AssertionError as e:
+            differences.append(f'{name}: {str(e).splitlines()[0]}')
+    return differences
+
+
+if __name__ == '__main__':
+    from gang_data import read_workbook
+
+    parser = argparse.ArgumentParser(description='Check that both backends agree and time them.')
+    parser.add_argument('--file', default='Cook County Regional Gang Intelligence Database.xlsx')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--scale', type=int, default=1, help='stack the workbook this many times for timing')
+    args = parser.parse_args()
+
+    df = read_workbook(args.file)
+    backends = [get_backend(name) for name in BACKENDS]
+    if pa is not None:
+        print(f"pyarrow {pa.__version__}, {pa.cpu_count()} compute threads")
+
+    print("\n--- Cleaning Rules ---")
+    for backend in backends:
+        failures = check_rules(backend)
+        print(f"{backend.name}: " + (f'all {len(RULE_CASES)} edge-case inputs cleaned as expected' if not failures
+                                     else '\n  '.join([f'{len(failures)} of {len(RULE_CASES)} inputs wrong:'] + failures)))
+
+    print("\n--- Parity ---")
+    results = {backend.name: report_aggregates(backend, df) for backend in backends}
+    for backend in backends[1:]:
+        differences = check_parity(results['pandas'], results[backend.name])
+        print(f"{backend.name}: " + ('all aggregates identical to pandas' if not differences else '; '.join(differences)))
+
+    print(f"\n--- Timing (clean + aggregate, {len(df) * args.scale} rows, best of {args.repeat}) ---")
+    timing_df = pd.concat([df] * args.scale, ignore_index=True)
+    for backend in backends:
+        runs = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            report_aggregates(backend, timing_df)
+            runs.append(time.perf_counter() - start)
+        print(f"{backend.name}: {min(runs) * 1000:.0f} ms")
@@ -0,0 +1,143 @@
+import pandas as pd
+import matplotlib.pyplot as plt
+import numpy as np
+
+from gang_data import (COLUMN_HEIGHT, COLUMN_RACE, COLUMN_SEX, COLUMN_WEIGHT, COLUMN_ZIP,
+                       clean_race, clean_zip, parse_height, parse_measurement, parse_weight, read_workbook)
+
+# --- Configuration ---
+file_path = 'Cook County Regional Gang Intelligence Database.xlsx'
+
+HEIGHT_BINS = np.arange(48, 91, 2)      # inches
+WEIGHT_BINS = np.arange(70, 501, 20)    # pounds
+MIN_GROUP_SIZE = 20                     # Smaller groups are left out of the summary tables
+TOP_ZIPS = 15
+
+# --- 1. Data Loading ---
+print(f"Attempting to read data from: {file_path}")
+
+try:
+    df = read_workbook(file_path)
+
+except FileNotFoundError:
+    print(f"\nERROR: The file '{file_path}' was not found.")
+    print("Please ensure the Excel file is in the same directory as this script.")
+    print("--- Generating sample data for demonstration instead ---")
+
+    # Fallback: packed feet/inches heights and pound weights, with a few free-text entries
+    np.random.seed(47)
+    data_size = 5000
+    feet, inches = np.divmod(np.random.normal(69, 3, data_size).round().astype(int), 12)
+    df = pd.DataFrame({
+        COLUMN_HEIGHT: (feet * 100 + inches).astype(object),
+        COLUMN_WEIGHT: np.random.normal(180, 35, data_size).round(-1).astype(object),
+        COLUMN_SEX: np.random.choice(['M', 'F'], size=data_size, p=[0.95, 0.05]),
+        COLUMN_RACE: np.random.choice(['Black', 'Hispanic', 'White'], size=data_size, p=[0.5, 0.35, 0.15]),
+        COLUMN_ZIP: np.random.choice([60608, 60617, 60620, 60632, 46320], size=data_size),
+    })
+    df.loc[:20, COLUMN_HEIGHT] = "5'10\""
+    df.loc[21:30, COLUMN_WEIGHT] = 'unknown'
+
+except Exception as e:
+    print(f"\nAn unexpected error occurred during file reading: {e}")
+    exit()
+
+required_columns = [COLUMN_HEIGHT, COLUMN_WEIGHT, COLUMN_SEX, COLUMN_RACE, COLUMN_ZIP]
+missing_cols = [col for col in required_columns if col not in df.columns]
+
+if missing_cols:
+    print("\nERROR: The following required columns were not found in the Excel file:")
+    print(missing_cols)
+    print(f"Available columns: {list(df.columns)}")
+    exit()
+
+print(f"Data loaded successfully. Total records: {len(df)}")
+
+
+# --- 2. Parsing ---
+
+# Each distinct raw string is parsed once and the result broadcast back to the rows
+height, invalid_heights = parse_measurement(df[COLUMN_HEIGHT], parse_height)
+weight, invalid_weights = parse_measurement(df[COLUMN_WEIGHT], parse_weight)
+
+print("\n--- Parsing Summary ---")
+print(f"Heights: {int(np.isfinite(height).sum())} parsed, {invalid_heights} invalid, "
+      f"{len(df) - int(np.isfinite(height).sum()) - invalid_heights} missing "
+      f"({df[COLUMN_HEIGHT].nunique()} distinct raw values)")
+print(f"Weights: {int(np.isfinite(weight).sum())} parsed, {invalid_weights} invalid, "
+      f"{len(df) - int(np.isfinite(weight).sum()) - invalid_weights} missing "
+      f"({df[COLUMN_WEIGHT].nunique()} distinct raw values)")
+
+sex = df[COLUMN_SEX].fillna('Unknown').astype(str).str.strip().replace('NULL', 'Unknown')
+race = clean_race(df[COLUMN_RACE])
+zip_code = clean_zip(df[COLUMN_ZIP]).replace('', 'Unknown')
+
+
+# --- 3. Distributions ---
+
+def grouped_histogram(values, groups, bins):
+    """
+    (groups x bins) count matrix of `values` in one pass.
+
+    Every row gets a flat (group, bin) cell index and np.bincount counts them all at
+    once, instead of calling np.histogram once per group.
+    """
+    codes, labels = pd.factorize(groups, sort=True)
+    bin_index = np.digitize(values, bins) - 1
+    valid = np.isfinite(values) & (bin_index >= 0) & (bin_index < len(bins) - 1) & (codes >= 0)
+
+    cells = codes[valid] * (len(bins) - 1) + bin_index[valid]
+    counts = np.bincount(cells, minlength=len(labels) * (len(bins) - 1))
+    columns = [f'{low}-{high}' for low, high in zip(bins[:-1], bins[1:])]
+    return pd.DataFrame(counts.reshape(len(labels), -1), index=labels, columns=columns)
+
+
+def summary(values, groups):
+    """Count, mean and quartiles of the parsed values per group."""
+    table = pd.Series(values).groupby(np.asarray(groups)).describe()[['count', 'mean', '25%', '50%', '75%']]
+    return table[table['count'] >= MIN_GROUP_SIZE].round(1)
+
+
+for label, values in [('Height (inches)', height), ('Weight (pounds)', weight)]:
+    print(f"\n--- {label} by Sex ---")
+    print(summary(values, sex))
+    print(f"\n--- {label} by Race ---")
+    print(summary(values, race))
+    print(f"\n--- {label} by ZIP Code (top {TOP_ZIPS} by record count) ---")
+    print(summary(values, zip_code).sort_values('count', ascending=False).head(TOP_ZIPS))
+
+height_by_sex = grouped_histogram(height, sex, HEIGHT_BINS)
+weight_by_sex = grouped_histogram(weight, sex, WEIGHT_BINS)
+height_by_race = grouped_histogram(height, race, HEIGHT_BINS)
+print("\n" + "="*60 + "\n")
+
+
+# --- 4. Plot the Distributions ---
+
+fig, (ax_height, ax_weight, ax_race) = plt.subplots(1, 3, figsize=(20, 7))
+
+# Normalize each group to a share of its own records so small groups stay visible
+for ax, table, bins in [(ax_height, height_by_sex, HEIGHT_BINS), (ax_weight, weight_by_sex, WEIGHT_BINS)]:
+    shares = table.div(table.sum(axis=1).replace(0, 1), axis=0) * 100
+    for group, row in shares.iterrows():
+        ax.stairs(row.to_numpy(), bins, linewidth=2.5, label=f'{group} (n={table.loc[group].sum()})')
+    ax.legend(title='Subject Sex', fontsize=11)
+    ax.set_ylabel('Share of Group (%)', fontsize=13)
+    ax.grid(axis='y', linestyle='--', alpha=0.7)
+
+ax_height.set_title('Height Distribution by Sex', fontsize=16, fontweight='bold', pad=15)
+ax_height.set_xlabel('Height (inches)', fontsize=13)
+ax_weight.set_title('Weight Distribution by Sex', fontsize=16, fontweight='bold', pad=15)
+ax_weight.set_xlabel('Weight (pounds)', fontsize=13)
+
+race_shares = height_by_race.div(height_by_race.sum(axis=1).replace(0, 1), axis=0) * 100
+race_shares = race_shares[height_by_race.sum(axis=1) >= MIN_GROUP_SIZE]
+image = ax_race.imshow(race_shares.to_numpy(), aspect='auto', cmap='viridis')
+ax_race.set_yticks(range(len(race_shares)), race_shares.index)
+ax_race.set_xticks(range(0, len(HEIGHT_BINS) - 1, 2), HEIGHT_BINS[:-1:2])
+ax_race.set_title('Height Distribution by Race', fontsize=16, fontweight='bold', pad=15)
+ax_race.set_xlabel('Height (inches, bin start)', fontsize=13)
+fig.colorbar(image, ax=ax_race, label='Share of Group (%)')
+
+plt.tight_layout()
+plt.show()
@@ -3,10 +3,15 @@ import matplotlib.pyplot as plt
 import numpy as np
 import os
 
+from backends import get_backend
+from gang_data import read_workbook
+from suppression import SUPPRESSED_TEXT, suppress_distinct, suppress_table
+
 # --- Configuration ---
 file_path = 'Cook County Regional Gang Intelligence Database.xlsx'
 column_wears_colors = 'Subject_Wears_Colors'
 column_admits_gang = 'Subject_Admits_Gang'
+column_id = 'Subject_ID'
 
 # --- 1. Data Loading ---
 print(f"Attempting to read data from: {file_path}")
@@ -14,7 +19,7 @@ print(f"Attempting to read data from: {file_path}")
 try:
     # Read the data from the Excel file
     # If your data is on a sheet other than the first one, add: sheet_name='Your Sheet Name'
-    df = pd.read_excel(file_path)
+    df = read_workbook(file_path)
 
 except FileNotFoundError:
     print(f"\nERROR: The file '{file_path}' was not found.")
@@ -58,11 +63,15 @@ df = df[df[column_wears_colors].isin(['Y', 'N']) & df[column_admits_gang].isin([
 
 
 # --- 3. Aggregate Data using Cross-Tabulation (Equivalent to Pivot Table) ---
+# Counting runs on the configured backend (backends.py: pandas or Arrow)
+backend = get_backend()
+rules = {column_wears_colors: 'raw', column_admits_gang: 'raw'}
+if column_id in df.columns:
+    rules[column_id] = 'raw'
+records = backend.clean(df, rules)
+
 # Create a frequency table showing the count of each combination.
-frequency_table = pd.crosstab(
-    df[column_wears_colors],
-    df[column_admits_gang]
-)
+frequency_table = backend.crosstab(records, column_wears_colors, column_admits_gang)
 
 # Sort the index/columns for consistent plotting order: 'N' then 'Y'
 frequency_table = frequency_table.reindex(index=['N', 'Y'], fill_value=0)
@@ -71,6 +80,13 @@ if 'N' in frequency_table.columns and 'Y' in frequency_table.columns:
 
 print("--- Frequency Table (Data for Plotting) ---")
 print(frequency_table)
+
+# Bars count records; a subject can appear on more than one record
+if column_id in df.columns:
+    distinct_table = backend.distinct_crosstab(records, column_wears_colors, column_admits_gang, column_id)
+    print("\n--- Distinct Subjects (each Subject_ID counted once per cell) ---")
+    published_distinct = suppress_distinct(distinct_table, suppress_table(frequency_table))
+    print(published_distinct.to_string(na_rep=SUPPRESSED_TEXT, float_format='{:.0f}'.format))
 print("\n" + "="*40 + "\n")
 
 
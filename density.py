@@ -0,0 +1,64 @@
+import numpy as np
+import matplotlib.pyplot as plt
+
+# --- Configuration ---
+KM_PER_DEGREE_LAT = 110.57
+KM_PER_DEGREE_LON_EQUATOR = 111.32
+KERNEL_EXTENT = 4   # Kernel is truncated (and the grid padded) at this many bandwidths
+
+
+def density_grid(lats, lons, weights, cell_size, bandwidth_km, bounds=None):
+    """
+    Gaussian kernel density surface of weighted points on a regular lat/lon grid.
+
+    Points are binned into cells, then smoothed by multiplying with the kernel in the
+    frequency domain, so the cost depends on the number of cells, not the number of
+    points. Returns the grid (rows = south to north) and its [[south, west], [north, east]] bounds.
+    """
+    lats, lons = np.asarray(lats, dtype='float64'), np.asarray(lons, dtype='float64')
+    weights = np.asarray(weights, dtype='float64')
+
+    # Kernel bandwidth in cells, corrected for longitude shrinkage at this latitude
+    mid_lat = np.radians(lats.mean())
+    sigma_rows = bandwidth_km / (cell_size * KM_PER_DEGREE_LAT)
+    sigma_cols = bandwidth_km / (cell_size * KM_PER_DEGREE_LON_EQUATOR * np.cos(mid_lat))
+
+    if bounds is None:
+        pad_lat, pad_lon = KERNEL_EXTENT * sigma_rows * cell_size, KERNEL_EXTENT * sigma_cols * cell_size
+        bounds = [[lats.min() - pad_lat, lons.min() - pad_lon], [lats.max() + pad_lat, lons.max() + pad_lon]]
+    (south, west), (north, east) = bounds
+
+    lat_edges = np.arange(south, north + cell_size, cell_size)
+    lon_edges = np.arange(west, east + cell_size, cell_size)
+    counts, _, _ = np.histogram2d(lats, lons, bins=[lat_edges, lon_edges], weights=weights)
+
+    # Zero-pad (at the far end) so the circular FFT convolution doesn't wrap mass around the edges
+    pad_rows = int(np.ceil(KERNEL_EXTENT * sigma_rows))
+    pad_cols = int(np.ceil(KERNEL_EXTENT * sigma_cols))
+    shape = (counts.shape[0] + 2 * pad_rows, counts.shape[1] + 2 * pad_cols)
+
+    row_offsets = np.fft.fftfreq(shape[0], 1 / shape[0])
+    col_offsets = np.fft.fftfreq(shape[1], 1 / shape[1])
+    kernel = np.exp(-0.5 * ((row_offsets[:, None] / sigma_rows) ** 2 + (col_offsets[None, :] / sigma_cols) ** 2))
+    kernel /= kernel.sum()
+
+    smoothed = np.fft.irfft2(np.fft.rfft2(counts, shape) * np.fft.rfft2(kernel), shape)
+    grid = smoothed[:counts.shape[0], :counts.shape[1]]
+    return np.clip(grid, 0, None), [[south, west], [lat_edges[-1], lon_edges[-1]]]
+
+
+def save_density_png(grid, image_file, cmap='YlOrRd', min_fraction=0.02):
+    """
+    Write the density grid as an RGBA PNG for use as a map overlay.
+
+    Cells below `min_fraction` of the peak are fully transparent and opacity ramps up
+    with density, so the basemap stays visible outside the hot areas.
+    """
+    peak = grid.max()
+    scaled = grid / peak if peak > 0 else grid
+
+    rgba = plt.get_cmap(cmap)(scaled)
+    rgba[..., 3] = np.where(scaled < min_fraction, 0, np.sqrt(scaled))
+    # Image rows run north to south, grid rows south to north
+    plt.imsave(image_file, rgba[::-1])
+    return image_file
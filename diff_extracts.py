@@ -0,0 +1,170 @@
+"""
+Compare two releases of the database extract.
+
+    python diff_extracts.py old.xlsx new.xlsx
+
+Every subject is fingerprinted by Subject_ID plus a hash of the fields both releases
+carry, the two fingerprint tables are joined, and the added/removed/modified subjects are
+reported together with the change they cause in each ZIP, race, flag and year aggregate.
+Added, dropped or reordered columns are reported on their own, as a schema change.
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from gang_data import COLUMN_ID, FLAG_COLUMNS, clean_records, read_workbook
+
+# --- Configuration ---
+TOP_CHANGES = 15   # Rows shown per aggregate change table
+HASH_MULTIPLIER = 1_000_003   # Odd multiplier used to mix column hashes into one row hash
+
+
+# --- Fingerprints ---
+
+def _canonical_text(value):
+    """Text form of a cell value, with whole floats written as integers (46409.0 -> '46409')."""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def shared_columns(old_df, new_df):
+    """The columns (other than Subject_ID) both extracts have, in sorted order."""
+    return sorted(set(old_df.columns).intersection(new_df.columns) - {COLUMN_ID})
+
+
+def schema_changes(old_df, new_df):
+    """Columns added and removed between two extracts, and whether the shared ones were reordered."""
+    added = [column for column in new_df.columns if column not in old_df.columns]
+    removed = [column for column in old_df.columns if column not in new_df.columns]
+    old_order = [column for column in old_df.columns if column in new_df.columns]
+    new_order = [column for column in new_df.columns if column in old_df.columns]
+    return added, removed, old_order != new_order
+
+
+def subject_fingerprints(df, columns):
+    """
+    One hash per Subject_ID covering the given fields of every row for that subject.
+
+    Pass the same `columns` (shared_columns) for both extracts, so a column added,
+    dropped or moved between releases doesn't change every fingerprint; those show up
+    in schema_changes instead.
+
+    Each column is factorized and only its distinct values are hashed (as canonical
+    text, so an integer ZIP that becomes a float between releases isn't a change);
+    the per-column hashes are then combined row-wise with array arithmetic. Row
+    hashes are summed per subject, so the fingerprint ignores row order.
+    """
+    row_hashes = np.zeros(len(df), dtype='uint64')
+    for column in columns:
+        codes, uniques = pd.factorize(df[column], use_na_sentinel=False)
+        unique_hashes = pd.util.hash_array(np.array([_canonical_text(value) for value in uniques], dtype=object))
+        row_hashes = row_hashes * np.uint64(HASH_MULTIPLIER) ^ unique_hashes[codes]
+
+    fingerprints = pd.Series(row_hashes, index=df[COLUMN_ID].to_numpy()).groupby(level=0).sum()
+    return fingerprints.rename('fingerprint')
+
+
+def compare_fingerprints(old, new):
+    """Subject IDs added, removed and modified between two fingerprint tables."""
+    added = new.index.difference(old.index)
+    removed = old.index.difference(new.index)
+    common = old.index.intersection(new.index)
+    # Index-aligned array comparison keeps the full 64-bit hashes (no float round trip)
+    modified = common[old.reindex(common).to_numpy() != new.reindex(common).to_numpy()]
+    return added, removed, modified
+
+
+def changed_fields(old_df, new_df, subject_ids):
+    """How many modified subjects changed in each shared column (lowest-sorting row per subject compared)."""
+    common = shared_columns(old_df, new_df)
+
+    def first_rows(df):
+        rows = df[df[COLUMN_ID].isin(subject_ids)][[COLUMN_ID] + common]
+        rows = rows.map(_canonical_text).sort_values([COLUMN_ID] + common)
+        return rows.drop_duplicates(COLUMN_ID).set_index(COLUMN_ID).reindex(subject_ids.astype(str))
+
+    old_rows, new_rows = first_rows(old_df), first_rows(new_df)
+    changes = (old_rows.to_numpy() != new_rows.to_numpy()).sum(axis=0)
+    return pd.Series(changes, index=common).loc[lambda counts: counts > 0].sort_values(ascending=False)
+
+
+# --- Aggregates ---
+
+def aggregates(records):
+    """The published aggregates, each as a Series of counts keyed by its cell."""
+    flag_names = [name for name in FLAG_COLUMNS.values() if name in records.columns]
+    with_zip = records[records['zip'] != '']
+    return {
+        'Records per ZIP': with_zip.groupby('zip').size(),
+        'Records per race': records.groupby('race').size(),
+        'Race x ZIP': with_zip.groupby(['zip', 'race']).size(),
+        'Race x admits gang': records.groupby(['race', 'admits_gang']).size(),
+        'Flagged records per year': records.groupby('create_year')[flag_names].sum().stack(),
+        'Flagged records per ZIP': with_zip.groupby('zip')[flag_names].sum().stack(),
+    }
+
+
+def aggregate_changes(old_records, new_records):
+    """{aggregate name: DataFrame of old/new/change for every cell that changed}."""
+    old_aggregates, new_aggregates = aggregates(old_records), aggregates(new_records)
+    changes = {}
+    for name in old_aggregates:
+        table = pd.concat([old_aggregates[name].rename('Old'), new_aggregates[name].rename('New')], axis=1).fillna(0)
+        table = table.astype(int)
+        table['Change'] = table['New'] - table['Old']
+        changes[name] = table[table['Change'] != 0].sort_values('Change', key=np.abs, ascending=False)
+    return changes
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Report what changed between two releases of the extract.')
+    parser.add_argument('old_file')
+    parser.add_argument('new_file')
+    args = parser.parse_args()
+
+    # --- 1. Data Loading ---
+    frames = []
+    for file_path in [args.old_file, args.new_file]:
+        print(f"Attempting to read data from: {file_path}")
+        try:
+            frames.append(read_workbook(file_path))
+        except FileNotFoundError:
+            print(f"\nERROR: The file '{file_path}' was not found.")
+            exit()
+        print(f"Data loaded successfully. Total records: {len(frames[-1])}")
+    old_df, new_df = frames
+
+    # --- 2. Subject-Level Diff ---
+    start = time.perf_counter()
+    columns = shared_columns(old_df, new_df)
+    added, removed, modified = compare_fingerprints(subject_fingerprints(old_df, columns),
+                                                    subject_fingerprints(new_df, columns))
+    changes = aggregate_changes(clean_records(old_df), clean_records(new_df))
+    elapsed = time.perf_counter() - start
+
+    added_columns, removed_columns, reordered = schema_changes(old_df, new_df)
+    print("\n--- Schema ---")
+    print(f"Added columns:   {', '.join(added_columns) or 'none'}")
+    print(f"Removed columns: {', '.join(removed_columns) or 'none'}")
+    print(f"Column order:    {'changed' if reordered else 'unchanged'}")
+    print(f"Subjects compared on the {len(columns)} shared columns")
+
+    print("\n--- Subjects ---")
+    print(f"Added:    {len(added)}")
+    print(f"Removed:  {len(removed)}")
+    print(f"Modified: {len(modified)}")
+    if len(modified):
+        print("\nFields changed among modified subjects:")
+        print(changed_fields(old_df, new_df, modified).to_string())
+
+    # --- 3. Aggregate Changes ---
+    for name, table in changes.items():
+        print(f"\n--- {name}: {len(table)} cells changed ---")
+        if len(table):
+            print(table.head(TOP_CHANGES).to_string())
+
+    print("\n" + "="*60)
+    print(f"Diff computed in {elapsed:.2f} s (excluding workbook reads)")
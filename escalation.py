@@ -3,6 +3,10 @@ import matplotlib.pyplot as plt
 import numpy as np
 import os
 
+from backends import get_backend
+from gang_data import read_workbook
+from suppression import SUPPRESSED_TEXT, suppress_flag_trends
+
 # --- Configuration ---
 file_path = 'Cook County Regional Gang Intelligence Database.xlsx'
 column_date = 'Subject_Create_Date'
@@ -13,8 +17,8 @@ print(f"Attempting to read data from: {file_path}")
 
 try:
     # Read the data from the Excel file
-    # Ensure the date column is parsed correctly on load
-    df = pd.read_excel(file_path, parse_dates=[column_date])
+    # The date column is decoded below with the vectorized serial/ISO decoder
+    df = read_workbook(file_path)
 
 except FileNotFoundError:
     print(f"\nERROR: The file '{file_path}' was not found.")
@@ -62,31 +66,16 @@ print(f"Data loaded successfully. Total records: {len(df)}")
 
 # --- 2. Data Processing and Aggregation ---
 
-# 2.1 Extract the year
-df['Year'] = df[column_date].dt.year
-
-# 2.2 Calculate the total number of records created each year
-total_records_per_year = df.groupby('Year').size().rename('Total_Records')
-
-# Initialize a DataFrame to store the final percentage results
-trends_df = pd.DataFrame({'Total_Records': total_records_per_year})
+# Decode the date column, count new records per year and the percentage flagged in each
+# tracked column (a subject is flagged if the value is NOT NULL, i.e. 'Y' or any non-empty value)
+# (computed on the configured backend, backends.py: pandas or Arrow)
+trends_df = get_backend().yearly_flag_trends(df, column_date, columns_to_track)
 
-# 2.3 Calculate the count and percentage for each 'Escalation Profile' column
-for col in columns_to_track:
-    # A subject is flagged if the value is NOT NULL (assuming 'Y' or any non-empty value)
-    flagged_df = df[df[col].notna() & (df[col].astype(str).str.strip() != '')]
-    
-    # Count flagged subjects per year
-    flagged_count = flagged_df.groupby('Year').size().rename(f'{col}_Count')
-    
-    # Merge count into the trends DataFrame
-    trends_df = trends_df.merge(flagged_count, on='Year', how='left').fillna(0)
-    
-    # Calculate percentage
-    trends_df[f'{col}_Percent'] = (trends_df[f'{col}_Count'] / trends_df['Total_Records']) * 100
+# Small-cell suppression of each flag's (year x flagged/not flagged) counts
+trends_df = suppress_flag_trends(trends_df, columns_to_track)
 
 print("\n--- Trend Data (Percentage of new records flagged per year) ---")
-print(trends_df[[col for col in trends_df.columns if 'Percent' in col]])
+print(trends_df[[col for col in trends_df.columns if 'Percent' in col]].to_string(na_rep=SUPPRESSED_TEXT))
 print("\n" + "="*60 + "\n")
 
 
@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+
+# --- Configuration ---
+# Excel's 1900 date system counts days from 1899-12-30 (the extra day absorbs the
+# Lotus 1-2-3 leap-year bug), with the time of day stored as the fractional part.
+EXCEL_EPOCH = np.datetime64('1899-12-30T00:00:00', 'us')
+MICROSECONDS_PER_DAY = 86_400 * 1_000_000
+
+
+def excel_serial_to_datetime64(serials):
+    """Convert an array of Excel serial numbers to a datetime64[us] array (NaT where invalid)."""
+    serials = np.asarray(serials, dtype='float64')
+    result = np.full(serials.shape, np.datetime64('NaT'), dtype='datetime64[us]')
+
+    valid = np.isfinite(serials) & (serials > 0)
+    # Round to whole microseconds; float64 serials carry ~10 microseconds of precision anyway
+    offsets = np.rint(serials[valid] * MICROSECONDS_PER_DAY).astype('int64')
+    result[valid] = EXCEL_EPOCH + offsets.astype('timedelta64[us]')
+    return result
+
+
+def decode_excel_dates(values):
+    """
+    Decode a column of Excel dates into a datetime64[us] array.
+
+    Accepts already-parsed datetimes, raw serial numbers and ISO-8601 strings (or any
+    mix of them). Numbers go through the vectorized serial path; strings are parsed
+    once per distinct value and broadcast back to the rows.
+    """
+    series = pd.Series(values, copy=False)
+
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series.to_numpy(dtype='datetime64[us]')
+    if pd.api.types.is_numeric_dtype(series):
+        return excel_serial_to_datetime64(series.to_numpy(dtype='float64', na_value=np.nan))
+
+    # Mixed/object column: split numeric serials from everything else
+    numeric = pd.to_numeric(series, errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+    result = excel_serial_to_datetime64(numeric)
+
+    remaining = np.isnan(numeric) & series.notna().to_numpy()
+    if remaining.any():
+        codes, uniques = pd.factorize(series[remaining].astype(str).str.strip())
+        parsed = pd.to_datetime(pd.Series(uniques), format='ISO8601', errors='coerce')
+        parsed = parsed.to_numpy(dtype='datetime64[us]')
+        result[remaining] = parsed[codes]
+
+    return result
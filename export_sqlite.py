@@ -0,0 +1,90 @@
+import os
+import sqlite3
+
+from gang_data import FILE_PATH, FLAG_COLUMNS, clean_records, read_workbook
+
+# --- Configuration ---
+file_path = FILE_PATH
+DATABASE_FILE = 'gang_data.sqlite'
+
+# Indexed columns of the records table (the flag columns are added below)
+INDEXED_COLUMNS = ['zip', 'race', 'create_date', 'create_year', 'subject_id']
+
+# --- 1. Data Loading ---
+print(f"Attempting to read data from: {file_path}")
+
+try:
+    df = read_workbook(file_path)
+except FileNotFoundError:
+    print(f"\nERROR: The file '{file_path}' was not found.")
+    print("Please ensure the Excel file is in the same directory as this script.")
+    exit()
+except Exception as e:
+    print(f"\nAn unexpected error occurred during file reading: {e}")
+    exit()
+
+print(f"Data loaded successfully. Total records: {len(df)}")
+
+
+# --- 2. Cleaning and Encoding ---
+
+records = clean_records(df)
+flag_names = [name for name in FLAG_COLUMNS.values() if name in records.columns]
+
+# SQLite has no date type; ISO-8601 text sorts and range-filters correctly
+for column in ['create_date', 'approved_date']:
+    if column in records.columns:
+        records[column] = records[column].dt.strftime('%Y-%m-%d %H:%M:%S')
+
+
+# --- 3. Aggregates ---
+
+zip_race_counts = records[records['zip'] != ''].groupby(['zip', 'race']).size().rename('records').reset_index()
+
+race_admits_counts = records.groupby(['race', 'admits_gang']).size().rename('records').reset_index()
+
+zip_flag_counts = (
+    records[records['zip'] != '']
+    .groupby('zip')[flag_names].sum()
+    .join(records[records['zip'] != ''].groupby('zip').size().rename('records'))
+    .reset_index()
+)
+
+year_flag_counts = (
+    records.groupby('create_year')[flag_names].sum()
+    .join(records.groupby('create_year').size().rename('records'))
+    .reset_index()
+)
+
+aggregates = {
+    'zip_race_counts': zip_race_counts,
+    'race_admits_counts': race_admits_counts,
+    'zip_flag_counts': zip_flag_counts,
+    'year_flag_counts': year_flag_counts,
+}
+
+
+# --- 4. Write the Database ---
+
+# Rebuild from scratch so the file always matches the current extract
+if os.path.exists(DATABASE_FILE):
+    os.remove(DATABASE_FILE)
+
+with sqlite3.connect(DATABASE_FILE) as connection:
+    records.to_sql('records', connection, index=False)
+    for column in INDEXED_COLUMNS + flag_names:
+        if column in records.columns:
+            connection.execute(f'CREATE INDEX idx_records_{column} ON records ({column})')
+
+    for table, data in aggregates.items():
+        data.to_sql(table, connection, index=False)
+    connection.execute('CREATE INDEX idx_zip_race_counts_zip ON zip_race_counts (zip)')
+    connection.execute('CREATE INDEX idx_zip_flag_counts_zip ON zip_flag_counts (zip)')
+
+    connection.execute('ANALYZE')
+
+print(f"\n--- Tables written to '{DATABASE_FILE}' ---")
+print(f"records: {len(records)} rows")
+for table, data in aggregates.items():
+    print(f"{table}: {len(data)} rows")
+print("\nQuery it with: python query_db.py --help")
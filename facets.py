@@ -0,0 +1,316 @@
+"""
+Race x gang-admission breakdowns as a grid of small multiples.
+
+    python facets.py --by state                      # one panel per state, shown on screen
+    python facets.py --by year --output facets.png   # one figure with every panel
+    python facets.py --by zip --output facets.pdf    # paginated, FACETS_PER_PAGE panels a page
+
+Each panel is the stacked bar chart race.py draws, for the records of one state, create
+year, ZIP or 3-digit ZIP prefix (--by zip3), with small cells suppressed as in race.py. All panels are counted in one pass into a
+(facet x race x admits) array, and bar bottoms and label positions are computed from that
+array directly, so hundreds of facets render without per-bar searching.
+"""
+import argparse
+import time
+
+import matplotlib
+import numpy as np
+import pandas as pd
+
+from gang_data import (COLUMN_CREATE_DATE, COLUMN_RACE, COLUMN_STATE, COLUMN_ZIP, FILE_PATH,
+                       clean_records, read_workbook)
+from suppression import SUPPRESSED_TEXT, suppression_mask
+
+# --- Configuration ---
+ADMITS_LABELS = ['N', 'Y']
+ADMITS_COLORS = ['#4CAF50', '#FF5733']   # Same colors as race.py
+SUPPRESSED_COLOR = '#dddddd'             # Hatched: counts withheld by small-cell suppression
+SUPPRESSED_HATCH = '////'
+
+FACETS_PER_PAGE = (5, 6)        # rows x columns of panels on each PDF page
+PANEL_SIZE = (3.2, 2.2)         # inches per panel, including the gap around it
+PANEL_GAP = (0.15, 0.35)        # gap between panels as a share of the panel (room for titles above)
+BAR_WIDTH = 0.7                 # share of each race's slot filled by its bar
+MARGINS = {'left': 0.3, 'right': 1.8, 'top': 0.8, 'bottom': 1.6}   # inches around the grid (legend on the right)
+SUPPRESSED_STUB = 0.05          # Height (share of the panel) of the marker for a race whose total is withheld
+INSIDE_LABEL_FRACTION = 0.12    # Segments at least this share of the panel's tallest bar are labelled inside
+OUTSIDE_LABEL_STEP = 0.07       # Spacing of labels stacked above a bar, as a share of the tallest bar
+MAX_LABELLED_FACETS = 60        # Single figures with more panels than this are drawn without count labels
+
+FACET_NAMES = {'state': 'State', 'year': 'Create Year', 'zip': 'ZIP Code', 'zip3': 'ZIP Prefix'}
+
+
+# --- Counting ---
+
+def facet_keys(records, by):
+    """The facet label of every record for --by state/year/zip/zip3."""
+    if by == 'state':
+        keys = records['state']
+    elif by == 'year':
+        keys = records['create_year'].astype(str).replace('<NA>', None)
+    elif by == 'zip':
+        keys = records['zip'].replace('', None)
+    elif by == 'zip3':
+        keys = (records['zip'].str[:3] + 'xx').where(records['zip'] != '')
+    else:
+        raise ValueError(f"unknown facet '{by}'")
+    return keys.fillna('Unknown')
+
+
+def facet_counts(facets, races, admits):
+    """
+    (facet x race x admits) count array with its facet and race labels.
+
+    Facets are ordered by record count (largest first) and races alphabetically, so every
+    panel shares the same x axis.
+    """
+    facet_codes, facet_labels = pd.factorize(facets)
+    race_codes, race_labels = pd.factorize(races, sort=True)
+    admits_codes = np.asarray(admits, dtype=np.intp)
+
+    cells = (facet_codes * len(race_labels) + race_codes) * len(ADMITS_LABELS) + admits_codes
+    counts = np.bincount(cells, minlength=len(facet_labels) * len(race_labels) * len(ADMITS_LABELS))
+    counts = counts.reshape(len(facet_labels), len(race_labels), len(ADMITS_LABELS))
+
+    order = np.argsort(-counts.sum(axis=(1, 2)), kind='stable')
+    return counts[order], np.asarray(facet_labels)[order], np.asarray(race_labels)
+
+
+def published_segments(counts, withheld):
+    """
+    What each panel may show once `withheld` (suppression_mask(counts)) is applied.
+
+    Returns the (facets x races x 3) segment heights: the published N and Y counts and,
+    where a race's total is published, the withheld rest of it (drawn hatched, so bars
+    keep their full height without revealing the split). Also returns which race totals
+    are withheld outright, and each facet's total (NaN when withheld).
+    """
+    published = np.where(withheld[:, :-1, :-1], 0, counts)
+    race_hidden = withheld[:, :-1, -1]
+    remainder = np.where(race_hidden, 0, counts.sum(axis=2) - published.sum(axis=2))
+    facet_totals = np.where(withheld[:, -1, -1], np.nan, counts.sum(axis=(1, 2)))
+    return np.concatenate([published, remainder[:, :, None]], axis=2), race_hidden, facet_totals
+
+
+# --- Label Placement ---
+
+def label_positions(counts):
+    """
+    Where each segment's count label goes, for every facet at once.
+
+    `counts` is (facets x races x admits). Returns the label y positions, whether each
+    label sits inside its segment, and the y-axis top each facet needs. Segments that are
+    large relative to their panel's tallest bar are labelled at their centre; the others are
+    stacked above the bar, one OUTSIDE_LABEL_STEP apart, in N-then-Y order.
+    """
+    tops = counts.cumsum(axis=2)
+    bottoms = tops - counts
+    totals = tops[:, :, -1]
+    panel_max = np.maximum(totals.max(axis=1), 1)[:, None, None]
+
+    inside = counts >= INSIDE_LABEL_FRACTION * panel_max
+    outside = (counts > 0) & ~inside
+    # Rank of each outside label within its bar: 1 for the first, 2 for the second, ...
+    outside_rank = outside.cumsum(axis=2)
+
+    y = np.where(inside, bottoms + counts / 2, totals[:, :, None] + outside_rank * OUTSIDE_LABEL_STEP * panel_max)
+    y_top = np.maximum(panel_max[:, 0, 0], (y * outside).max(axis=(1, 2))) + OUTSIDE_LABEL_STEP * panel_max[:, 0, 0]
+    return y, inside, y_top
+
+
+# --- Rendering ---
+
+def panel_origins(facet_count, columns):
+    """Lower-left corner of each panel in canvas units (a panel is 1 x 1, rows run downwards)."""
+    index = np.arange(facet_count)
+    return index % columns * (1 + PANEL_GAP[0]), -(index // columns) * (1 + PANEL_GAP[1])
+
+
+def bar_polygons(counts, y_top, x0, y0):
+    """
+    Rectangle vertices of every bar segment of every panel, one (n, 4, 2) array per admits
+    status, with bar heights scaled to each panel's own y-axis top.
+    """
+    race_count = counts.shape[1]
+    centres = (np.arange(race_count) + 0.5) / race_count
+    half_width = BAR_WIDTH / race_count / 2
+    left = x0[:, None] + centres - half_width
+    right = left + 2 * half_width
+
+    scaled = counts / y_top[:, None, None]
+    tops = y0[:, None, None] + scaled.cumsum(axis=2)
+    bottoms = tops - scaled
+
+    polygons = []
+    for j in range(counts.shape[2]):
+        corners = [(left, bottoms[:, :, j]), (left, tops[:, :, j]), (right, tops[:, :, j]), (right, bottoms[:, :, j])]
+        vertices = np.stack([np.stack(corner, axis=-1) for corner in corners], axis=2)
+        polygons.append(vertices[counts[:, :, j] > 0])
+    return polygons
+
+
+def reference_levels(y_top):
+    """A round count below each panel's top (e.g. 2000 for a top of 2600), drawn as a faint gridline."""
+    magnitude = 10 ** np.floor(np.log10(np.maximum(y_top, 1)))
+    levels = np.floor(y_top / magnitude) * magnitude
+    return np.where(levels >= y_top, levels - magnitude, levels)
+
+
+def render_page(counts, race_hidden, facet_totals, y, inside, y_top, facet_labels, race_labels, columns, title,
+                show_labels):
+    """
+    A figure with one panel per facet on a grid `columns` wide (`counts`, `race_hidden` and
+    `facet_totals` as published_segments returns them).
+
+    Every panel is drawn on one shared canvas: all bar segments of a colour are one
+    PolyCollection, panel frames and gridlines one collection each, so drawing cost barely
+    grows with the number of facets (only the text labels are per-facet artists).
+    """
+    import matplotlib.pyplot as plt
+    from matplotlib.collections import LineCollection, PolyCollection
+
+    facet_count, race_count = len(facet_labels), len(race_labels)
+    rows = -(-facet_count // columns)
+    width = columns * PANEL_SIZE[0] + MARGINS['left'] + MARGINS['right']
+    height = rows * PANEL_SIZE[1] + MARGINS['top'] + MARGINS['bottom']
+    fig = plt.figure(figsize=(width, height))
+    ax = fig.add_axes([MARGINS['left'] / width, MARGINS['bottom'] / height,
+                       columns * PANEL_SIZE[0] / width, rows * PANEL_SIZE[1] / height])
+    ax.set_xlim(-PANEL_GAP[0] / 2, columns * (1 + PANEL_GAP[0]) - PANEL_GAP[0] / 2)
+    ax.set_ylim(-(rows - 1) * (1 + PANEL_GAP[1]) - PANEL_GAP[1] / 2, 1 + PANEL_GAP[1] / 2)
+    ax.axis('off')
+
+    x0, y0 = panel_origins(facet_count, columns)
+    levels = reference_levels(y_top)
+    frames = np.stack([np.stack([x0, y0], 1), np.stack([x0, y0 + 1], 1),
+                       np.stack([x0 + 1, y0 + 1], 1), np.stack([x0 + 1, y0], 1)], axis=1)
+    gridlines = np.stack([np.stack([x0, y0 + levels / y_top], 1), np.stack([x0 + 1, y0 + levels / y_top], 1)], axis=1)
+    ax.add_collection(PolyCollection(frames, facecolors='none', edgecolors='#999999', linewidths=0.5))
+    ax.add_collection(LineCollection(gridlines, colors='#cccccc', linestyles='--', linewidths=0.5))
+    polygons = bar_polygons(counts, y_top, x0, y0)
+    for segments, color in zip(polygons, ADMITS_COLORS):
+        ax.add_collection(PolyCollection(segments, facecolors=color, edgecolors='black', linewidths=0.3))
+
+    # Withheld counts: the hatched rest of a published race total, or a short hatched
+    # marker where the race's total itself is withheld
+    centres = (np.arange(race_count) + 0.5) / race_count
+    facets, races = np.nonzero(race_hidden)
+    left = x0[facets] + centres[races] - BAR_WIDTH / race_count / 2
+    right = left + BAR_WIDTH / race_count
+    stubs = np.stack([np.stack([left, y0[facets]], 1), np.stack([left, y0[facets] + SUPPRESSED_STUB], 1),
+                      np.stack([right, y0[facets] + SUPPRESSED_STUB], 1), np.stack([right, y0[facets]], 1)], axis=1)
+    ax.add_collection(PolyCollection(np.concatenate([polygons[-1], stubs]), facecolors=SUPPRESSED_COLOR,
+                                     edgecolors='black', linewidths=0.3, hatch=SUPPRESSED_HATCH))
+
+    for index in range(facet_count):
+        total = SUPPRESSED_TEXT if np.isnan(facet_totals[index]) else f'{int(facet_totals[index]):,}'
+        ax.text(x0[index] + 0.5, y0[index] + 1.02, f'{facet_labels[index]} (n={total})',
+                ha='center', va='bottom', fontsize=8, fontweight='bold')
+        ax.text(x0[index] + 0.01, y0[index] + levels[index] / y_top[index], f'{int(levels[index]):,}',
+                ha='left', va='bottom', fontsize=5, color='#777777')
+
+    if show_labels:
+        # Only the published N/Y counts are labelled, never the withheld rest
+        for facet, race, j in zip(*np.nonzero(counts[:, :, :len(ADMITS_LABELS)])):
+            ax.text(x0[facet] + centres[race], y0[facet] + y[facet, race, j] / y_top[facet], int(counts[facet, race, j]),
+                    ha='center', va='center' if inside[facet, race, j] else 'bottom', fontsize=5, fontweight='bold',
+                    color='white' if inside[facet, race, j] else ADMITS_COLORS[j])
+
+    # Race names under the lowest panel of each column
+    for column in range(min(columns, facet_count)):
+        lowest = column + (facet_count - 1 - column) // columns * columns
+        for race, label in enumerate(race_labels):
+            ax.text(x0[lowest] + (race + 0.5) / race_count, y0[lowest] - 0.03, label,
+                    rotation=60, ha='right', va='top', fontsize=6, rotation_mode='anchor')
+
+    handles = [plt.Rectangle((0, 0), 1, 1, facecolor=color, edgecolor='black') for color in ADMITS_COLORS]
+    handles.append(plt.Rectangle((0, 0), 1, 1, facecolor=SUPPRESSED_COLOR, edgecolor='black', hatch=SUPPRESSED_HATCH))
+    fig.legend(handles, ['No (N)', 'Yes (Y)', f'N/Y {SUPPRESSED_TEXT}'], title='Admits Gang Status',
+               loc='upper right', fontsize=9)
+    fig.suptitle(title, fontsize=16, fontweight='bold', y=1 - 0.15 / height)
+    return fig
+
+
+def render_facets(counts, withheld, facet_labels, race_labels, title, output_file=None):
+    """
+    Draw every facet with the `withheld` (suppression_mask) counts hidden: paginated into a
+    multi-page PDF when output_file ends in .pdf, otherwise as one figure (saved to
+    output_file, or shown when it's None).
+    """
+    if output_file is not None:
+        matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    counts, race_hidden, facet_totals = published_segments(counts, withheld)
+    y, inside, y_top = label_positions(counts)
+
+    if output_file and output_file.lower().endswith('.pdf'):
+        from matplotlib.backends.backend_pdf import PdfPages
+
+        per_page = FACETS_PER_PAGE[0] * FACETS_PER_PAGE[1]
+        pages = -(-len(facet_labels) // per_page)
+        with PdfPages(output_file) as pdf:
+            for number, start in enumerate(range(0, len(facet_labels), per_page), start=1):
+                page = slice(start, start + per_page)
+                fig = render_page(counts[page], race_hidden[page], facet_totals[page], y[page], inside[page], y_top[page],
+                                  facet_labels[page], race_labels, FACETS_PER_PAGE[1], f'{title} ({number}/{pages})',
+                                  show_labels=True)
+                pdf.savefig(fig)
+                plt.close(fig)
+        return
+
+    columns = int(np.ceil(np.sqrt(len(facet_labels))))
+    fig = render_page(counts, race_hidden, facet_totals, y, inside, y_top, facet_labels, race_labels, columns, title,
+                      show_labels=len(facet_labels) <= MAX_LABELLED_FACETS)
+    if output_file:
+        fig.savefig(output_file, dpi=150)
+        plt.close(fig)
+    else:
+        plt.show()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Race x gang admission as small multiples.')
+    parser.add_argument('--by', choices=['state', 'year', 'zip', 'zip3'], default='state')
+    parser.add_argument('--file', default=FILE_PATH)
+    parser.add_argument('--output', help='PNG/SVG for one figure, .pdf for paginated output (default: show)')
+    parser.add_argument('--max-facets', type=int, help='only the largest N facets')
+    args = parser.parse_args()
+
+    # --- 1. Data Loading ---
+    print(f"Attempting to read data from: {args.file}")
+    try:
+        df = read_workbook(args.file)
+    except FileNotFoundError:
+        print(f"\nERROR: The file '{args.file}' was not found.")
+        print("--- Generating sample data for demonstration instead ---")
+        np.random.seed(48)
+        data_size = 20000
+        df = pd.DataFrame({
+            COLUMN_RACE: np.random.choice(['Black', 'White', 'Hispanic', 'Multiracial', None], size=data_size, p=[0.5, 0.15, 0.3, 0.03, 0.02]),
+            'Subject_Admits_Gang': np.random.choice(['Y', 'NULL', None], size=data_size, p=[0.6, 0.3, 0.1]),
+            COLUMN_STATE: np.random.choice(['IL', 'IN', 'WI', 'MI'], size=data_size, p=[0.7, 0.2, 0.05, 0.05]),
+            COLUMN_ZIP: np.random.randint(60000, 60700, size=data_size),
+            COLUMN_CREATE_DATE: 41275 + np.random.rand(data_size) * 365 * 6,
+        })
+    print(f"Data loaded successfully. Total records: {len(df)}")
+
+    # --- 2. Counting ---
+    start = time.perf_counter()
+    records = clean_records(df)
+    counts, facet_labels, race_labels = facet_counts(facet_keys(records, args.by), records['race'], records['admits_gang'])
+    if args.max_facets:
+        counts, facet_labels = counts[:args.max_facets], facet_labels[:args.max_facets]
+
+    # Small-cell suppression of every facet's race x admits table (and its totals) in one call;
+    # withheld counts are drawn hatched, without their values
+    withheld = suppression_mask(counts)
+    cells = withheld[:, :-1, :-1]
+    print(f"Suppression: {int((cells & (counts > 0)).sum())} of {int((counts > 0).sum())} non-empty cells withheld")
+    print(f"\n{len(facet_labels)} facets x {len(race_labels)} races counted in {time.perf_counter() - start:.2f} s")
+
+    # --- 3. Rendering ---
+    start = time.perf_counter()
+    title = f'Gang Admission Status by Subject Race, per {FACET_NAMES[args.by]}'
+    render_facets(counts, withheld, facet_labels, race_labels, title, args.output)
+    print(f"Rendered in {time.perf_counter() - start:.2f} s" + (f" -> {args.output}" if args.output else ''))
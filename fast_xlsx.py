@@ -0,0 +1,345 @@
+"""
+Parallel reader for the database workbook's worksheet XML.
+
+    python fast_xlsx.py                  # parity check against pd.read_excel, then time 1..N workers
+    python fast_xlsx.py --workers 1 2 4  # time specific worker counts
+
+pd.read_excel walks `xl/worksheets/sheet1.xml` cell by cell on one core. read_xlsx
+instead cuts the decompressed XML into chunks at <row> boundaries, scans the chunks in a
+process pool, and gets back compact typed arrays per chunk (row, column, kind, number,
+style) rather than Python objects. Shared strings are decoded once in the parent and
+looked up with one array take per column; date-formatted cells are converted with the
+vectorized serial decoder. The result matches pd.read_excel's frame, column for column.
+"""
+import argparse
+import multiprocessing
+import os
+import re
+import threading
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from xml.etree.ElementTree import fromstring
+from xml.sax.saxutils import unescape
+
+import numpy as np
+import pandas as pd
+
+from excel_dates import excel_serial_to_datetime64
+
+# --- Configuration ---
+FILE_PATH = 'Cook County Regional Gang Intelligence Database.xlsx'
+SHEET_PART = 'xl/worksheets/sheet1.xml'
+CHUNKS_PER_WORKER = 4   # Smaller chunks than workers keep the pool evenly loaded
+
+SPREADSHEET_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+
+# Cell kinds in the arrays the workers return
+EMPTY, NUMBER, INTEGER, SHARED_STRING, INLINE_STRING, BOOLEAN = range(6)
+
+# Built-in number formats that display dates/times (ECMA-376 18.8.30)
+BUILTIN_DATE_FORMATS = set(range(14, 23)) | set(range(45, 48))
+
+# Strings pd.read_excel reads as missing by default (its documented na_values list)
+STR_NA_VALUES = {
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null',
+}
+
+FAST_CELL = re.compile(rb'<c r="([A-Z]+)(\d+)"(?: s="(\d*)")?(?: t="(\w*)")?>(?:<f>[^<]*</f>)?<v>([^<]*)</v></c>')
+CELL = re.compile(rb'<c\b([^>]*?)(?:/>|>(.*?)</c>)', re.S)
+ATTRIBUTE = re.compile(rb'(\w+)="([^"]*)"')
+VALUE = re.compile(rb'<v>(.*?)</v>', re.S)
+INLINE_TEXT = re.compile(rb'<t(?:\s[^>]*)?>(.*?)</t>', re.S)
+CELL_REFERENCE = re.compile(rb'([A-Z]+)(\d+)')
+
+
+# --- Workbook Parts ---
+
+def column_index(letters):
+    """0-based column index of a column reference ('A' -> 0, 'AA' -> 26)."""
+    index = 0
+    for letter in letters:
+        index = index * 26 + letter - 64
+    return index - 1
+
+
+def read_shared_strings(workbook):
+    """The shared-strings table as an object array (index -> text)."""
+    if 'xl/sharedStrings.xml' not in workbook.namelist():
+        return np.array([], dtype=object)
+    root = fromstring(workbook.read('xl/sharedStrings.xml'))
+    return np.array([''.join(item.itertext()) for item in root.iter(f'{SPREADSHEET_NS}si')], dtype=object)
+
+
+def read_date_styles(workbook):
+    """Boolean array over cell style indexes: True where the style's number format is a date."""
+    if 'xl/styles.xml' not in workbook.namelist():
+        return np.zeros(1, dtype=bool)
+    root = fromstring(workbook.read('xl/styles.xml'))
+
+    custom_dates = set()
+    for number_format in root.iter(f'{SPREADSHEET_NS}numFmt'):
+        # Strip quoted literals and [colour]/[locale] sections before looking for date codes
+        code = re.sub(r'"[^"]*"|\[[^\]]*\]', '', number_format.get('formatCode', '')).lower()
+        if re.search(r'[dmy]', code):
+            custom_dates.add(int(number_format.get('numFmtId')))
+
+    cell_formats = root.find(f'{SPREADSHEET_NS}cellXfs')
+    format_ids = [int(xf.get('numFmtId', 0)) for xf in cell_formats] if cell_formats is not None else [0]
+    return np.array([fid in BUILTIN_DATE_FORMATS or fid in custom_dates for fid in format_ids] or [False])
+
+
+def split_rows(sheet, chunk_count):
+    """Cut the <sheetData> body into about chunk_count byte ranges, each starting at a <row."""
+    start = sheet.find(b'<sheetData')
+    start = sheet.find(b'>', start) + 1
+    end = sheet.rfind(b'</sheetData>')
+    if end < 0:   # Empty sheet written as <sheetData/>
+        return []
+
+    bounds = [start]
+    step = (end - start) // chunk_count
+    for i in range(1, chunk_count):
+        boundary = sheet.find(b'<row ', start + i * step, end)
+        if boundary < 0 or boundary <= bounds[-1]:
+            continue
+        bounds.append(boundary)
+    bounds.append(end)
+    return [(bounds[i], bounds[i + 1]) for i in range(len(bounds) - 1)]
+
+
+# --- Chunk Parsing (runs in the workers) ---
+
+def parse_chunk(chunk):
+    """
+    Scan one run of <row> elements into typed arrays.
+
+    Returns (rows, columns, kinds, numbers, styles, inline) where numbers holds the
+    numeric value, the shared-string index or the boolean, and `inline` maps the
+    position of each inline/formula string cell to its text. Cells written in the
+    usual <c r s t><v> layout are converted with array operations; a chunk with any
+    other cell layout goes through the general per-cell scanner.
+    """
+    cells = FAST_CELL.findall(chunk)
+    if len(cells) != chunk.count(b'</c>'):
+        return parse_cells(chunk)
+    if not cells:
+        return parse_cells(b'')
+
+    letters, rows, styles, types, values = (np.array(field) for field in zip(*cells))
+    kinds = np.select([types == b's', types == b'b', (types == b'str') | (types == b'e')],
+                      [SHARED_STRING, BOOLEAN, INLINE_STRING], default=NUMBER).astype(np.int8)
+    numeric = (kinds != INLINE_STRING) & (values != b'')
+    kinds[(kinds == NUMBER) & ~numeric] = EMPTY
+    integer = (kinds == NUMBER) & (np.char.find(values, b'.') < 0) & (np.char.find(np.char.lower(values), b'e') < 0)
+    kinds[integer] = INTEGER
+
+    numbers = np.full(len(cells), np.nan)
+    numbers[numeric] = values[numeric].astype(np.float64)
+    inline = {int(position): unescape(values[position].decode(), {'&quot;': '"', '&apos;': "'"})
+              for position in np.flatnonzero(kinds == INLINE_STRING)}
+
+    unique_letters, letter_codes = np.unique(letters, return_inverse=True)
+    columns = np.array([column_index(letter) for letter in unique_letters], dtype=np.int16)[letter_codes]
+    styles = np.where(styles == b'', b'0', styles).astype(np.int32)
+
+    keep = kinds != EMPTY
+    positions = np.cumsum(keep) - 1
+    return (rows[keep].astype(np.int32), columns[keep], kinds[keep], numbers[keep], styles[keep],
+            {int(positions[position]): text for position, text in inline.items()})
+
+
+def parse_cells(chunk):
+    """parse_chunk for any cell layout: attributes in any order, inline strings, formulas."""
+    rows, columns, kinds, numbers, styles, inline = [], [], [], [], [], {}
+    for match in CELL.finditer(chunk):
+        attributes = dict(ATTRIBUTE.findall(match.group(1)))
+        reference = CELL_REFERENCE.match(attributes[b'r'])
+        body = match.group(2) or b''
+        cell_type = attributes.get(b't', b'n')
+
+        kind, number = EMPTY, np.nan
+        if cell_type == b'inlineStr':
+            text = INLINE_TEXT.findall(body)
+            if text:
+                kind = INLINE_STRING
+                inline[len(rows)] = unescape(b''.join(text).decode(), {'&quot;': '"', '&apos;': "'"})
+        else:
+            value = VALUE.search(body)
+            if value is not None:
+                raw = value.group(1)
+                if cell_type == b's':
+                    kind, number = SHARED_STRING, int(raw)
+                elif cell_type == b'b':
+                    kind, number = BOOLEAN, int(raw)
+                elif cell_type in (b'str', b'e'):
+                    kind = INLINE_STRING
+                    inline[len(rows)] = unescape(raw.decode(), {'&quot;': '"', '&apos;': "'"})
+                else:
+                    kind = NUMBER if (b'.' in raw or b'E' in raw or b'e' in raw) else INTEGER
+                    number = float(raw)
+        if kind == EMPTY:
+            continue
+
+        rows.append(int(reference.group(2)))
+        columns.append(column_index(reference.group(1)))
+        kinds.append(kind)
+        numbers.append(number)
+        styles.append(int(attributes.get(b's', 0)))
+
+    return (np.array(rows, dtype=np.int32), np.array(columns, dtype=np.int16), np.array(kinds, dtype=np.int8),
+            np.array(numbers, dtype=np.float64), np.array(styles, dtype=np.int32), inline)
+
+
+# --- Assembly ---
+
+def build_column(kinds, numbers, dates, shared_strings, inline_text, row_count, positions):
+    """One DataFrame column from the typed cell arrays of that column."""
+    present = kinds != EMPTY
+    numeric = (kinds == NUMBER) | (kinds == INTEGER)
+
+    if present.all() and len(kinds) and numeric.all() and dates.all():
+        values = np.full(row_count, np.datetime64('NaT'), dtype='datetime64[us]')
+        values[positions] = excel_serial_to_datetime64(numbers)
+        return pd.Series(values)
+
+    if len(kinds) and (numeric | (kinds == EMPTY)).all() and not dates.any():
+        values = np.full(row_count, np.nan)
+        values[positions] = numbers
+        if len(positions) == row_count and (kinds == INTEGER).all():
+            return pd.Series(values.astype(np.int64))
+        return pd.Series(values)
+
+    # Strings or mixed cells: build Python objects the way openpyxl hands them to pandas
+    values = np.full(row_count, np.nan, dtype=object)
+    objects = np.empty(len(kinds), dtype=object)
+    shared = kinds == SHARED_STRING
+    objects[shared] = shared_strings[numbers[shared].astype(np.intp)]
+    objects[kinds == NUMBER] = numbers[kinds == NUMBER]
+    objects[kinds == INTEGER] = [int(number) for number in numbers[kinds == INTEGER]]
+    objects[kinds == BOOLEAN] = numbers[kinds == BOOLEAN] != 0
+    objects[numeric & dates] = list(excel_serial_to_datetime64(numbers[numeric & dates]).astype('datetime64[us]').astype(object))
+    for position, text in inline_text.items():
+        objects[position] = text
+    values[positions] = objects
+
+    # pandas' default NA strings ('', 'NULL', 'N/A', ...) become NaN, as in read_excel
+    strings = np.array([isinstance(value, str) for value in values])
+    if strings.any():
+        is_na = pd.Series(values[strings]).isin(STR_NA_VALUES).to_numpy()
+        values[np.flatnonzero(strings)[is_na]] = np.nan
+
+    column = pd.Series(values)
+    # Like read_excel, a column whose values all read as numbers becomes numeric
+    converted = pd.to_numeric(column, errors='coerce')
+    if converted.notna().sum() == column.notna().sum() and not (numeric & dates).any():
+        return converted
+    return column.infer_objects()
+
+
+def read_xlsx(file_path=FILE_PATH, workers=None, while_parsing=None):
+    """
+    Read the first worksheet into a DataFrame using `workers` processes (default: all
+    cores). The first row is the header, as in pd.read_excel.
+
+    The pool forks, so the report scripts (which read the workbook at module level, with
+    no __main__ guard) are not re-run in the workers. Forking while other threads are
+    running can deadlock the children (a lock held by another thread is copied locked), so
+    where fork is unavailable, or this process has other threads, the chunks are parsed in
+    this process instead.
+
+    `while_parsing` is called once the parse is under way, after the pool has forked all
+    of its workers, so a caller can start threads that overlap the parse without ever
+    being forked.
+    """
+    can_fork = 'fork' in multiprocessing.get_all_start_methods() and threading.active_count() == 1
+    workers = (workers or os.cpu_count() or 1) if can_fork else 1
+    with zipfile.ZipFile(file_path) as workbook:
+        shared_strings = read_shared_strings(workbook)
+        date_styles = read_date_styles(workbook)
+        sheet = workbook.read(SHEET_PART)
+
+    chunks = [sheet[start:end] for start, end in split_rows(sheet, workers * CHUNKS_PER_WORKER)]
+    del sheet
+    if workers == 1:
+        if while_parsing is not None:
+            while_parsing()
+        parsed = [parse_chunk(chunk) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('fork')) as pool:
+            # With fork, the first submit starts every worker (map submits all chunks at once)
+            results = pool.map(parse_chunk, chunks)
+            if while_parsing is not None:
+                while_parsing()
+            parsed = list(results)
+
+    # Concatenate the per-chunk arrays (chunks are in row order)
+    rows, columns, kinds, numbers, styles = (np.concatenate([part[i] for part in parsed]) for i in range(5))
+    inline, offset = {}, 0
+    for part in parsed:
+        inline.update({offset + position: text for position, text in part[5].items()})
+        offset += len(part[0])
+
+    dates = date_styles[np.minimum(styles, len(date_styles) - 1)]
+
+    # Header row -> column names; trailing rows without any value are dropped, as in read_excel
+    header = rows == rows.min() if len(rows) else np.zeros(0, dtype=bool)
+    names = {}
+    for position in np.flatnonzero(header):
+        if kinds[position] == SHARED_STRING:
+            names[columns[position]] = shared_strings[int(numbers[position])]
+        elif position in inline:
+            names[columns[position]] = inline[position]
+        else:
+            names[columns[position]] = numbers[position].item() if kinds[position] == NUMBER else int(numbers[position])
+    first_data_row = rows.min() + 1 if len(rows) else 2
+    row_count = int(rows.max() - first_data_row + 1) if len(rows) and (~header).any() else 0
+
+    data = {}
+    for column in sorted(names):
+        cells = np.flatnonzero(~header & (columns == column))
+        column_inline = {i: inline[cell] for i, cell in enumerate(cells) if cell in inline} if inline else {}
+        data[names[column]] = build_column(kinds[cells], numbers[cells], dates[cells], shared_strings,
+                                           column_inline, row_count, rows[cells] - first_data_row)
+    return pd.DataFrame(data)
+
+
+# --- Parity and Benchmark ---
+
+def compare_frames(expected, actual):
+    """Names of the columns whose values or dtypes differ between two frames (empty when identical)."""
+    differences = []
+    if list(expected.columns) != list(actual.columns) or len(expected) != len(actual):
+        return [f'shape/columns: {expected.shape} vs {actual.shape}']
+    for column in expected.columns:
+        if expected[column].dtype != actual[column].dtype:
+            differences.append(f'{column}: dtype {expected[column].dtype} vs {actual[column].dtype}')
+        elif not expected[column].equals(actual[column]):
+            differences.append(f'{column}: values differ')
+    return differences
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Check and time the parallel workbook reader.')
+    parser.add_argument('--file', default=FILE_PATH)
+    parser.add_argument('--workers', type=int, nargs='*')
+    args = parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    worker_counts = args.workers or sorted({1, 2, 4, cores} - {0})
+    print(f"Cores available: {cores}")
+
+    start = time.perf_counter()
+    expected = pd.read_excel(args.file)
+    baseline = time.perf_counter() - start
+    print(f"pd.read_excel: {baseline:.2f} s ({len(expected)} rows x {len(expected.columns)} columns)")
+
+    print("\n--- Parallel reader ---")
+    for workers in worker_counts:
+        start = time.perf_counter()
+        frame = read_xlsx(args.file, workers)
+        elapsed = time.perf_counter() - start
+        differences = compare_frames(expected, frame)
+        parity = 'identical' if not differences else f'{len(differences)} differing columns: {differences}'
+        print(f"{workers} worker(s): {elapsed:.2f} s ({baseline / elapsed:.1f}x read_excel), {parity}")
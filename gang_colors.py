@@ -3,6 +3,9 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
 
+from backends import get_backend
+from gang_data import read_workbook
+
 # --- Configuration ---
 file_path = 'Cook County Regional Gang Intelligence Database.xlsx'
 column_colors = 'Subject_Wears_Colors'
@@ -11,7 +14,7 @@ column_admits = 'Subject_Admits_Gang'
 # --- 1. Data Loading and Setup ---
 try:
     # Read the data from the specified Excel file
-    df = pd.read_excel(file_path)
+    df = read_workbook(file_path)
     print(f"Data loaded successfully from: {file_path}")
     print(f"Total records: {len(df)}")
 except FileNotFoundError:
@@ -39,26 +42,15 @@ if column_colors not in df.columns or column_admits not in df.columns:
 
 # --- 2. Data Cleaning and Aggregation ---
 
-# Function to standardize the categorical columns to Y (Yes) or N (No/Missing)
-def standardize_column(series):
-    # Convert all to uppercase string, then replace NULL/NaN with 'N'
-    standardized = series.astype(str).str.upper().str.strip()
-    standardized = standardized.replace({'NULL': 'N', 'NAN': 'N', 'N/A': 'N'}).fillna('N')
-    # Anything not explicitly 'Y' is treated as 'N'
-    standardized[standardized != 'Y'] = 'N' 
-    return standardized
-
-df['Wears_Colors_Status'] = standardize_column(df[column_colors])
-df['Admits_Gang_Status'] = standardize_column(df[column_admits])
+# Standardize both columns to Y (Yes) or N (No/Missing): anything not explicitly 'Y'
+# (after upper-casing and stripping) is treated as 'N'. Runs on the configured backend.
+backend = get_backend()
+records = backend.clean(df, {column_colors: 'yes_no', column_admits: 'yes_no'})
 
 # Create the contingency table (2x2 matrix of counts)
 # This is the core data for the heatmap
-contingency_table = pd.crosstab(
-    df['Wears_Colors_Status'],
-    df['Admits_Gang_Status'],
-    rownames=['Wears Colors?'],
-    colnames=['Admits Gang Membership?']
-)
+contingency_table = backend.crosstab(records, column_colors, column_admits)
+contingency_table = contingency_table.rename_axis(index='Wears Colors?', columns='Admits Gang Membership?')
 
 
 # --- 3. Heatmap Visualization ---
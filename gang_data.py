@@ -0,0 +1,222 @@
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from excel_dates import decode_excel_dates
+from fast_xlsx import read_xlsx
+
+# --- Configuration ---
+FILE_PATH = 'Cook County Regional Gang Intelligence Database.xlsx'
+
+COLUMN_ID = 'Subject_ID'
+COLUMN_SEX = 'Subject_Sex'
+COLUMN_CITY = 'chicago'   # The city column's header in the workbook is literally 'chicago'
+COLUMN_STATE = 'address_state'
+COLUMN_ZIP = 'address_zip'
+COLUMN_RACE = 'Subject_Race_ID'
+COLUMN_GANG = 'Subject_Gang_ID'
+COLUMN_CREATE_DATE = 'Subject_Create_Date'
+COLUMN_APPROVED_DATE = 'Subject_Approved_Date'
+COLUMN_HEIGHT = 'Subject_Height'
+COLUMN_WEIGHT = 'Subject_Weight'
+
+# Plausible adult ranges; parsed values outside them are counted as invalid
+HEIGHT_RANGE_INCHES = (48, 90)
+WEIGHT_RANGE_POUNDS = (70, 500)
+
+# Y/NULL flag columns, stored as 1/0 once cleaned
+FLAG_COLUMNS = {
+    'Subject_Armed': 'armed',
+    'Subject_Felon': 'felon',
+    'Subject_Probation': 'probation',
+    'Subject_Admits_Gang': 'admits_gang',
+    'Subject_Wears_Colors': 'wears_colors',
+}
+
+
+# --- Loading ---
+
+# Parsed workbooks by absolute path, as (modification time, DataFrame)
+_workbook_cache = {}
+
+
+def read_workbook(file_path=FILE_PATH, while_parsing=None):
+    """
+    Read the raw database extract.
+
+    The parsed frame is kept in memory and reused until the file's modification time
+    changes, so a long-running process (watch.py) only pays the parse once per edit.
+    Callers get a copy and are free to modify it. .xlsx files go through the parallel
+    reader in fast_xlsx.py (same frame as pd.read_excel, several times faster).
+
+    `while_parsing` is called once the read is under way and it is safe to start threads
+    (after fast_xlsx has forked its workers), or right away when nothing needs parsing.
+    """
+    path = os.path.abspath(file_path)
+    modified = os.stat(path).st_mtime_ns
+    cached = _workbook_cache.get(path)
+    if cached is None or cached[0] != modified:
+        if path.endswith('.xlsx'):
+            frame = read_xlsx(path, while_parsing=while_parsing)
+        else:
+            if while_parsing is not None:
+                while_parsing()
+            frame = pd.read_excel(path)
+        _workbook_cache[path] = cached = (modified, frame)
+    elif while_parsing is not None:
+        while_parsing()
+    return cached[1].copy()
+
+
+# --- Cleaning (same rules the individual report scripts apply) ---
+
+def clean_zip(series):
+    """5-digit ZIP string, or '' when the value can't be one."""
+    zips = series.astype(str).str.replace(r'\..*', '', regex=True).str.strip().str[:5]
+    return zips.where(zips.str.fullmatch(r'\d{5}'), '')
+
+
+def clean_race(series):
+    """Race label with missing/'NULL' values mapped to 'Unknown'."""
+    race = series.astype(str).str.strip().str.replace('NULL', 'Unknown', case=False)
+    # astype(str) keeps missing values as NaN with the pandas string dtype, as 'nan' otherwise
+    return race.fillna('Unknown').replace('nan', 'Unknown')
+
+
+def clean_flag(series):
+    """1 where the flag is 'Y', else 0 (missing, 'NULL' and 'N' all count as no)."""
+    return series.astype(str).str.strip().str.upper().eq('Y').astype('int8')
+
+
+def clean_text(series):
+    """Stripped text with missing/'NULL' values as None."""
+    text = series.astype(str).str.strip()
+    return text.where(series.notna() & ~text.str.upper().isin(['', 'NULL', 'NAN']), None)
+
+
+def yearly_flag_trends(df, date_column, flag_columns):
+    """
+    Records created per year and, for each flag column, the count and percentage of them
+    with a non-empty value (the escalation.py trend table, indexed by 'Year').
+    """
+    years = pd.Series(decode_excel_dates(df[date_column]), index=df.index).dt.year.rename('Year')
+    trends = years.groupby(years).size().rename('Total_Records').to_frame()
+    for column in flag_columns:
+        flagged = df[column].notna() & (df[column].astype(str).str.strip() != '')
+        trends[f'{column}_Count'] = flagged.groupby(years).sum().astype(float)
+        trends[f'{column}_Percent'] = trends[f'{column}_Count'] / trends['Total_Records'] * 100
+    return trends
+
+
+def distinct_subjects(index, columns, ids):
+    """
+    Crosstab of distinct subject IDs with 'Total' margins. A subject with several records
+    counts once per cell and once in each total, so the totals aren't the sums of the cells.
+    """
+    table = pd.crosstab(index, columns, values=ids, aggfunc='nunique', margins=True, margins_name='Total')
+    return table.fillna(0).astype(int)
+
+
+# --- Height and Weight ---
+
+HEIGHT_FEET_INCHES = re.compile(r'^(\d)\s*(?:\'|ft|-|\s)\s*(\d{1,2})\s*(?:"|in)?$')
+NUMBER_WITH_UNIT = re.compile(r'^(\d+(?:\.\d+)?)\s*([a-z"]*)$')
+
+
+def parse_height(value):
+    """
+    Height in inches from one raw value, None when missing and NaN when unparseable.
+
+    The database stores feet and inches packed into one number (603 = 6'03"); free-text
+    forms like 5'10", 5-10, 70in and 178cm are accepted as well.
+    """
+    if pd.isna(value):
+        return None
+    text = str(value).strip().lower()
+    if text in ('', 'nan', 'null', '0', '0.0'):
+        return None
+
+    match = HEIGHT_FEET_INCHES.match(text)
+    if match:
+        feet, inches = int(match.group(1)), int(match.group(2))
+    else:
+        match = NUMBER_WITH_UNIT.match(text)
+        if not match:
+            return np.nan
+        number, unit = float(match.group(1)), match.group(2)
+        if unit == 'cm':
+            feet, inches = 0, number / 2.54
+        elif unit in ('in', '"') or (not unit and number < 100):
+            feet, inches = 0, number
+        elif not unit and number.is_integer():
+            feet, inches = divmod(int(number), 100)
+        else:
+            return np.nan
+
+    total = feet * 12 + inches
+    if inches >= 12 and feet or not HEIGHT_RANGE_INCHES[0] <= total <= HEIGHT_RANGE_INCHES[1]:
+        return np.nan
+    return float(total)
+
+
+def parse_weight(value):
+    """Weight in pounds from one raw value ('180', '180 lbs', '82kg'), None when missing, NaN when invalid."""
+    if pd.isna(value):
+        return None
+    text = str(value).strip().lower()
+    if text in ('', 'nan', 'null', '0', '0.0'):
+        return None
+
+    match = NUMBER_WITH_UNIT.match(text)
+    if not match or match.group(2) not in ('', 'lb', 'lbs', 'kg', 'kgs'):
+        return np.nan
+    pounds = float(match.group(1)) * (2.20462 if match.group(2).startswith('kg') else 1)
+    if not WEIGHT_RANGE_POUNDS[0] <= pounds <= WEIGHT_RANGE_POUNDS[1]:
+        return np.nan
+    return pounds
+
+
+def parse_measurement(series, parser):
+    """
+    Apply a scalar parser to a column by parsing each distinct raw value once.
+
+    Returns the float64 values (NaN for missing or invalid) and the number of rows
+    whose value was present but couldn't be parsed.
+    """
+    codes, uniques = pd.factorize(series)
+    parsed = [parser(value) for value in uniques]
+    values = np.array([np.nan if value is None else value for value in parsed] + [np.nan])
+    invalid = np.array([value is not None and np.isnan(value) for value in parsed] + [False])
+    # Missing raw values have code -1, which picks the trailing NaN / False
+    return values[codes], int(invalid[codes].sum())
+
+
+def clean_records(df):
+    """
+    One tidy row per record: snake_case columns, 1/0 flags, datetime64 dates and
+    the create year. Columns missing from `df` (e.g. the sample data) are skipped.
+    """
+    records = pd.DataFrame(index=df.index)
+    if COLUMN_ID in df.columns:
+        records['subject_id'] = df[COLUMN_ID]
+    for column, name in [(COLUMN_SEX, 'sex'), (COLUMN_CITY, 'city'), (COLUMN_STATE, 'state'), (COLUMN_GANG, 'gang')]:
+        if column in df.columns:
+            records[name] = clean_text(df[column])
+    if COLUMN_ZIP in df.columns:
+        records['zip'] = clean_zip(df[COLUMN_ZIP])
+    if COLUMN_RACE in df.columns:
+        records['race'] = clean_race(df[COLUMN_RACE])
+    for column, name in FLAG_COLUMNS.items():
+        if column in df.columns:
+            records[name] = clean_flag(df[column])
+    for column, name in [(COLUMN_CREATE_DATE, 'create_date'), (COLUMN_APPROVED_DATE, 'approved_date')]:
+        if column in df.columns:
+            records[name] = decode_excel_dates(df[column])
+    for column, name, parser in [(COLUMN_HEIGHT, 'height_in', parse_height), (COLUMN_WEIGHT, 'weight_lb', parse_weight)]:
+        if column in df.columns:
+            records[name], _ = parse_measurement(df[column], parser)
+    if 'create_date' in records.columns:
+        records['create_year'] = records['create_date'].dt.year.astype('Int64')
+    return records.reset_index(drop=True)
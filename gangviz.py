@@ -0,0 +1,190 @@
+"""
+One command-line entry point for every report.
+
+    python gangviz.py columns                  # workbook headers (standard library only)
+    python gangviz.py frequency                # race x gang-admission table, no plotting
+    python gangviz.py trends                   # escalation.py's trends_df, no plotting
+    python gangviz.py race                     # run race.py (likewise colors, heatmap, ...)
+    python gangviz.py query zip 60623          # forwarded to query_db.py
+    python gangviz.py check-startup            # fail if importing this CLI got slow
+
+Only the standard library is imported at module level. pandas is imported by the commands
+that need data, and matplotlib/seaborn/folium only by the report scripts that draw, so
+quick commands don't pay for plotting libraries they never use.
+"""
+import argparse
+import os
+import runpy
+import subprocess
+import sys
+import time
+import zipfile
+from xml.etree.ElementTree import iterparse
+
+# --- Configuration ---
+FILE_PATH = 'Cook County Regional Gang Intelligence Database.xlsx'   # Same default as gang_data.FILE_PATH
+
+# Subcommand -> report script run as __main__ (remaining arguments are passed through)
+SCRIPTS = {
+    'race': 'race.py',
+    'colors': 'colors.py',
+    'gang-colors': 'gang_colors.py',
+    'escalation': 'escalation.py',
+    'latency': 'latency.py',
+    'body': 'body_measurements.py',
+    'facets': 'facets.py',
+    'static-map': 'static_map.py',
+    'heatmap': 'heatmap.py',
+    'export-sqlite': 'export_sqlite.py',
+    'serve': 'server.py',
+    'diff': 'diff_extracts.py',
+    'watch': 'watch.py',
+}
+
+# check-startup: importing this module must stay under the budget and must not pull these in
+STARTUP_BUDGET_SECONDS = 0.15
+HEAVY_MODULES = ['pandas', 'numpy', 'matplotlib', 'seaborn', 'folium', 'scipy']
+
+SPREADSHEET_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+# --- Quick commands ---
+
+def workbook_columns(file_path):
+    """
+    Header row of the first worksheet, read straight from the .xlsx zip.
+
+    Only the first <row> element is parsed, so this takes milliseconds instead of the
+    full-sheet parse pd.read_excel does.
+    """
+    with zipfile.ZipFile(file_path) as workbook:
+        header = []
+        with workbook.open('xl/worksheets/sheet1.xml') as sheet:
+            for _, element in iterparse(sheet):
+                if element.tag == f'{SPREADSHEET_NS}c':
+                    value = element.find(f'{SPREADSHEET_NS}v')
+                    inline = element.find(f'{SPREADSHEET_NS}is')
+                    text = ''.join(inline.itertext()) if inline is not None else (value.text if value is not None else '')
+                    header.append((element.get('t'), text))
+                elif element.tag == f'{SPREADSHEET_NS}row':
+                    break
+
+        shared_needed = {int(text) for cell_type, text in header if cell_type == 's'}
+        shared = {}
+        if shared_needed:
+            with workbook.open('xl/sharedStrings.xml') as strings:
+                index = 0
+                for _, element in iterparse(strings):
+                    if element.tag == f'{SPREADSHEET_NS}si':
+                        if index in shared_needed:
+                            shared[index] = ''.join(element.itertext())
+                            if len(shared) == len(shared_needed):
+                                break
+                        index += 1
+                        element.clear()
+
+    return [shared[int(text)] if cell_type == 's' else text for cell_type, text in header]
+
+
+def columns_command(args):
+    for position, name in enumerate(workbook_columns(args.file), start=1):
+        print(f"{position:3d}  {name}")
+
+
+def frequency_command(args):
+    """The race x gang-admission frequency table race.py plots (small cells suppressed)."""
+    import pandas as pd
+    from gang_data import COLUMN_RACE, clean_flag, clean_race, read_workbook
+    from suppression import SUPPRESSED_TEXT, suppress_table
+
+    df = read_workbook(args.file)
+    admits = clean_flag(df['Subject_Admits_Gang']).map({0: 'N', 1: 'Y'})
+    frequency_table = pd.crosstab(clean_race(df[COLUMN_RACE]), admits).reindex(columns=['N', 'Y'], fill_value=0)
+    print(suppress_table(frequency_table).to_string(na_rep=SUPPRESSED_TEXT, float_format='{:.0f}'.format))
+
+
+def trends_command(args):
+    """Percentage of new records flagged per year (escalation.py's trends_df)."""
+    from gang_data import COLUMN_CREATE_DATE, read_workbook, yearly_flag_trends
+    from suppression import SUPPRESSED_TEXT, suppress_flag_trends
+
+    trends_df = yearly_flag_trends(read_workbook(args.file), COLUMN_CREATE_DATE, args.columns)
+    trends_df = suppress_flag_trends(trends_df, args.columns)
+    print(trends_df[[col for col in trends_df.columns if 'Percent' in col]].to_string(na_rep=SUPPRESSED_TEXT))
+
+
+def query_command(args):
+    import query_db
+    return query_db.main(args.arguments)
+
+
+def check_startup_command(args):
+    """Import this module in a fresh interpreter and check time and heavy imports against the budget."""
+    probe = ('import sys, time; start = time.perf_counter(); import gangviz; '
+             'print(time.perf_counter() - start); print(" ".join(sorted(sys.modules)))')
+    output = subprocess.run([sys.executable, '-c', probe], cwd=REPO_DIR, capture_output=True, text=True, check=True)
+    elapsed, modules = output.stdout.splitlines()
+    heavy = [name for name in HEAVY_MODULES if name in modules.split()]
+
+    print(f"Import time: {float(elapsed) * 1000:.1f} ms (budget {STARTUP_BUDGET_SECONDS * 1000:.0f} ms)")
+    print(f"Heavy modules imported: {', '.join(heavy) if heavy else 'none'}")
+    return 0 if float(elapsed) <= STARTUP_BUDGET_SECONDS and not heavy else 1
+
+
+def run_script(args):
+    """Run a report script as if it had been started directly."""
+    script = os.path.join(REPO_DIR, SCRIPTS[args.command])
+    sys.argv = [script] + args.arguments
+    sys.path.insert(0, REPO_DIR)
+    runpy.run_path(script, run_name='__main__')
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='Gang database reports.')
+    parser.add_argument('--file', default=FILE_PATH, help='workbook for the quick commands')
+
+    # The quick commands also take --file after the command name (gangviz.py trends --file x);
+    # SUPPRESS keeps them from resetting a --file given before it
+    file_parent = argparse.ArgumentParser(add_help=False)
+    file_parent.add_argument('--file', default=argparse.SUPPRESS, help='workbook to read')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    subparsers.add_parser('columns', help='list the workbook columns',
+                          parents=[file_parent]).set_defaults(handler=columns_command)
+    subparsers.add_parser('frequency', help=frequency_command.__doc__,
+                          parents=[file_parent]).set_defaults(handler=frequency_command)
+
+    trends_parser = subparsers.add_parser('trends', help=trends_command.__doc__, parents=[file_parent])
+    trends_parser.add_argument('columns', nargs='*', default=['Subject_Armed', 'Subject_Felon', 'Subject_Probation'])
+    trends_parser.set_defaults(handler=trends_command)
+
+    query_parser = subparsers.add_parser('query', help='query the SQLite export (see query_db.py --help)', add_help=False)
+    query_parser.set_defaults(handler=query_command, passthrough=True)
+
+    subparsers.add_parser('check-startup', help=check_startup_command.__doc__).set_defaults(handler=check_startup_command)
+
+    for command, script in SCRIPTS.items():
+        script_parser = subparsers.add_parser(command, help=f'run {script}', add_help=False)
+        script_parser.set_defaults(handler=run_script, passthrough=True)
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args, arguments = parser.parse_known_args(argv)
+    # Everything after a pass-through subcommand belongs to the script it runs
+    if getattr(args, 'passthrough', False):
+        args.arguments = arguments
+    elif arguments:
+        parser.error(f"unrecognized arguments: {' '.join(arguments)}")
+
+    start = time.perf_counter()
+    status = args.handler(args)
+    if args.command in ('columns', 'frequency', 'trends'):
+        print(f"\n({time.perf_counter() - start:.2f} s)")
+    return status or 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
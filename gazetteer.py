@@ -0,0 +1,144 @@
+import difflib
+import re
+
+import numpy as np
+import pandas as pd
+
+# --- Configuration ---
+FUZZY_CUTOFF = 0.85   # difflib similarity needed to accept a spelling variant
+
+# Common spelling differences folded together before matching
+ABBREVIATIONS = {
+    'ST': 'SAINT',
+    'STE': 'SAINTE',
+    'FT': 'FORT',
+    'MT': 'MOUNT',
+    'N': 'NORTH',
+    'S': 'SOUTH',
+    'E': 'EAST',
+    'W': 'WEST',
+}
+
+
+def normalize_place(text):
+    """Uppercase, strip punctuation and expand abbreviations so 'St. John' and 'SAINT JOHN' compare equal."""
+    if pd.isna(text):
+        return ''
+    words = re.sub(r'[^A-Z0-9 ]', ' ', str(text).upper()).split()
+    if words in (['NULL'], ['NAN']):
+        return ''
+    return ' '.join(ABBREVIATIONS.get(word, word) for word in words)
+
+
+def _normalize_column(values):
+    """normalize_place over a column, evaluated once per distinct value."""
+    codes, uniques = pd.factorize(values)
+    normalized = pd.Series([normalize_place(value) for value in uniques] + [''], dtype=object).to_numpy()
+    # Missing values get code -1, which picks the trailing ''
+    return normalized[codes]
+
+
+def _unique_zips(places, keys):
+    """{key: zip} for every key recorded with a single ZIP, {key: None} for keys seen with several."""
+    zips = places.groupby(keys)['zip'].agg(['first', 'nunique'])
+    resolved = zips['first'].astype(object).where(zips['nunique'] == 1, None)
+    return dict(zip(zips.index, resolved))
+
+
+def _main_zips(places, keys):
+    """{key: the ZIP recorded most often for that key}."""
+    votes = places.groupby(list(np.atleast_1d(keys)) + ['zip']).size().rename('count').reset_index()
+    best = votes.sort_values(['count', 'zip'], ascending=[False, True]).drop_duplicates(keys)
+    index = pd.MultiIndex.from_frame(best[keys]) if isinstance(keys, list) else best[keys]
+    return dict(zip(index, best['zip']))
+
+
+class Gazetteer:
+    """
+    Offline (city, state) -> ZIP lookup learned from the records themselves.
+
+    Every record that has both a city and a valid 5-digit ZIP contributes that pairing. A
+    place is only resolved to a ZIP when all of its records agree on one: a city spanning
+    several ZIPs (Chicago, Gary) can't be placed in one of them from its name, and guessing
+    would pile every such record onto one ZIP polygon. Those places still resolve to a
+    city-level area through `resolve_area`, which returns the place's most common ZIP as the
+    anchor that picks its city/county/state rollup unit. Records with a city but no usable
+    ZIP are matched exactly or fuzzily on the normalized city name within their state, or
+    among all cities when the record has no state.
+    """
+
+    def __init__(self, table, zip_places=None, city_table=None, main_zips=None, city_main_zips=None):
+        # table: {(city, state): zip, or None when the place has several ZIPs}, keys already normalized
+        # zip_places: {zip: (city, state)}, the most common place recorded for each ZIP
+        # city_table: {city: zip or None} over all states, for records without a state
+        # main_zips / city_main_zips: {(city, state)/city: most common ZIP}, for resolve_area
+        self.table = table
+        self.zip_places = zip_places or {}
+        self.city_table = city_table or {}
+        self.main_zips = main_zips or {}
+        self.city_main_zips = city_main_zips or {}
+        self.cities_by_state = {}
+        for city, state in table:
+            self.cities_by_state.setdefault(state, []).append(city)
+
+    @classmethod
+    def from_records(cls, cities, states, zips):
+        """Build the lookup from raw city, state and cleaned 5-digit ZIP columns."""
+        places = pd.DataFrame({
+            'city': _normalize_column(cities),
+            'state': _normalize_column(states),
+            'zip': zips.to_numpy(),
+        })
+        places = places[(places['city'] != '') & places['zip'].str.fullmatch(r'\d{5}').fillna(False)]
+
+        votes = places.groupby(['city', 'state', 'zip']).size().rename('count').reset_index()
+        best_place = votes.sort_values('count', ascending=False).drop_duplicates('zip')
+        return cls(
+            _unique_zips(places, ['city', 'state']),
+            dict(zip(best_place['zip'], zip(best_place['city'], best_place['state']))),
+            _unique_zips(places, 'city'),
+            _main_zips(places, ['city', 'state']),
+            _main_zips(places, 'city'),
+        )
+
+    def _match(self, city, state):
+        """The known place key (exact, else fuzzy) for a raw (city, state) pair and whether it is state-qualified."""
+        city, state = normalize_place(city), normalize_place(state)
+        if not city:
+            return None, bool(state)
+        if state:
+            candidates, key = self.cities_by_state.get(state, []), lambda name: (name, state)
+            known = self.table
+        else:
+            candidates, key = list(self.city_table), lambda name: name
+            known = self.city_table
+        if key(city) in known:
+            return key(city), bool(state)
+
+        matches = difflib.get_close_matches(city, candidates, n=1, cutoff=FUZZY_CUTOFF)
+        return (key(matches[0]) if matches else None), bool(state)
+
+    def resolve(self, city, state):
+        """ZIP for a raw (city, state) pair, or None when the place is unknown or spans several ZIPs."""
+        key, with_state = self._match(city, state)
+        if key is None:
+            return None
+        return (self.table if with_state else self.city_table)[key]
+
+    def resolve_area(self, city, state):
+        """Anchor ZIP (the place's most common one) for any known place, including those spanning several ZIPs."""
+        key, with_state = self._match(city, state)
+        if key is None:
+            return None
+        return (self.main_zips if with_state else self.city_main_zips).get(key)
+
+    def resolve_many(self, cities, states, area=False):
+        """
+        Vectorized front end to `resolve` (or `resolve_area` with `area`): each distinct
+        (city, state) pair is looked up once.
+        """
+        lookup = self.resolve_area if area else self.resolve
+        pairs = pd.MultiIndex.from_arrays([cities.astype(str), states.astype(str)])
+        codes, uniques = pd.factorize(pairs)
+        resolved = pd.Series([lookup(city, state) for city, state in uniques], dtype=object)
+        return pd.Series(resolved.to_numpy()[codes], index=cities.index)
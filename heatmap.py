@@ -2,12 +2,34 @@ import pandas as pd
 import folium
 import json
 import os
+import time
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+from backends import get_backend
+from density import density_grid, save_density_png
+from gang_data import read_workbook
+from gazetteer import Gazetteer
+from hll import build_sketches
+from map_classes import (CLASS_COLORS, MISSING_COLOR, SUPPRESSED_COLOR, class_legend_title, class_map_title, class_ranges,
+                         classify, range_labels)
+from hotspots import classify_clusters, classify_hot_spots, getis_ord_gi_star, load_adjacency, local_morans_i
+from publish import print_transfer_stats, publish_split
+from rollups import (ROLLUP_LEVELS, ZoomLayerSwitch, load_zip_counties, merge_small_units, rollup_boundaries, rollup_counts,
+                     rollup_keys)
+from shrinkage import shrink_race_shares
+from static_map import load_paths, render_choropleth, zip_colors
+from suppression import SUPPRESSED_TEXT, SUPPRESSION_THRESHOLD, suppression_mask
+from zip_geometry import load_zip_geojson, zip_centroids
 
 # --- Configuration ---
 file_path = 'Cook County Regional Gang Intelligence Database.xlsx'
 column_zip = 'address_zip'
 column_race = 'Subject_Race_ID'
+column_id = 'Subject_ID'
+column_city = 'chicago'   # The city column's header in the workbook is literally 'chicago'
+column_state = 'address_state'
+columns_to_track = ['Subject_Armed', 'Subject_Felon', 'Subject_Probation']
 
 # URL for a publicly available GeoJSON file covering Chicago ZIP codes
 # NOTE: Using a public URL for demonstration. In a real-world scenario, you may need 
@@ -15,12 +37,84 @@ column_race = 'Subject_Race_ID'
 GEOJSON_URL = 'https://raw.githubusercontent.com/OpenDataDE/State-zip-code-GeoJSON/master/il_illinois_zip_codes_geo.min.json'
 OUTPUT_MAP_FILE = 'index.html'
 
+# Print copy of the ZIP choropleth with the same classes and legend (.png, .svg or .pdf;
+# None to skip). static_map.py renders per-year/race/flag variants.
+STATIC_MAP_FILE = os.path.join('output', 'choropleth.png')   # output/ is gitignored, so never deployed
+
+# 'inline' - folium page with all geometry, popups and layers embedded in index.html
+# 'split'  - small page shell plus content-hashed geometry/attribute files, with popups
+#            rendered client-side, written to publish.PUBLISH_DIR (the deployed repo root).
+#            A reduced map: the base ZIP choropleth only, without the hot-spot, density
+#            and rollup layers
+PUBLISH_MODE = 'inline'
+
+# Metric used to shade the choropleth:
+#   'Total_Records'              - number of records per ZIP
+#   'Shrunk_Dominant_Percentage' - empirical-Bayes shrunk share of the dominant race, which
+#                                  pulls low-count ZIPs toward the overall race mix
+CHOROPLETH_METRIC = 'Total_Records'
+
+# Metrics tested for spatial clustering; each gets its own toggleable hot-spot layer
+# ('<flag>_Rate' is the percentage of a ZIP's records with that flag set)
+HOTSPOT_METRICS = ['Total_Records'] + [f'{col}_Rate' for col in columns_to_track]
+HOTSPOT_MIN_RECORDS = 10   # ZIPs with fewer records are left out of the rate statistics
+
+# Continuous record-density surface drawn as a single image overlay
+DENSITY_IMAGE_FILE = os.path.join('output', 'density.png')   # output/ is gitignored, so never deployed
+DENSITY_CELL_SIZE = 0.005     # Grid cell size in degrees (~0.5 km)
+DENSITY_BANDWIDTH_KM = 2.0    # Gaussian kernel bandwidth
+
+# Zoom range (inclusive) at which each geography is drawn; zoomed-out views get a few
+# dozen rolled-up shapes instead of every ZIP polygon
+ZOOM_RANGES = {
+    'state': (0, 6),
+    'county': (7, 8),
+    'city': (9, 9),
+    'zip': (10, 18),
+}
+
+
+# --- 0. Boundary Geometry (in the background) ---
+
+def prepare_geometry(url):
+    """Everything that depends only on the boundary file: polygons, contiguity graph, centroids, ZIP -> county."""
+    start = time.perf_counter()
+    zip_boundaries = load_zip_geojson(url)
+    boundary_zips, adjacency = load_adjacency(zip_boundaries)
+    return {
+        'zip_boundaries': zip_boundaries,
+        'boundary_zips': boundary_zips,
+        'adjacency': adjacency,
+        'centroids': zip_centroids(zip_boundaries),
+        'zip_counties': load_zip_counties(),
+        'seconds': time.perf_counter() - start,
+    }
+
+
+def layer_copy(geojson):
+    """The FeatureCollection with its own feature properties (folium layers annotate them) but shared geometry."""
+    return {'type': 'FeatureCollection',
+            'features': [{**feature, 'properties': dict(feature['properties'])} for feature in geojson['features']]}
+
 
 # --- 1. Data Loading ---
+
+# Boundary loading doesn't need the records, so it runs on a thread while the workbook is
+# parsed, cleaned and aggregated; the map build waits for it only when it first needs the
+# polygons (section 3). read_workbook starts it once the parse is under way and its worker
+# processes are forked (forking with a live thread can deadlock the children).
+geometry_pool = ThreadPoolExecutor(max_workers=1)
+geometry_future = None
+
+def start_geometry():
+    global geometry_future
+    geometry_future = geometry_pool.submit(prepare_geometry, GEOJSON_URL)
+
 print(f"Attempting to read data from: {file_path}")
+build_start = time.perf_counter()
 
 try:
-    df = pd.read_excel(file_path)
+    df = read_workbook(file_path, while_parsing=start_geometry)
 except FileNotFoundError:
     print(f"\nERROR: The file '{file_path}' was not found.")
     print("Please ensure the Excel file is in the same directory as this script.")
@@ -49,6 +143,10 @@ except Exception as e:
     print(f"\nAn unexpected error occurred during file reading: {e}")
     exit()
 
+# Without a workbook (sample data) nothing has started the boundary load yet
+if geometry_future is None:
+    start_geometry()
+
 # Check if required columns exist
 if column_zip not in df.columns or column_race not in df.columns:
     print("\nERROR: One or both required columns were not found in the Excel file.")
@@ -63,14 +161,40 @@ print(f"Data loaded successfully. Total records: {len(df)}")
 
 # Clean up ZIP code: ensure it's a 5-digit string key
 df[column_zip] = df[column_zip].astype(str).str.replace(r'\..*', '', regex=True).str.strip().str[:5]
+
+if column_id not in df.columns:
+    df[column_id] = np.arange(len(df))   # Sample data: every record is its own subject
+
+# Place records that have a city/state but no usable ZIP through the offline gazetteer. A
+# place recorded with a single ZIP gives its records that ZIP. A place spanning several
+# (Chicago, Gary, Hammond) can't be put in one ZIP polygon, so its records are kept aside
+# under the place's most common ZIP and only counted in the city/county/state rollups (section 6).
+gazetteer = Gazetteer({})
+area_df = df.iloc[:0]
+if column_city in df.columns and column_state in df.columns:
+    gazetteer = Gazetteer.from_records(df[column_city], df[column_state], df[column_zip])
+    missing_zip = df[column_zip].str.len() != 5
+    placed_zip = gazetteer.resolve_many(df.loc[missing_zip, column_city], df.loc[missing_zip, column_state])
+    df.loc[missing_zip, column_zip] = placed_zip.fillna('')
+
+    unplaced = df[column_zip].str.len() != 5
+    area_zip = gazetteer.resolve_many(df.loc[unplaced, column_city], df.loc[unplaced, column_state], area=True).dropna()
+    area_df = df.loc[area_zip.index].assign(**{column_zip: area_zip})
+    print(f"Gazetteer placed {placed_zip.notna().sum()} of {missing_zip.sum()} records without a usable ZIP code "
+          f"in a ZIP, and {len(area_df)} more in their city's rollup area only")
+
 df = df[df[column_zip].str.len() == 5]
 
-# Clean up Race column: handle missing values
-df[column_race] = df[column_race].astype(str).str.strip().str.replace('NULL', 'Unknown', case=False).fillna('Unknown').replace('nan', 'Unknown')
+# Cleaning and counting below run on the configured backend (backends.py: pandas or Arrow):
+# missing/'NULL' races become 'Unknown' and each flag column becomes 1 for 'Y', else 0 ('N', 'NULL', blank)
+backend = get_backend()
+flag_columns = [col for col in columns_to_track if col in df.columns]
+records = backend.clean(df, {column_zip: 'raw', column_race: 'race', column_id: 'raw',
+                             **{col: 'flag' for col in flag_columns}})
 
 # Create the contingency table (Counts of Race per ZIP)
 # Index = ZIP, Columns = Race
-race_zip_counts = pd.crosstab(df[column_zip], df[column_race])
+race_zip_counts = backend.crosstab(records, column_zip, column_race)
 
 # Calculate the percentage concentration of each race WITHIN that ZIP code (row sum is 100%)
 race_zip_percentage = race_zip_counts.div(race_zip_counts.sum(axis=1), axis=0) * 100
@@ -80,8 +204,42 @@ dominant_race = race_zip_percentage.idxmax(axis=1).rename('Dominant_Race')
 dominant_percentage = race_zip_percentage.max(axis=1).rename('Dominant_Percentage')
 total_records = race_zip_counts.sum(axis=1).rename('Total_Records')
 
+# A subject can appear on several records: count distinct Subject_IDs per ZIP exactly
+zip_distinct = backend.distinct_count(records, column_zip, column_id).rename('Distinct_Subjects')
+print(f"Distinct subjects: {df[column_id].nunique()} across {total_records.sum()} mapped records")
+
+# Shrink the race shares toward the overall mix so a ZIP with 2 records can't show 100%
+# All ZIPs are estimated in one matrix operation over the crosstab
+shrunk = shrink_race_shares(race_zip_counts.to_numpy())
+shrunk_index = shrunk['mean'].argmax(axis=1)[:, None]
+
+shrunk_stats = pd.DataFrame({
+    'Shrunk_Dominant_Race': race_zip_counts.columns[shrunk_index[:, 0]],
+    'Shrunk_Dominant_Percentage': np.take_along_axis(shrunk['mean'], shrunk_index, axis=1)[:, 0] * 100,
+    'Shrunk_Lower': np.take_along_axis(shrunk['lower'], shrunk_index, axis=1)[:, 0] * 100,
+    'Shrunk_Upper': np.take_along_axis(shrunk['upper'], shrunk_index, axis=1)[:, 0] * 100,
+}, index=race_zip_counts.index)
+
+print(f"Empirical-Bayes prior strength: {shrunk['prior_strength']:.1f} pseudo-records per ZIP")
+
+# Percentage of each ZIP's records carrying each escalation flag
+flag_rates = (backend.group_sum(records, column_zip, flag_columns).div(total_records, axis=0) * 100).add_suffix('_Rate')
+
+# Small-cell suppression over the whole race x ZIP crosstab: which ZIP totals, dominant-race
+# counts and shrunk dominant-race counts can't be published (popups show them as suppressed)
+withheld = suppression_mask(race_zip_counts.to_numpy())
+zip_rows = np.arange(len(race_zip_counts))
+suppressed = pd.DataFrame({
+    'Total_Suppressed': withheld[:-1, -1],
+    'Dominant_Suppressed': withheld[zip_rows, race_zip_counts.to_numpy().argmax(axis=1)],
+    'Shrunk_Suppressed': withheld[zip_rows, shrunk_index[:, 0]],
+}, index=race_zip_counts.index)
+suppressed['Distinct_Suppressed'] = suppressed['Total_Suppressed'] | (zip_distinct < SUPPRESSION_THRESHOLD)
+print(f"Suppression: {suppressed['Total_Suppressed'].sum()} ZIP totals and "
+      f"{suppressed['Dominant_Suppressed'].sum()} dominant-race counts withheld (threshold {SUPPRESSION_THRESHOLD})")
+
 # Combine the results into a final DataFrame for mapping
-map_data = pd.concat([dominant_race, dominant_percentage, total_records], axis=1)
+map_data = pd.concat([dominant_race, dominant_percentage, total_records, zip_distinct, shrunk_stats, flag_rates, suppressed], axis=1)
 map_data = map_data.reset_index()
 
 # Filter to only the ZIP codes present in our data
@@ -90,6 +248,15 @@ map_data = map_data[map_data[column_zip].isin(df[column_zip].unique())]
 
 # --- 3. Create Folium Map ---
 
+# Join the background geometry load (loaded once, shared by every layer below)
+ingest_seconds = time.perf_counter() - build_start
+geometry = geometry_future.result()
+geometry_pool.shutdown()
+zip_boundaries = geometry['zip_boundaries']
+boundary_zips, adjacency = geometry['boundary_zips'], geometry['adjacency']
+print(f"\nIngest and aggregation: {ingest_seconds:.2f} s; boundary geometry: {geometry['seconds']:.2f} s "
+      f"(overlapped; waited {time.perf_counter() - build_start - ingest_seconds:.2f} s)")
+
 # Center the map over Chicago/Cook County area (approx. 41.8, -87.6)
 m = folium.Map(location=[41.8781, -87.6298], zoom_start=10, tiles='cartodbpositron')
 
@@ -110,36 +277,24 @@ max_concentration = 100
 max_records = map_data['Total_Records'].max()
 min_records = map_data['Total_Records'].min()
 
-# Create logical ranges based on record counts
-# Adjust these ranges based on your data distribution
-if max_records <= 10:
-    # For very low record counts
-    ranges = [(1, 1), (2, 2), (3, 4), (5, 7), (8, max_records)]
-elif max_records <= 50:
-    # For low to medium record counts
-    ranges = [(1, 2), (3, 5), (6, 10), (11, 20), (21, max_records)]
-elif max_records <= 100:
-    # For medium record counts
-    ranges = [(1, 3), (4, 8), (9, 15), (16, 30), (31, max_records)]
-elif max_records <= 500:
-    # For higher record counts
-    ranges = [(1, 5), (6, 15), (16, 30), (31, 60), (61, max_records)]
-else:
-    # For very high record counts
-    ranges = [(1, 10), (11, 25), (26, 50), (51, 100), (101, max_records)]
-
-# Create a logical range-based color function
-def get_logical_color(records):
-    for i, (min_val, max_val) in enumerate(ranges):
-        if min_val <= records <= max_val:
-            return i + 1  # Return 1-5 based on which range it falls into
-    return 1  # Default to lightest if somehow outside all ranges
-
-map_data['Color_Scale'] = map_data['Total_Records'].apply(get_logical_color)
+# Logical ranges based on record counts (shared with the static map, map_classes.py)
+ranges = class_ranges(CHOROPLETH_METRIC, max_records)
+map_data['Color_Scale'] = classify(map_data[CHOROPLETH_METRIC], ranges)
+legend_title = class_legend_title(CHOROPLETH_METRIC)
 
 # Create dynamic legend based on logical ranges
-legend_html = f"""
-<div style="
+def class_legend_html(title, ranges, element_id, suppressed=False):
+    """
+    Legend box for one set of class ranges. Every layer's legend sits in the same corner;
+    ZoomLayerSwitch shows only the one whose layer is on the map at the current zoom.
+    """
+    rows = [(color, label) for color, label in zip(CLASS_COLORS, range_labels(ranges))]
+    if suppressed:
+        rows.append((SUPPRESSED_COLOR, SUPPRESSED_TEXT))
+    legend_rows = ''.join(f"<span style='background:{color}; width:20px; height:10px; display:inline-block;'></span> {label}<br>\n"
+                          for color, label in rows)
+    return f"""
+<div id="{element_id}" style="
     position: fixed;
     bottom: 30px;
     left: 30px;
@@ -152,15 +307,12 @@ legend_html = f"""
     font-size: 14px;
     z-index:9999;
 ">
-<b>Number of Records per ZIP Code</b><br>
-<span style='background:#ffffb2; width:20px; height:10px; display:inline-block;'></span> {ranges[0][0]}–{ranges[0][1]}<br>
-<span style='background:#fecc5c; width:20px; height:10px; display:inline-block;'></span> {ranges[1][0]}–{ranges[1][1]}<br>
-<span style='background:#fd8d3c; width:20px; height:10px; display:inline-block;'></span> {ranges[2][0]}–{ranges[2][1]}<br>
-<span style='background:#e31a1c; width:20px; height:10px; display:inline-block;'></span> {ranges[3][0]}–{ranges[3][1]}<br>
-<span style='background:#800026; width:20px; height:10px; display:inline-block;'></span> {ranges[4][0]}–{ranges[4][1]}<br>
-</div>
+<b>{title}</b><br>
+{legend_rows}</div>
 """
 
+legend_html = class_legend_html(legend_title, ranges, 'legend-zip')
+
 m.get_root().html.add_child(folium.Element(legend_html))
 
 # Add custom CSS for better location text readability
@@ -201,19 +353,22 @@ location_styling = """
 
 m.get_root().html.add_child(folium.Element(location_styling))
 
-# Add the choropleth
-folium.Choropleth(
-    geo_data=GEOJSON_URL,
-    data=map_data,
-    columns=[column_zip, 'Color_Scale'],  # Use the quantile-based color scale
-    key_on='feature.properties.ZCTA5CE10',
-    fill_color='YlOrRd',
-    fill_opacity=0.8,
-    line_opacity=0.2,
-    legend_name='',  # Empty legend name to remove the automatic legend
-    highlight=True,
-    nan_fill_color='#f0f0f0',  # Light gray for missing data
-    nan_fill_opacity=0.3  # Semi-transparent for missing data
+# Add the choropleth. Each ZIP is filled with its class's CLASS_COLORS entry, the palette of
+# the legend, the rollup layers and the static map; folium.Choropleth only takes ColorBrewer
+# scheme names, whose colours differ from it.
+zip_classes = map_data.set_index(column_zip)['Color_Scale'].to_dict()
+
+def choropleth_style(feature):
+    zip_class = zip_classes.get(feature['properties']['ZCTA5CE10'])
+    if zip_class is None:
+        # Light gray, semi-transparent for missing data
+        return {'fillColor': MISSING_COLOR, 'fillOpacity': 0.3, 'color': 'black', 'opacity': 0.2, 'weight': 1}
+    return {'fillColor': CLASS_COLORS[int(zip_class) - 1], 'fillOpacity': 0.8, 'color': 'black', 'opacity': 0.2, 'weight': 1}
+
+choropleth = folium.GeoJson(
+    layer_copy(zip_boundaries),
+    style_function=choropleth_style,
+    highlight_function=lambda feature: {'weight': 3, 'fillOpacity': 1.0},
 ).add_to(m)
 
 # Adjust tooltip styling for dark mode
@@ -237,7 +392,7 @@ highlight_function = lambda x: {'fillColor': '#000000',
                                 'weight': 0.3}
 
 N = folium.features.GeoJson(
-    GEOJSON_URL,
+    layer_copy(zip_boundaries),
     name='Race Concentration Data',
     style_function=style_function,
     control=False,
@@ -273,12 +428,30 @@ def popup_info(feature):
         dominant_race = row['Dominant_Race']
         percentage = round(row['Dominant_Percentage'], 1)
         total = int(row['Total_Records'])
+        subjects = int(row['Distinct_Subjects'])
+        shrunk_race = row['Shrunk_Dominant_Race']
+        shrunk_percentage = round(row['Shrunk_Dominant_Percentage'], 1)
+        lower = round(row['Shrunk_Lower'], 1)
+        upper = round(row['Shrunk_Upper'], 1)
+
+        # Withheld figures (small cells and the ones that would reveal them) are not published
+        if row['Total_Suppressed']:
+            total = SUPPRESSED_TEXT
+        if row['Distinct_Suppressed']:
+            subjects = SUPPRESSED_TEXT
+        if row['Total_Suppressed'] or row['Dominant_Suppressed']:
+            dominant_race, percentage = SUPPRESSED_TEXT, SUPPRESSED_TEXT
+        adjusted = f"{shrunk_percentage}% {shrunk_race} (95% CI {lower}–{upper}%)"
+        if row['Total_Suppressed'] or row['Shrunk_Suppressed']:
+            adjusted = SUPPRESSED_TEXT
         
         return f"""
         <b>ZIP Code:</b> {zip_code}<br>
         <b>Total Records:</b> {total}<br>
+        <b>Distinct Subjects:</b> {subjects}<br>
         <b>Dominant Race:</b> {dominant_race}<br>
-        <b>Concentration:</b> {percentage}%
+        <b>Concentration:</b> {percentage}{'%' if percentage != SUPPRESSED_TEXT else ''}<br>
+        <b>Adjusted Concentration:</b> {adjusted}
         """
     else:
         return f"<b>ZIP Code:</b> {zip_code}<br>No data available."
@@ -292,8 +465,199 @@ for i in N.data['features']:
 folium.GeoJsonPopup(['popup'], parse_html=True).add_to(N)
 
 
-# --- 4. Save the Map ---
-m.save(OUTPUT_MAP_FILE)
+# --- 4. Spatial Hot-Spot Layers ---
+
+# Contiguity graph of the boundary polygons (built with the geometry, cached on disk)
+zip_stats = map_data.set_index(column_zip).reindex(boundary_zips)
+
+hotspot_colors = {'Hot Spot': '#b2182b', 'Cold Spot': '#2166ac'}
+
+print("\n--- Spatial Hot-Spot Summary (Getis-Ord Gi*, p < 0.05) ---")
+for metric in HOTSPOT_METRICS:
+    if metric not in zip_stats.columns:
+        continue
+
+    if metric == 'Total_Records':
+        # ZIPs without any records are genuine zeros for counts
+        in_study = np.ones(len(boundary_zips), dtype=bool)
+    else:
+        in_study = (zip_stats['Total_Records'] >= HOTSPOT_MIN_RECORDS).to_numpy()
+
+    values = zip_stats[metric].fillna(0).to_numpy()[in_study]
+    study_adjacency = adjacency[in_study][:, in_study]
+
+    gi_z, gi_p = getis_ord_gi_star(values, study_adjacency)
+    moran_i, moran_p, deviations, lags = local_morans_i(values, study_adjacency)
+    hot_spot = classify_hot_spots(gi_z, gi_p)
+    cluster = classify_clusters(moran_i, moran_p, deviations, lags)
+
+    labels, counts = np.unique(hot_spot, return_counts=True)
+    print(f"{metric}: " + ', '.join(f'{label}: {count}' for label, count in zip(labels, counts)))
+
+    # Only significant ZIPs are drawn, so the layer stays light
+    study_features = [f for f, keep in zip(zip_boundaries['features'], in_study) if keep]
+    hotspot_features = []
+    for feature, label, z, p, cluster_type in zip(study_features, hot_spot, gi_z, gi_p, cluster):
+        if label == 'Not Significant':
+            continue
+        hotspot_features.append({
+            'type': 'Feature',
+            'geometry': feature['geometry'],
+            'properties': {
+                'ZCTA5CE10': feature['properties']['ZCTA5CE10'],
+                'Hot_Spot': label,
+                'Gi_Z': round(float(z), 2),
+                'P_Value': round(float(p), 3),
+                'Cluster': cluster_type,
+            },
+        })
+
+    if not hotspot_features:
+        continue
+
+    folium.GeoJson(
+        {'type': 'FeatureCollection', 'features': hotspot_features},
+        name=f"Hot Spots: {metric.replace('_', ' ')}",
+        show=False,
+        style_function=lambda feature: {'fillColor': hotspot_colors[feature['properties']['Hot_Spot']],
+                                         'color': '#000000',
+                                         'fillOpacity': 0.6,
+                                         'weight': 0.5},
+        tooltip=folium.features.GeoJsonTooltip(
+            fields=['ZCTA5CE10', 'Hot_Spot', 'Gi_Z', 'P_Value', 'Cluster'],
+            aliases=['ZIP Code:', 'Gi*:', 'z-score:', 'p-value:', "Local Moran's I:"],
+            sticky=False,
+        ),
+    ).add_to(m)
+
+
+# --- 5. Kernel-Density Overlay ---
+
+# Records are placed at their ZIP's centroid and smoothed onto a regular grid
+centroids = geometry['centroids']
+located = map_data[map_data[column_zip].isin(centroids.keys())]
+
+if located.empty:
+    print("\nDensity surface skipped: no mapped ZIP has a boundary centroid")
+else:
+    centroid_lats, centroid_lons = zip(*located[column_zip].map(centroids))
+
+    density, density_bounds = density_grid(
+        centroid_lats, centroid_lons, located['Total_Records'],
+        cell_size=DENSITY_CELL_SIZE, bandwidth_km=DENSITY_BANDWIDTH_KM
+    )
+    os.makedirs(os.path.dirname(DENSITY_IMAGE_FILE), exist_ok=True)
+    save_density_png(density, DENSITY_IMAGE_FILE)
+    print(f"\nDensity surface: {density.shape[0]} x {density.shape[1]} cells from {len(located)} ZIP centroids")
+
+    # folium embeds the image in the page, so the PNG itself isn't published
+    folium.raster_layers.ImageOverlay(
+        image=DENSITY_IMAGE_FILE,
+        bounds=density_bounds,
+        name='Record Density',
+        opacity=0.75,
+        show=False,
+    ).add_to(m)
+
+
+
+# --- 6. Multi-Resolution Rollups ---
+
+# The rollups count the ZIP-placed records plus the city-level ones from section 2 (under their
+# place's most common ZIP), with one HyperLogLog sketch per ZIP so areas can union them
+rollup_race_counts = race_zip_counts
+if len(area_df):
+    area_records = backend.clean(area_df, {column_zip: 'raw', column_race: 'race'})
+    rollup_race_counts = race_zip_counts.add(backend.crosstab(area_records, column_zip, column_race), fill_value=0)
+    rollup_race_counts = rollup_race_counts.fillna(0).astype('int64')
+rollup_zips = pd.concat([df[column_zip], area_df[column_zip]])
+rollup_sketches = build_sketches(rollup_race_counts.index.get_indexer(rollup_zips),
+                                 pd.concat([df[column_id], area_df[column_id]]), len(rollup_race_counts))
+
+# ZIP -> city -> county -> state, aggregated from the ZIP counts and dissolved boundaries
+zip_keys = rollup_keys(boundary_zips, gazetteer.zip_places, geometry['zip_counties'])
+zip_keys = zip_keys[zip_keys.index.isin(rollup_race_counts.index)]
+# Places with few records share one 'Other places' area per county, so the city view draws a few dozen shapes
+zip_keys = merge_small_units(zip_keys, rollup_race_counts.sum(axis=1))
+boundaries = rollup_boundaries(zip_boundaries, zip_keys)
+
+# The ZIP-level layers (and the ZIP legend) are only shown once the user zooms in
+layer_zooms = [(choropleth, *ZOOM_RANGES['zip'], 'legend-zip'), (N, *ZOOM_RANGES['zip'], None)]
+
+print("\n--- Geographic Rollups ---")
+for level in ROLLUP_LEVELS:
+    level_counts = rollup_counts(rollup_race_counts, zip_keys, level, rollup_sketches)
+    print(f"{level.title()}: {len(level_counts)} areas")
+
+    # The ZIP map's logical ranges (the first class spans 1-10 or more, so a colour never pins
+    # down a small count), with withheld totals drawn in SUPPRESSED_COLOR instead of a class
+    level_ranges = class_ranges('Total_Records', level_counts['Total_Records'].max())
+    level_counts['Color_Scale'] = classify(level_counts['Total_Records'], level_ranges)
+    legend_id = f'legend-{level}'
+    m.get_root().html.add_child(folium.Element(class_legend_html(
+        f'Number of Records per {level.title()}', level_ranges, legend_id, suppressed=level_counts['Total_Suppressed'].any())))
+
+    features = []
+    for label, row in level_counts.iterrows():
+        area_geometry = boundaries[level].get(label)
+        if area_geometry is None:
+            continue
+        features.append({
+            'type': 'Feature',
+            'geometry': area_geometry,
+            'properties': {
+                'Name': label,
+                'Total_Records': SUPPRESSED_TEXT if row['Total_Suppressed'] else int(row['Total_Records']),
+                'Distinct_Subjects': SUPPRESSED_TEXT if row['Distinct_Suppressed'] else int(row['Distinct_Subjects']),
+                'Dominant_Race': SUPPRESSED_TEXT if row['Dominant_Suppressed'] else row['Dominant_Race'],
+                'Dominant_Percentage': SUPPRESSED_TEXT if row['Dominant_Suppressed'] else row['Dominant_Percentage'],
+                'Color': SUPPRESSED_COLOR if row['Total_Suppressed'] else CLASS_COLORS[int(row['Color_Scale']) - 1],
+            },
+        })
+
+    rollup_layer = folium.GeoJson(
+        {'type': 'FeatureCollection', 'features': features},
+        name=f'{level.title()} Rollup',
+        control=False,
+        style_function=lambda feature: {'fillColor': feature['properties']['Color'],
+                                         'color': '#000000',
+                                         'fillOpacity': 0.7,
+                                         'weight': 0.5},
+        highlight_function=highlight_function,
+        tooltip=folium.features.GeoJsonTooltip(
+            fields=['Name', 'Total_Records', 'Distinct_Subjects', 'Dominant_Race', 'Dominant_Percentage'],
+            aliases=['Area:', 'Total Records:', 'Distinct Subjects (est.):', 'Dominant Race:', 'Concentration (%):'],
+            sticky=False,
+        ),
+    )
+    rollup_layer.add_to(m)
+    layer_zooms.append((rollup_layer, *ZOOM_RANGES[level], legend_id))
+
+ZoomLayerSwitch(layer_zooms).add_to(m)
+
+folium.LayerControl(collapsed=False).add_to(m)
+
+
+# --- 7. Save the Map ---
+# Both modes print the same transfer figures, so the two can be compared run to run
+if PUBLISH_MODE == 'split':
+    published = publish_split(zip_boundaries, map_data, column_zip, legend_html, OUTPUT_MAP_FILE)
+    map_file = published[0]
+else:
+    m.save(OUTPUT_MAP_FILE)
+    map_file = OUTPUT_MAP_FILE
+    print("\n--- Published Files ---")
+    print_transfer_stats([map_file])
 print(f"\nInteractive map successfully created!")
-print(f"Open '{OUTPUT_MAP_FILE}' in your web browser to view the heatmap.")
+print(f"Open '{map_file}' in your web browser to view the heatmap.")
+
+
+# --- 8. Static Map ---
+
+# Boundaries are projected and converted to matplotlib paths once (cached on disk)
+if STATIC_MAP_FILE:
+    static_zips, static_paths = load_paths(GEOJSON_URL, geojson=zip_boundaries)
+    static_colors = zip_colors(static_zips, map_data.set_index(column_zip)['Color_Scale'])
+    render_choropleth(static_paths, static_colors, ranges, class_map_title(CHOROPLETH_METRIC), STATIC_MAP_FILE, legend_title)
+    print(f"Static choropleth saved to '{STATIC_MAP_FILE}'")
 
@@ -0,0 +1,110 @@
+"""
+HyperLogLog sketches for distinct-subject counts that can be merged across groups.
+
+    python hll.py        # sketch estimates vs exact distinct counts by ZIP, year and rollups
+
+A sketch is a row of 2**precision one-byte registers. Sketches for many groups (ZIPs,
+years, ZIP x year cells) are built from the raw rows in one pass, and the distinct count
+of any union of groups is the estimate of the element-wise maximum of their rows, so
+subjects recorded in several ZIPs or years are counted once without re-scanning the rows.
+"""
+import numpy as np
+import pandas as pd
+
+# --- Configuration ---
+HLL_PRECISION = 12   # 4096 registers per sketch: ~1.6% standard error, 4 KB per sketch
+
+
+def hash_ids(ids):
+    """64-bit hash of every ID (numbers and strings hash the same way pandas does)."""
+    return pd.util.hash_pandas_object(pd.Series(ids, copy=False), index=False).to_numpy(dtype=np.uint64)
+
+
+def _bit_length(words):
+    """Vectorized int.bit_length() for uint64 arrays (0 -> 0)."""
+    # frexp is exact on 32-bit halves, whereas a float64 of the whole word can round up
+    high = (words >> np.uint64(32)).astype(np.float64)
+    low = (words & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    return np.where(high > 0, 32 + np.frexp(high)[1], np.frexp(low)[1])
+
+
+def build_sketches(group_codes, ids, group_count, precision=HLL_PRECISION):
+    """
+    One sketch per group: a (group_count x 2**precision) uint8 register array.
+
+    `group_codes` gives each row's group (0..group_count-1; negative codes are skipped)
+    and `ids` the subject ID of each row.
+    """
+    group_codes = np.asarray(group_codes)
+    keep = group_codes >= 0
+    hashes = hash_ids(ids)[keep]
+
+    # The top `precision` bits pick the register; the rank is the position of the first
+    # 1-bit in the remaining bits
+    suffix_bits = 64 - precision
+    registers = (hashes >> np.uint64(suffix_bits)).astype(np.intp)
+    suffix = hashes & np.uint64((1 << suffix_bits) - 1)
+    ranks = (suffix_bits - _bit_length(suffix) + 1).astype(np.uint8)
+
+    sketches = np.zeros((group_count, 1 << precision), dtype=np.uint8)
+    np.maximum.at(sketches, (group_codes[keep], registers), ranks)
+    return sketches
+
+
+def merge_sketches(sketches, group_codes, group_count):
+    """Union the sketches row-wise into `group_count` groups (row i goes to group_codes[i]; negative skips)."""
+    group_codes = np.asarray(group_codes)
+    keep = group_codes >= 0
+    merged = np.zeros((group_count, sketches.shape[-1]), dtype=np.uint8)
+    np.maximum.at(merged, group_codes[keep], sketches[keep])
+    return merged
+
+
+def estimate_distinct(sketches):
+    """Estimated distinct count of each sketch (any leading shape; registers on the last axis)."""
+    sketches = np.asarray(sketches)
+    m = sketches.shape[-1]
+    alpha = 0.7213 / (1 + 1.079 / m)
+    raw = alpha * m * m / np.sum(np.exp2(-sketches.astype(np.float64)), axis=-1)
+
+    # Small cardinalities: linear counting over the empty registers is far more accurate
+    empty = np.sum(sketches == 0, axis=-1)
+    linear = m * np.log(m / np.maximum(empty, 1))
+    return np.where((raw <= 2.5 * m) & (empty > 0), linear, raw)
+
+
+if __name__ == '__main__':
+    import time
+
+    from excel_dates import decode_excel_dates
+    from gang_data import COLUMN_CREATE_DATE, COLUMN_ID, COLUMN_ZIP, clean_zip, read_workbook
+
+    df = read_workbook()
+    ids = df[COLUMN_ID]
+    zips = clean_zip(df[COLUMN_ZIP])
+    years = pd.Series(decode_excel_dates(df[COLUMN_CREATE_DATE]), index=df.index).dt.year
+
+    print(f"Records: {len(df)}, distinct subjects: {ids.nunique()}")
+
+    # One sketch per (ZIP, year) cell; ZIP, year and all-record counts are merges of them
+    start = time.perf_counter()
+    cell_codes, cells = pd.MultiIndex.from_arrays([zips, years]).factorize()
+    cell_sketches = build_sketches(cell_codes, ids, len(cells))
+    print(f"Built {len(cells)} ZIP x year sketches in {time.perf_counter() - start:.2f} s "
+          f"({cell_sketches.nbytes / 1e6:.1f} MB)")
+
+    print("\n--- Sketch estimate vs exact distinct subjects ---")
+    for name, keys, exact in [
+        ('ZIP', cells.get_level_values(0), ids.groupby(zips).nunique()),
+        ('Year', cells.get_level_values(1), ids.groupby(years).nunique()),
+    ]:
+        group_codes, groups = pd.factorize(keys)
+        estimates = pd.Series(estimate_distinct(merge_sketches(cell_sketches, group_codes, len(groups))), index=groups)
+        large = exact[exact >= 100]
+        errors = (estimates.reindex(large.index) - large).abs() / large * 100
+        print(f"{name}: {len(groups)} groups; groups with 100+ subjects: median error "
+              f"{errors.median():.2f}%, max {errors.max():.2f}%")
+
+    everything = estimate_distinct(cell_sketches.max(axis=0))
+    print(f"All records: estimate {everything:.0f}, exact {ids.nunique()} "
+          f"({abs(everything - ids.nunique()) / ids.nunique() * 100:.2f}% error)")
@@ -0,0 +1,145 @@
+import os
+
+import numpy as np
+from scipy import sparse
+
+from zip_geometry import CACHE_DIR, feature_zips, polygon_rings
+
+# --- Configuration ---
+ADJACENCY_CACHE_FILE = os.path.join(CACHE_DIR, 'zip_adjacency.npz')
+COORDINATE_DECIMALS = 5      # Vertices closer than ~1 m are treated as shared
+PERMUTATIONS = 999
+SIGNIFICANCE = 0.05
+
+
+# --- Contiguity Graph ---
+
+def build_adjacency(geojson):
+    """
+    Queen contiguity between ZIP polygons as a sparse boolean matrix.
+
+    Two ZIPs are neighbours when they share at least one (rounded) boundary vertex.
+    Rather than comparing polygons pairwise, every vertex is given an id and the
+    ZIP x vertex incidence matrix is multiplied by its transpose.
+    """
+    feature_ids, coordinates = [], []
+    for i, feature in enumerate(geojson['features']):
+        for ring in polygon_rings(feature['geometry']):
+            ring = np.asarray(ring, dtype='float64')[:, :2]
+            coordinates.append(ring)
+            feature_ids.append(np.full(len(ring), i))
+
+    coordinates = np.round(np.concatenate(coordinates), COORDINATE_DECIMALS)
+    feature_ids = np.concatenate(feature_ids)
+    _, vertex_ids = np.unique(coordinates, axis=0, return_inverse=True)
+
+    n_features = len(geojson['features'])
+    incidence = sparse.csr_matrix(
+        (np.ones(len(vertex_ids), dtype='int32'), (feature_ids, vertex_ids.ravel())),
+        shape=(n_features, vertex_ids.max() + 1)
+    )
+    adjacency = (incidence @ incidence.T).astype(bool).tolil()
+    adjacency.setdiag(False)
+    return adjacency.tocsr()
+
+
+def load_adjacency(geojson, cache_file=ADJACENCY_CACHE_FILE):
+    """ZIP codes and their contiguity matrix, built once and cached on disk."""
+    zips = np.array(feature_zips(geojson))
+
+    if os.path.exists(cache_file):
+        cached = np.load(cache_file)
+        if np.array_equal(cached['zips'], zips):
+            adjacency = sparse.csr_matrix(
+                (np.ones(len(cached['indices']), dtype=bool), cached['indices'], cached['indptr']),
+                shape=(len(zips), len(zips))
+            )
+            return zips, adjacency
+
+    adjacency = build_adjacency(geojson)
+    os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+    np.savez_compressed(cache_file, zips=zips, indices=adjacency.indices, indptr=adjacency.indptr)
+    return zips, adjacency
+
+
+# --- Local Statistics ---
+
+def _permuted(values, permutations, seed):
+    """(n x permutations) matrix whose columns are random permutations of `values`."""
+    rng = np.random.default_rng(seed)
+    return rng.permuted(np.tile(values[:, None], (1, permutations)), axis=0)
+
+
+def _pseudo_p_values(observed, simulated):
+    """Folded pseudo p-values of each row's observed statistic against its simulated column."""
+    greater = (simulated >= observed[:, None]).sum(axis=1)
+    lower = (simulated <= observed[:, None]).sum(axis=1)
+    return (np.minimum(greater, lower) + 1) / (simulated.shape[1] + 1)
+
+
+def getis_ord_gi_star(values, adjacency, permutations=PERMUTATIONS, seed=0):
+    """
+    Getis-Ord Gi* z-scores and permutation p-values for every ZIP.
+
+    Uses binary weights with each ZIP counted as its own neighbour. All ZIPs and all
+    permutations are evaluated with a single sparse-dense matrix product.
+    """
+    values = np.asarray(values, dtype='float64')
+    n = len(values)
+    weights = (adjacency + sparse.identity(n, format='csr', dtype=bool)).astype('float64')
+
+    weight_sums = np.asarray(weights.sum(axis=1)).ravel()
+    mean = values.mean()
+    std = np.sqrt((values ** 2).mean() - mean ** 2)
+    denominator = std * np.sqrt((n * weight_sums - weight_sums ** 2) / (n - 1))
+
+    def z_scores(local_sums):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            z = (local_sums - mean * weight_sums[:, None]) / denominator[:, None]
+        return np.nan_to_num(z)
+
+    observed = z_scores((weights @ values)[:, None])[:, 0]
+    simulated = z_scores(weights @ _permuted(values, permutations, seed))
+    return observed, _pseudo_p_values(observed, simulated)
+
+
+def local_morans_i(values, adjacency, permutations=PERMUTATIONS, seed=0):
+    """
+    Local Moran's I and permutation p-values for every ZIP, using row-standardised weights.
+
+    Each ZIP's own value is held fixed while the neighbourhood values are drawn from
+    random permutations of the whole map.
+    """
+    values = np.asarray(values, dtype='float64')
+    deviations = values - values.mean()
+    m2 = (deviations ** 2).mean()
+
+    weights = adjacency.astype('float64')
+    neighbour_counts = np.asarray(weights.sum(axis=1)).ravel()
+    weights = sparse.diags(1 / np.maximum(neighbour_counts, 1)) @ weights
+
+    scale = deviations / m2 if m2 > 0 else np.zeros_like(deviations)
+    observed = scale * (weights @ deviations)
+    simulated = scale[:, None] * (weights @ _permuted(deviations, permutations, seed))
+    return observed, _pseudo_p_values(observed, simulated), deviations, weights @ deviations
+
+
+def classify_hot_spots(z_scores, p_values, significance=SIGNIFICANCE):
+    """Label each ZIP as 'Hot Spot', 'Cold Spot' or 'Not Significant' from its Gi* result."""
+    labels = np.full(len(z_scores), 'Not Significant', dtype=object)
+    significant = p_values < significance
+    labels[significant & (z_scores > 0)] = 'Hot Spot'
+    labels[significant & (z_scores < 0)] = 'Cold Spot'
+    return labels
+
+
+def classify_clusters(moran_i, p_values, deviations, lags, significance=SIGNIFICANCE):
+    """Local Moran's I cluster type per ZIP: 'High-High', 'Low-Low', 'High-Low', 'Low-High' or 'Not Significant'."""
+    labels = np.full(len(moran_i), 'Not Significant', dtype=object)
+    significant = p_values < significance
+    high, high_lag = deviations > 0, lags > 0
+    labels[significant & high & high_lag] = 'High-High'
+    labels[significant & ~high & ~high_lag] = 'Low-Low'
+    labels[significant & high & ~high_lag] = 'High-Low'
+    labels[significant & ~high & high_lag] = 'Low-High'
+    return labels
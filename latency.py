@@ -0,0 +1,158 @@
+import pandas as pd
+import matplotlib.pyplot as plt
+import numpy as np
+
+from excel_dates import decode_excel_dates
+from gang_data import clean_race, read_workbook
+
+# --- Configuration ---
+file_path = 'Cook County Regional Gang Intelligence Database.xlsx'
+column_create_date = 'Subject_Create_Date'
+column_approved_date = 'Subject_Approved_Date'
+column_race = 'Subject_Race_ID'
+column_zip = 'address_zip'
+
+PERCENTILES = [50, 75, 90, 95, 99]
+MIN_GROUP_SIZE = 20    # Groups smaller than this are left out of the percentile tables
+TOP_ZIPS = 15          # Number of ZIP codes (by record count) shown in the ZIP table
+
+# --- 1. Data Loading ---
+print(f"Attempting to read data from: {file_path}")
+
+try:
+    # Dates are decoded below with the vectorized serial/ISO decoder, so no parse_dates here
+    df = read_workbook(file_path)
+
+except FileNotFoundError:
+    print(f"\nERROR: The file '{file_path}' was not found.")
+    print("Please ensure the Excel file is in the same directory as this script.")
+    print("--- Generating sample data for demonstration instead ---")
+
+    # Fallback: raw Excel serials, with approval lagging creation by a skewed delay
+    np.random.seed(46)
+    data_size = 5000
+    create_serials = 40179 + np.random.rand(data_size) * 365 * 9   # 2010-01-01 onwards
+    approval_lag = np.where(np.random.rand(data_size) < 0.6, 0, np.random.exponential(20, data_size))
+
+    df = pd.DataFrame({
+        column_create_date: create_serials,
+        column_approved_date: create_serials + approval_lag,
+        column_race: np.random.choice(['Black', 'Hispanic', 'White', None], size=data_size, p=[0.5, 0.3, 0.15, 0.05]),
+        column_zip: np.random.choice([60608, 60617, 60620, 60632, 46320, 46408], size=data_size),
+    })
+
+except Exception as e:
+    print(f"\nAn unexpected error occurred during file reading: {e}")
+    exit()
+
+# Check if required columns exist
+required_columns = [column_create_date, column_approved_date, column_race, column_zip]
+missing_cols = [col for col in required_columns if col not in df.columns]
+
+if missing_cols:
+    print("\nERROR: The following required columns were not found in the Excel file:")
+    print(missing_cols)
+    print(f"Available columns: {list(df.columns)}")
+    exit()
+
+print(f"Data loaded successfully. Total records: {len(df)}")
+
+
+# --- 2. Date Decoding and Latency Calculation ---
+
+created = decode_excel_dates(df[column_create_date])
+approved = decode_excel_dates(df[column_approved_date])
+
+# Latency in (fractional) days, computed on the raw datetime64 arrays
+latency_days = (approved - created) / np.timedelta64(1, 'D')
+
+missing_dates = np.isnan(latency_days)
+negative_latency = latency_days < 0
+valid = ~missing_dates & ~negative_latency
+
+print("\n--- Record Lifecycle Data Quality ---")
+print(f"Records with a missing create/approval date: {int(missing_dates.sum())}")
+print(f"Records approved before they were created:   {int(negative_latency.sum())}")
+print(f"Records used for latency analysis:           {int(valid.sum())}")
+
+# Clean up grouping columns the same way the other reports do
+race = clean_race(df[column_race])
+zip_code = df[column_zip].astype(str).str.replace(r'\..*', '', regex=True).str.strip().str[:5]
+zip_code = zip_code.where(zip_code.str.len() == 5, 'Unknown')
+
+latency_df = pd.DataFrame({
+    'Year': created.astype('datetime64[Y]').astype(int) + 1970,
+    'Race': race.to_numpy(),
+    'ZIP': zip_code.to_numpy(),
+    'Latency_Days': latency_days,
+    'Same_Day': latency_days < 1,
+})[valid]
+
+
+# --- 3. Latency Distributions ---
+
+quantiles = [p / 100 for p in PERCENTILES]
+percentile_columns = [f'P{p}' for p in PERCENTILES]
+
+
+def latency_percentiles(group_column):
+    """Percentile table of latency (days) per group, skipping groups below MIN_GROUP_SIZE."""
+    grouped = latency_df.groupby(group_column)['Latency_Days']
+    table = grouped.quantile(quantiles).unstack()
+    table.columns = percentile_columns
+    table.insert(0, 'Records', grouped.size())
+    table.insert(1, 'Same_Day_Percent', latency_df.groupby(group_column)['Same_Day'].mean() * 100)
+    return table[table['Records'] >= MIN_GROUP_SIZE].round(2)
+
+
+overall = np.percentile(latency_df['Latency_Days'].to_numpy(), PERCENTILES)
+print("\n--- Create-to-Approval Latency (days), All Records ---")
+for p, value in zip(PERCENTILES, overall):
+    print(f"P{p}: {value:.2f}")
+
+by_year = latency_percentiles('Year')
+by_race = latency_percentiles('Race')
+by_zip = latency_percentiles('ZIP').sort_values('Records', ascending=False).head(TOP_ZIPS)
+
+print("\n--- Latency by Year of Record Creation ---")
+print(by_year)
+print("\n--- Latency by Subject Race ---")
+print(by_race)
+print(f"\n--- Latency by ZIP Code (top {TOP_ZIPS} by record count) ---")
+print(by_zip)
+print("\n" + "="*60 + "\n")
+
+
+# --- 4. Plot the Latency Data ---
+
+fig, (ax_hist, ax_year) = plt.subplots(1, 2, figsize=(16, 7))
+
+# Log-spaced bins so the long tail is visible next to the same-day approvals
+positive = latency_df['Latency_Days'].to_numpy()
+positive = positive[positive > 0]
+if len(positive):
+    bins = np.logspace(np.log10(max(positive.min(), 1 / 24)), np.log10(positive.max()), 40)
+    ax_hist.hist(positive, bins=bins, color='#3366CC', edgecolor='black')
+    ax_hist.set_xscale('log')
+
+ax_hist.set_title('Distribution of Create-to-Approval Latency', fontsize=16, fontweight='bold', pad=15)
+ax_hist.set_xlabel('Days from Creation to Approval (log scale)', fontsize=13)
+ax_hist.set_ylabel('Number of Records', fontsize=13)
+ax_hist.grid(axis='y', linestyle='--', alpha=0.7)
+
+by_year[['P50', 'P90']].plot(kind='line', ax=ax_year, linewidth=3, marker='o', markersize=8)
+ax_year.set_title('Approval Latency by Year of Record Creation', fontsize=16, fontweight='bold', pad=15)
+ax_year.set_xlabel('Year of Record Creation', fontsize=13)
+ax_year.set_ylabel('Latency (days)', fontsize=13)
+ax_year.set_ylim(bottom=0)
+ax_year.legend(['Median', '90th Percentile'], title='Latency', loc='upper left', fontsize=12)
+ax_year.grid(axis='both', linestyle='--', alpha=0.7)
+
+plt.figtext(
+    0.5, 0.01,
+    f'{int(latency_df["Same_Day"].sum())} of {len(latency_df)} records were approved within a day of creation.',
+    ha='center', fontsize=10, color='gray'
+)
+
+plt.tight_layout(rect=[0, 0.05, 1, 1])
+plt.show()
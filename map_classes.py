@@ -0,0 +1,62 @@
+import numpy as np
+
+# --- Configuration ---
+# Fill colour of each choropleth class, lightest first: the one palette for the HTML map's
+# ZIP layer, its legend and rollup layers, the split page (publish.py) and the static maps
+CLASS_COLORS = ['#ffffb2', '#fecc5c', '#fd8d3c', '#e31a1c', '#800026']
+MISSING_COLOR = '#f0f0f0'      # Boundaries without any records
+SUPPRESSED_COLOR = '#dddddd'   # Hatched: boundaries whose count is withheld (as in facets.py)
+SUPPRESSED_HATCH = '////'
+
+
+def class_ranges(metric, max_records):
+    """
+    The five inclusive (low, high) ranges the ZIP choropleth is shaded by.
+
+    Record counts get logical ranges that group similar values together, chosen by the
+    largest ZIP total; the shrunk dominant-race share gets fixed percentage bands.
+    """
+    if metric == 'Shrunk_Dominant_Percentage':
+        # Fixed percentage bands for the shrunk dominant-race share
+        return [(0, 40), (40, 55), (55, 70), (70, 85), (85, 100)]
+    if max_records <= 10:
+        # For very low record counts
+        return [(1, 1), (2, 2), (3, 4), (5, 7), (8, max_records)]
+    if max_records <= 50:
+        # For low to medium record counts
+        return [(1, 2), (3, 5), (6, 10), (11, 20), (21, max_records)]
+    if max_records <= 100:
+        # For medium record counts
+        return [(1, 3), (4, 8), (9, 15), (16, 30), (31, max_records)]
+    if max_records <= 500:
+        # For higher record counts
+        return [(1, 5), (6, 15), (16, 30), (31, 60), (61, max_records)]
+    # For very high record counts
+    return [(1, 10), (11, 25), (26, 50), (51, 100), (101, max_records)]
+
+
+def classify(values, ranges):
+    """Class 1-5 of each value: the first range holding it, 1 when none does."""
+    values = np.asarray(values, dtype=float)
+    classes = np.ones(len(values), dtype=np.int64)
+    # Assign from the last range to the first so the first matching range wins
+    for i, (low, high) in reversed(list(enumerate(ranges))):
+        classes[(values >= low) & (values <= high)] = i + 1
+    return classes
+
+
+def class_map_title(metric):
+    if metric == 'Shrunk_Dominant_Percentage':
+        return 'Dominant Race Concentration by ZIP Code (shrunk)'
+    return 'Gang Database Records by ZIP Code'
+
+
+def class_legend_title(metric):
+    if metric == 'Shrunk_Dominant_Percentage':
+        return 'Dominant Race Concentration (%, shrunk)'
+    return 'Number of Records per ZIP Code'
+
+
+def range_labels(ranges):
+    """Legend label of each class ('1–10', ...)."""
+    return [f'{low}–{high}' for low, high in ranges]
@@ -0,0 +1,222 @@
+import glob
+import gzip
+import hashlib
+import json
+import os
+import time
+from string import Template
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from map_classes import CLASS_COLORS
+from suppression import SUPPRESSED_TEXT
+from zip_geometry import ZIP_PROPERTY, polygon_rings
+
+# --- Configuration ---
+PUBLISH_DIR = '.'   # The repo root, which the Pages workflow deploys (commit index.html and data/)
+DATA_DIR = 'data'
+# Also write .gz/.br copies of every file, for servers that serve pre-compressed files
+# (nginx gzip_static/brotli_static). GitHub Pages compresses on the fly and never serves them.
+PRECOMPRESS = False
+COORDINATE_DECIMALS = 5   # ~1 m, far below what the map can show
+
+# Page shell: Leaflet fetches the content-hashed data files and builds styles and
+# popups in the browser, so the HTML never has to change when only the data does.
+PAGE_TEMPLATE = Template("""<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1.0">
+<title>Gang Database Visualization</title>
+<link rel="stylesheet" href="https://unpkg.com/leaflet@1.9.4/dist/leaflet.css">
+<script src="https://unpkg.com/leaflet@1.9.4/dist/leaflet.js"></script>
+<style>
+    html, body, #map { height: 100%; margin: 0; }
+    .leaflet-tooltip, .leaflet-popup-content {
+        font-size: 13px;
+    }
+</style>
+</head>
+<body>
+<div id="map"></div>
+$legend_html
+<script>
+var COLORS = $colors;
+var map = L.map('map').setView([41.8781, -87.6298], 10);
+L.tileLayer('https://{s}.basemaps.cartocdn.com/light_all/{z}/{x}/{y}{r}.png', {
+    attribution: '&copy; OpenStreetMap contributors &copy; CARTO'
+}).addTo(map);
+
+function popupHtml(zip, row) {
+    if (!row) {
+        return '<b>ZIP Code:</b> ' + zip + '<br>No data available.';
+    }
+    // Withheld figures arrive as null
+    return '<b>ZIP Code:</b> ' + zip + '<br>' +
+        '<b>Total Records:</b> ' + (row.total === null ? '$suppressed' : row.total) + '<br>' +
+        '<b>Distinct Subjects:</b> ' + (row.subjects === null ? '$suppressed' : row.subjects) + '<br>' +
+        '<b>Dominant Race:</b> ' + (row.race === null ? '$suppressed' : row.race) + '<br>' +
+        '<b>Concentration:</b> ' + (row.pct === null ? '$suppressed' : row.pct + '%') + '<br>' +
+        '<b>Adjusted Concentration:</b> ' + (row.shrunk_pct === null ? '$suppressed' :
+            row.shrunk_pct + '% ' + row.shrunk_race + ' (95% CI ' + row.lower + '\\u2013' + row.upper + '%)');
+}
+
+Promise.all([
+    fetch('$geometry_file').then(function(r) { return r.json(); }),
+    fetch('$attributes_file').then(function(r) { return r.json(); })
+]).then(function(data) {
+    var geometry = data[0], columns = data[1], rows = {};
+    // Columnar attributes -> one object per ZIP
+    columns.zip.forEach(function(zip, i) {
+        var row = {};
+        Object.keys(columns).forEach(function(key) { row[key] = columns[key][i]; });
+        rows[zip] = row;
+    });
+
+    L.geoJSON(geometry, {
+        style: function(feature) {
+            var row = rows[feature.properties.zip];
+            return row
+                ? {fillColor: COLORS[row.color - 1], color: '#000000', fillOpacity: 0.8, weight: 0.2}
+                : {fillColor: '#f0f0f0', color: '#cccccc', fillOpacity: 0.3, weight: 0.1};
+        },
+        onEachFeature: function(feature, layer) {
+            var zip = feature.properties.zip;
+            layer.bindTooltip('ZIP Code: ' + zip, {sticky: false});
+            layer.bindPopup(function() { return popupHtml(zip, rows[zip]); });
+        }
+    }).addTo(map);
+});
+</script>
+</body>
+</html>
+""")
+
+
+def _round_coordinates(coordinates):
+    """Round nested GeoJSON coordinate lists to COORDINATE_DECIMALS."""
+    if coordinates and isinstance(coordinates[0], (int, float)):
+        return [round(value, COORDINATE_DECIMALS) for value in coordinates[:2]]
+    return [_round_coordinates(part) for part in coordinates]
+
+
+def _write_with_variants(path, body, precompress=PRECOMPRESS):
+    """Write `body` to `path`, plus .gz and (if brotli is installed) .br copies with `precompress`."""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(body)
+    if precompress:
+        with open(path + '.gz', 'wb') as f:
+            f.write(gzip.compress(body, compresslevel=9, mtime=0))
+        if brotli is not None:
+            with open(path + '.br', 'wb') as f:
+                f.write(brotli.compress(body, quality=11))
+
+
+def transfer_stats(path, repeat=5):
+    """
+    Raw bytes, gzip bytes (what a server compressing on the fly, like GitHub Pages, sends)
+    and, for .json files, the best-of-`repeat` parse time in ms (json.loads, standing in
+    for the browser's JSON.parse of the same text).
+    """
+    with open(path, 'rb') as f:
+        body = f.read()
+    stats = {'raw': len(body), 'gzip': len(gzip.compress(body, compresslevel=6, mtime=0)), 'parse_ms': None}
+    if path.endswith('.json'):
+        runs = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            json.loads(body)
+            runs.append(time.perf_counter() - start)
+        stats['parse_ms'] = min(runs) * 1000
+    return stats
+
+
+def print_transfer_stats(paths):
+    """One line of transfer_stats per file, plus the total."""
+    total_raw = total_gzip = 0
+    for path in paths:
+        stats = transfer_stats(path)
+        total_raw += stats['raw']
+        total_gzip += stats['gzip']
+        parse = f", parse {stats['parse_ms']:.1f} ms" if stats['parse_ms'] is not None else ''
+        print(f"{path}: {stats['raw']:,} bytes, {stats['gzip']:,} gzipped{parse}")
+    if len(paths) > 1:
+        print(f"Total: {total_raw:,} bytes, {total_gzip:,} gzipped")
+
+
+def write_data_file(payload, name, output_dir):
+    """Write compact JSON as `data/<name>.<content hash>.json` (+ variants); returns the relative path."""
+    body = json.dumps(payload, separators=(',', ':')).encode()
+    relative_path = os.path.join(DATA_DIR, f'{name}.{hashlib.sha256(body).hexdigest()[:12]}.json')
+
+    # Drop earlier versions so stale hashed files don't pile up in the deployment
+    for stale in glob.glob(os.path.join(output_dir, DATA_DIR, f'{name}.*.json*')):
+        os.remove(stale)
+    _write_with_variants(os.path.join(output_dir, relative_path), body)
+    return relative_path
+
+
+def publish_split(geojson, map_data, zip_column, legend_html, output_file, output_dir=PUBLISH_DIR):
+    """
+    Write the map as a small page shell plus separate geometry and attribute files, all
+    under `output_dir` (by default the deployed repo root, in place of the inline page).
+
+    Geometry keeps only the ZIP property and rounded coordinates; attributes are stored
+    column-wise and turned into popups by a client-side template.
+
+    This is a reduced map: only the base ZIP choropleth, its legend and popups. The
+    hot-spot, density and rollup layers and the zoom switch exist only in the inline page.
+    """
+    geometry = {
+        'type': 'FeatureCollection',
+        'features': [{
+            'type': 'Feature',
+            'properties': {'zip': feature['properties'][ZIP_PROPERTY]},
+            'geometry': {'type': feature['geometry']['type'],
+                         'coordinates': _round_coordinates(feature['geometry']['coordinates'])},
+        } for feature in geojson['features'] if polygon_rings(feature['geometry'])],
+    }
+
+    # Withheld (small-cell suppressed) figures are written as null, never as their values
+    total_hidden = map_data['Total_Suppressed']
+    dominant_hidden = total_hidden | map_data['Dominant_Suppressed']
+    shrunk_hidden = total_hidden | map_data['Shrunk_Suppressed']
+
+    def published(column, hidden, rounding=None):
+        values = map_data[column].round(rounding) if rounding is not None else map_data[column]
+        return values.astype(object).where(~hidden, None).tolist()
+
+    attributes = {
+        'zip': map_data[zip_column].tolist(),
+        'total': published('Total_Records', total_hidden),
+        'subjects': published('Distinct_Subjects', map_data['Distinct_Suppressed']),
+        'race': published('Dominant_Race', dominant_hidden),
+        'pct': published('Dominant_Percentage', dominant_hidden, 1),
+        'shrunk_race': published('Shrunk_Dominant_Race', shrunk_hidden),
+        'shrunk_pct': published('Shrunk_Dominant_Percentage', shrunk_hidden, 1),
+        'lower': published('Shrunk_Lower', shrunk_hidden, 1),
+        'upper': published('Shrunk_Upper', shrunk_hidden, 1),
+        'color': map_data['Color_Scale'].astype(int).tolist(),
+    }
+
+    geometry_file = write_data_file(geometry, 'geometry', output_dir)
+    attributes_file = write_data_file(attributes, 'attributes', output_dir)
+
+    page = PAGE_TEMPLATE.substitute(
+        legend_html=legend_html,
+        colors=json.dumps(CLASS_COLORS),
+        suppressed=SUPPRESSED_TEXT,
+        geometry_file=geometry_file.replace(os.sep, '/'),
+        attributes_file=attributes_file.replace(os.sep, '/'),
+    )
+    page_path = os.path.normpath(os.path.join(output_dir, output_file))
+    _write_with_variants(page_path, page.encode())
+
+    print("\n--- Published Files (split: ZIP choropleth only, no hot-spot/density/rollup layers) ---")
+    published = [page_path] + [os.path.normpath(os.path.join(output_dir, path)) for path in (geometry_file, attributes_file)]
+    print_transfer_stats(published)
+    return published
@@ -0,0 +1,167 @@
+"""
+Run parameterized queries against the SQLite export written by export_sqlite.py.
+
+Examples:
+    python query_db.py zip 60623
+    python query_db.py records --race Hispanic --flag armed --since 2016-01-01 --limit 20
+    python query_db.py flags-by-year
+    python query_db.py sql "SELECT gang, COUNT(*) FROM records WHERE zip = ? GROUP BY gang" 60623
+"""
+import argparse
+import sqlite3
+import sys
+import time
+
+# Only the standard library is imported, so queries start in milliseconds
+
+DATABASE_FILE = 'gang_data.sqlite'
+FLAG_NAMES = ['armed', 'felon', 'probation', 'admits_gang', 'wears_colors']
+
+
+def print_table(cursor):
+    """Print query results as an aligned text table."""
+    headers = [description[0] for description in cursor.description]
+    rows = [['' if value is None else str(value) for value in row] for row in cursor.fetchall()]
+    widths = [max([len(header)] + [len(row[i]) for row in rows]) for i, header in enumerate(headers)]
+
+    print('  '.join(header.ljust(width) for header, width in zip(headers, widths)))
+    print('  '.join('-' * width for width in widths))
+    for row in rows:
+        print('  '.join(value.ljust(width) for value, width in zip(row, widths)))
+    return len(rows)
+
+
+def zip_query(args):
+    """Race breakdown of the records in one ZIP code."""
+    return ("""
+        SELECT r.race, r.records,
+               ROUND(100.0 * r.records / SUM(r.records) OVER (), 1) AS percent
+        FROM zip_race_counts r
+        WHERE r.zip = ?
+        ORDER BY r.records DESC
+    """, [args.zip])
+
+
+def record_filters(args):
+    """WHERE clause and parameters for the shared --zip/--race/--since/--until/--flag filters."""
+    conditions, params = [], []
+    if args.zip:
+        conditions.append('zip = ?')
+        params.append(args.zip)
+    if args.race:
+        conditions.append('race = ?')
+        params.append(args.race)
+    if args.since:
+        conditions.append('create_date >= ?')
+        params.append(args.since)
+    if args.until:
+        conditions.append('create_date < ?')
+        params.append(args.until)
+    for flag in args.flag or []:
+        # Safe to interpolate: argparse restricts --flag to FLAG_NAMES
+        conditions.append(f'{flag} = 1')
+
+    return (f"WHERE {' AND '.join(conditions)}" if conditions else ''), params
+
+
+def records_query(args):
+    """Individual records matching any combination of filters."""
+    where, params = record_filters(args)
+    return (f"""
+        SELECT subject_id, sex, race, city, state, zip, gang, create_date, {', '.join(FLAG_NAMES)}
+        FROM records {where}
+        ORDER BY create_date
+        LIMIT ?
+    """, params + [args.limit])
+
+
+def count_query(args):
+    """Number of records (and distinct subjects) matching the filters, grouped by a column."""
+    where, params = record_filters(args)
+    return (f"""
+        SELECT {args.by}, COUNT(*) AS records, COUNT(DISTINCT subject_id) AS subjects
+        FROM records {where}
+        GROUP BY {args.by}
+        ORDER BY records DESC
+    """, params)
+
+
+def flags_by_year_query(args):
+    """Percentage of new records carrying each flag, per year of creation."""
+    percentages = ', '.join(f'ROUND(100.0 * {flag} / records, 1) AS {flag}_percent' for flag in FLAG_NAMES)
+    return (f"SELECT create_year, records, {percentages} FROM year_flag_counts ORDER BY create_year", [])
+
+
+def race_admits_query(args):
+    """Gang admission by race (the race.py frequency table)."""
+    return ("""
+        SELECT race,
+               SUM(CASE WHEN admits_gang = 0 THEN records ELSE 0 END) AS n,
+               SUM(CASE WHEN admits_gang = 1 THEN records ELSE 0 END) AS y
+        FROM race_admits_counts
+        GROUP BY race
+        ORDER BY race
+    """, [])
+
+
+def sql_query(args):
+    """Arbitrary SQL with ? placeholders bound to the remaining arguments."""
+    return args.sql, args.params
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='Query the SQLite export of the gang database.')
+    parser.add_argument('--db', default=DATABASE_FILE, help=f'database file (default: {DATABASE_FILE})')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    zip_parser = subparsers.add_parser('zip', help=zip_query.__doc__)
+    zip_parser.add_argument('zip')
+    zip_parser.set_defaults(query=zip_query)
+
+    def add_filters(filter_parser):
+        filter_parser.add_argument('--zip')
+        filter_parser.add_argument('--race')
+        filter_parser.add_argument('--since', help='earliest create date, e.g. 2016-01-01')
+        filter_parser.add_argument('--until', help='create date upper bound (exclusive)')
+        filter_parser.add_argument('--flag', action='append', choices=FLAG_NAMES, help='only flagged records (repeatable)')
+
+    records_parser = subparsers.add_parser('records', help=records_query.__doc__)
+    add_filters(records_parser)
+    records_parser.add_argument('--limit', type=int, default=50)
+    records_parser.set_defaults(query=records_query)
+
+    count_parser = subparsers.add_parser('count', help=count_query.__doc__)
+    add_filters(count_parser)
+    count_parser.add_argument('--by', default='race', choices=['race', 'zip', 'city', 'state', 'gang', 'sex', 'create_year'])
+    count_parser.set_defaults(query=count_query)
+
+    subparsers.add_parser('flags-by-year', help=flags_by_year_query.__doc__).set_defaults(query=flags_by_year_query)
+    subparsers.add_parser('race-admits', help=race_admits_query.__doc__).set_defaults(query=race_admits_query)
+
+    sql_parser = subparsers.add_parser('sql', help=sql_query.__doc__)
+    sql_parser.add_argument('sql')
+    sql_parser.add_argument('params', nargs='*')
+    sql_parser.set_defaults(query=sql_query)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    sql, params = args.query(args)
+
+    try:
+        # Open read-only so ad hoc SQL can't modify the export
+        connection = sqlite3.connect(f'file:{args.db}?mode=ro', uri=True)
+    except sqlite3.OperationalError:
+        print(f"ERROR: Could not open '{args.db}'. Run export_sqlite.py first.")
+        return 1
+
+    start = time.perf_counter()
+    with connection:
+        row_count = print_table(connection.execute(sql, params))
+    print(f"\n{row_count} rows in {(time.perf_counter() - start) * 1000:.1f} ms")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,10 +3,15 @@ import matplotlib.pyplot as plt
 import numpy as np
 import os
 
+from backends import get_backend
+from gang_data import read_workbook
+from suppression import SUPPRESSED_TEXT, SUPPRESSION_THRESHOLD, suppress_distinct, suppress_table
+
 # --- Configuration ---
 file_path = 'Cook County Regional Gang Intelligence Database.xlsx'
 column_race = 'Subject_Race_ID'
 column_admits_gang = 'Subject_Admits_Gang'
+column_id = 'Subject_ID'
 
 # --- 1. Data Loading ---
 print(f"Attempting to read data from: {file_path}")
@@ -14,7 +19,7 @@ print(f"Attempting to read data from: {file_path}")
 try:
     # Read the data from the Excel file
     # If your data is on a sheet other than the first one, add: sheet_name='Your Sheet Name'
-    df = pd.read_excel(file_path)
+    df = read_workbook(file_path)
 
 except FileNotFoundError:
     print(f"\nERROR: The file '{file_path}' was not found.")
@@ -47,23 +52,20 @@ print(f"Data loaded successfully. Total records: {len(df)}")
 
 # --- 2. Data Cleaning and Preparation ---
 
-# Handle missing or 'NULL' race values by setting them to 'Unknown'
-race_series = df[column_race].astype(str).str.strip().str.replace('NULL', 'Unknown', case=False)
-race_series = race_series.fillna('Unknown').replace('nan', 'Unknown')
-df[column_race] = race_series
+# Cleaning and counting run on the configured backend (backends.py: pandas or Arrow)
+backend = get_backend()
 
-# Handle missing or 'NULL' gang admission values by setting them to 'N' (No)
-admits_gang_series = df[column_admits_gang].astype(str).str.strip().str.replace('NULL', 'N', case=False)
-df[column_admits_gang] = admits_gang_series.fillna('N').replace('nan', 'N')
+# Missing or 'NULL' race values become 'Unknown'; gang admission is 'Y' or else 'N' (No)
+rules = {column_race: 'race', column_admits_gang: 'yes_no'}
+if column_id in df.columns:
+    rules[column_id] = 'raw'
+records = backend.clean(df, rules)
 
 
 # --- 3. Aggregate Data using Cross-Tabulation (Equivalent to Pivot Table) ---
 # Index = Race (X-axis categories)
 # Columns = Gang Admits Status (Stacked bar segments)
-frequency_table = pd.crosstab(
-    df[column_race],
-    df[column_admits_gang]
-)
+frequency_table = backend.crosstab(records, column_race, column_admits_gang)
 
 # Ensure 'N' and 'Y' columns exist and are in order for consistent color mapping
 if 'N' not in frequency_table.columns:
@@ -72,11 +74,27 @@ if 'Y' not in frequency_table.columns:
     frequency_table['Y'] = 0
 frequency_table = frequency_table[['N', 'Y']]
 
+# Withhold small cells (and the cells/totals that would reveal them) before anything is shown
+published_table = suppress_table(frequency_table)
+frequency_table = published_table.loc[frequency_table.index, ['N', 'Y']].fillna(0).astype(int)
+
+# A race whose total is published keeps its full height: the withheld part of it is drawn
+# hatched, without the N/Y split. Races whose total is withheld are labelled instead.
+race_totals = published_table.loc[frequency_table.index, 'Total']
+withheld_heights = (race_totals - frequency_table.sum(axis=1)).fillna(0).astype(int)
+
 # Calculate the total height for each category (used for labeling logic)
-total_heights = frequency_table.sum(axis=1)
+total_heights = frequency_table.sum(axis=1) + withheld_heights
 
 print("\n--- Frequency Table (Data for Plotting) ---")
-print(frequency_table)
+print(published_table.to_string(na_rep=SUPPRESSED_TEXT, float_format='{:.0f}'.format))
+print(f"Counts below {SUPPRESSION_THRESHOLD}, and the counts that would reveal them, are suppressed (drawn hatched, or labelled '{SUPPRESSED_TEXT}').")
+
+# Bars count records; a subject can appear on more than one record
+if column_id in df.columns:
+    distinct_table = backend.distinct_crosstab(records, column_race, column_admits_gang, column_id)
+    print("\n--- Distinct Subjects (each Subject_ID counted once per cell) ---")
+    print(suppress_distinct(distinct_table, published_table).to_string(na_rep=SUPPRESSED_TEXT, float_format='{:.0f}'.format))
 print("\n" + "="*40 + "\n")
 
 
@@ -104,11 +122,6 @@ TINY_TOTAL_BAR_THRESHOLD = 500     # Total bar height below this triggers separa
 Y_N_OFFSET = 30    # Low offset for 'N' label, starting just above the bar
 Y_Y_OFFSET = 350   # High offset for 'Y' label, creating a clear vertical gap
 
-# Get X positions of the tick labels for mapping bar positions to total heights
-x_positions = [p.get_position()[0] for p in ax.get_xticklabels()]
-# Map the X-tick position to the total height of the bar at that position
-total_heights_map = dict(zip(x_positions, total_heights.values))
-
 
 for container_index, container in enumerate(ax.containers):
     # container_index 0 is 'N' (No), 1 is 'Y' (Yes)
@@ -116,7 +129,8 @@ for container_index, container in enumerate(ax.containers):
     # Define color for external label to match the bar color for differentiation
     label_color = '#4CAF50' if container_index == 0 else '#FF5733' # Green or Red
 
-    for bar in container:
+    # Bars in each container follow the frequency table's row order, so bar i's total is total_heights[i]
+    for bar, total_height in zip(container, total_heights.to_numpy()):
         height = bar.get_height()
         
         # Only label non-zero segments
@@ -124,11 +138,6 @@ for container_index, container in enumerate(ax.containers):
             x_pos = bar.get_x() + bar.get_width() / 2  # Center x position
             label_text = int(height)
             
-            # Find the closest X-tick position to determine the total bar height
-            closest_tick = min(x_positions, key=lambda x: abs(x - x_pos))
-            total_height = total_heights_map.get(closest_tick, 0)
-            
-            
             # --- Logic for Tiny Bars (Ensures N and Y labels are separated vertically) ---
             if total_height > 0 and total_height < TINY_TOTAL_BAR_THRESHOLD:
                 
@@ -179,6 +188,16 @@ for container_index, container in enumerate(ax.containers):
                 )
 
 
+# Withheld counts: hatched on top of the published segments, or a label where the whole bar is withheld
+bar_positions = np.arange(len(frequency_table))
+ax.bar(bar_positions, withheld_heights, bottom=frequency_table.sum(axis=1), width=0.5,
+       color='#dddddd', edgecolor='black', hatch='////')
+for x_pos, total, withheld, height in zip(bar_positions, race_totals, withheld_heights, total_heights):
+    if pd.isna(total) or withheld > 0:
+        label = SUPPRESSED_TEXT if pd.isna(total) else f'{int(total)}, N/Y {SUPPRESSED_TEXT}'
+        ax.text(x_pos, height + Y_N_OFFSET, label, ha='center', va='bottom', fontsize=9,
+                color='gray', style='italic', rotation=90)
+
 # Recalculate max height to account for the new high Y_Y_OFFSET
 max_total_height = total_heights.max()
 # Add buffer based on the largest offset (Y_Y_OFFSET)
@@ -200,7 +219,7 @@ plt.xticks(rotation=45, ha='right', fontsize=12)
 # Customize the Legend
 ax.legend(
     title='Admits Gang Status',
-    labels=['No (N)', 'Yes (Y)'],
+    labels=['No (N)', 'Yes (Y)', f'N/Y {SUPPRESSED_TEXT}'],
     loc='upper right',
     bbox_to_anchor=(1.2, 1), # Move legend outside the plot area
     fontsize=11
@@ -0,0 +1,271 @@
+import hashlib
+import json
+import os
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+from branca.element import MacroElement
+from jinja2 import Template
+
+from hll import estimate_distinct, merge_sketches
+from suppression import SUPPRESSION_THRESHOLD, suppression_mask
+from zip_geometry import CACHE_DIR, ZIP_PROPERTY, polygon_rings
+
+# --- Configuration ---
+# Census 2010 ZCTA-to-county relationship file (one row per ZIP/county overlap)
+ZCTA_COUNTY_URL = 'https://www2.census.gov/geo/docs/maps-data/data/rel/zcta_county_rel_10.txt'
+BOUNDARY_CACHE_FILE = os.path.join(CACHE_DIR, 'rollup_boundaries.json')
+COORDINATE_DECIMALS = 5
+
+ROLLUP_LEVELS = ['city', 'county', 'state']
+CITY_MIN_RECORDS = 50   # Places with fewer records are merged into one 'Other places' area per county
+
+# Readable names for the counties around Chicago; other counties show their FIPS code
+COUNTY_NAMES = {
+    '17031': 'Cook County, IL',
+    '17037': 'DeKalb County, IL',
+    '17043': 'DuPage County, IL',
+    '17063': 'Grundy County, IL',
+    '17089': 'Kane County, IL',
+    '17091': 'Kankakee County, IL',
+    '17093': 'Kendall County, IL',
+    '17097': 'Lake County, IL',
+    '17111': 'McHenry County, IL',
+    '17197': 'Will County, IL',
+}
+
+# First three ZIP digits -> state, for the states that show up in the records
+ZIP_PREFIX_STATES = [(600, 629, 'IL'), (460, 479, 'IN'), (530, 549, 'WI'),
+                     (480, 499, 'MI'), (500, 528, 'IA'), (630, 658, 'MO')]
+
+
+# --- Hierarchy ---
+
+def load_zip_counties(url=ZCTA_COUNTY_URL, cache_dir=CACHE_DIR):
+    """
+    {ZIP: county FIPS}, assigning each ZIP to the county that holds most of its population.
+
+    The crosswalk is downloaded once and kept in the cache. Without it every ZIP would
+    fall into a single unknown county, so a failed download is an error rather than a
+    silently wrong county rollup.
+    """
+    cache_file = os.path.join(cache_dir, os.path.basename(url))
+    source = cache_file if os.path.exists(cache_file) else url
+
+    try:
+        relationships = pd.read_csv(source, dtype={'ZCTA5': str, 'GEOID': str})
+    except Exception as e:
+        raise RuntimeError(f"Could not load the ZIP-to-county crosswalk from {source} ({e}). "
+                           f"Download {url} to {cache_file} to build the map offline.") from e
+
+    if source == url:
+        os.makedirs(cache_dir, exist_ok=True)
+        relationships.to_csv(cache_file, index=False)
+
+    best = relationships.sort_values('ZPOPPCT', ascending=False).drop_duplicates('ZCTA5')
+    return dict(zip(best['ZCTA5'], best['GEOID']))
+
+
+def zip_state(zip_code):
+    """State for a 5-digit ZIP from its 3-digit prefix ('Other' if unknown)."""
+    prefix = int(zip_code[:3])
+    for low, high, state in ZIP_PREFIX_STATES:
+        if low <= prefix <= high:
+            return state
+    return 'Other'
+
+
+def rollup_keys(zips, zip_places, zip_counties):
+    """
+    City, county and state label for every ZIP.
+
+    `zip_places` is {zip: (city, state)} as learned by the gazetteer; ZIPs nobody
+    recorded a city for stay on their own as 'ZIP 60601'.
+    """
+    rows = []
+    for zip_code in zips:
+        city, city_state = zip_places.get(zip_code, (None, None))
+        county = zip_counties.get(zip_code)
+        rows.append({
+            'zip': zip_code,
+            'city': f'{city.title()}, {city_state}' if city else f'ZIP {zip_code}',
+            'county': COUNTY_NAMES.get(county, f'County {county}') if county else 'Unknown County',
+            'state': zip_state(zip_code),
+        })
+    return pd.DataFrame(rows).set_index('zip')
+
+
+def merge_small_units(keys, zip_totals, level='city', parent='county', min_records=CITY_MIN_RECORDS):
+    """
+    `keys` with every `level` unit of fewer than `min_records` records (`zip_totals` is
+    records per ZIP) replaced by one 'Other places, <parent>' unit per parent unit.
+
+    Most places hold one or two records, so without this the city view would draw
+    hundreds of near-empty shapes instead of a few dozen.
+    """
+    unit_totals = zip_totals.reindex(keys.index, fill_value=0).groupby(keys[level]).transform('sum')
+    merged = keys.copy()
+    small = unit_totals < min_records
+    merged.loc[small, level] = 'Other places, ' + keys.loc[small, parent]
+    return merged
+
+
+# --- Dissolved Boundaries ---
+
+def dissolve(geometries):
+    """
+    Merge polygons into one outline by dropping the edges they share.
+
+    Vertices are snapped to COORDINATE_DECIMALS and every edge is keyed by its
+    (unordered) vertex pair; edges used twice are interior and disappear. The
+    remaining edges are walked back into closed rings, returned as one Polygon whose
+    rings Leaflet fills with the even-odd rule (so holes and islands both render).
+
+    Only edges with the same two endpoints cancel, so neighbouring polygons have to share
+    identical vertices along their common border, as the Census ZCTA files (cut from one
+    topology) do. Where one side has a vertex the other lacks, or the two borders
+    differ by more than the snapping, the shared border stays in the outline as an
+    internal line.
+    """
+    rings = [np.round(np.asarray(ring, dtype='float64')[:, :2], COORDINATE_DECIMALS)
+             for geometry in geometries for ring in polygon_rings(geometry)]
+    if not rings:
+        return None
+
+    starts = np.concatenate([ring[:-1] for ring in rings])
+    ends = np.concatenate([ring[1:] for ring in rings])
+    points, vertex_ids = np.unique(np.concatenate([starts, ends]), axis=0, return_inverse=True)
+    vertex_ids = vertex_ids.ravel()
+    a, b = vertex_ids[:len(starts)], vertex_ids[len(starts):]
+    a, b = a[a != b], b[a != b]
+
+    edge_keys = np.minimum(a, b) * len(points) + np.maximum(a, b)
+    _, inverse, counts = np.unique(edge_keys, return_inverse=True, return_counts=True)
+    outline = counts[inverse.ravel()] == 1
+
+    neighbours = defaultdict(list)
+    for start, end in zip(a[outline].tolist(), b[outline].tolist()):
+        neighbours[start].append(end)
+        neighbours[end].append(start)
+
+    outline_rings = []
+    while neighbours:
+        first = next(iter(neighbours))
+        ring, current = [first], first
+        while current in neighbours:
+            following = neighbours[current].pop()
+            neighbours[following].remove(current)
+            for vertex in (current, following):
+                if not neighbours[vertex]:
+                    del neighbours[vertex]
+            ring.append(following)
+            current = following
+            if current == first:
+                break
+        if len(ring) >= 4 and ring[0] == ring[-1]:
+            outline_rings.append(points[ring].tolist())
+
+    return {'type': 'Polygon', 'coordinates': outline_rings}
+
+
+def rollup_boundaries(geojson, keys, cache_file=BOUNDARY_CACHE_FILE):
+    """
+    {level: {label: dissolved geometry}} for every rollup level.
+
+    Dissolving is the slow part, so the result is cached on disk and reused as long
+    as the ZIP -> city/county/state assignment hasn't changed.
+    """
+    geometry_by_zip = {f['properties'][ZIP_PROPERTY]: f['geometry'] for f in geojson['features']}
+    keys = keys[keys.index.isin(geometry_by_zip.keys())]
+
+    fingerprint = hashlib.sha1(keys.sort_index().to_csv().encode()).hexdigest()
+    if os.path.exists(cache_file):
+        with open(cache_file) as f:
+            cached = json.load(f)
+        if cached.get('fingerprint') == fingerprint:
+            return cached['levels']
+
+    levels = {}
+    for level in ROLLUP_LEVELS:
+        levels[level] = {
+            label: dissolve([geometry_by_zip[zip_code] for zip_code in members.index])
+            for label, members in keys.groupby(level)
+        }
+
+    os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+    with open(cache_file, 'w') as f:
+        json.dump({'fingerprint': fingerprint, 'levels': levels}, f)
+    return levels
+
+
+# --- Aggregates ---
+
+def rollup_counts(race_zip_counts, keys, level, zip_sketches=None):
+    """
+    Total records, dominant race and its share for each unit of a rollup level, with
+    whether the total and the dominant-race count are withheld by small-cell suppression
+    (the dominant race's suppression also covers it whenever the total is withheld).
+
+    With `zip_sketches` (hll.build_sketches rows in race_zip_counts' order) each unit also
+    gets Distinct_Subjects, estimated from the union of its ZIPs' sketches so a subject
+    recorded in several of them is counted once.
+    """
+    units = keys[level].reindex(race_zip_counts.index)
+    counts = race_zip_counts.groupby(units).sum()
+    totals = counts.sum(axis=1)
+    withheld = suppression_mask(counts.to_numpy())
+    dominant = withheld[np.arange(len(counts)), counts.to_numpy().argmax(axis=1)]
+    result = pd.DataFrame({
+        'Total_Records': totals,
+        'Dominant_Race': counts.idxmax(axis=1),
+        'Dominant_Percentage': (counts.max(axis=1) / totals * 100).round(1),
+        'Total_Suppressed': withheld[:-1, -1],
+        'Dominant_Suppressed': dominant | withheld[:-1, -1],
+    })
+    if zip_sketches is not None:
+        unit_sketches = merge_sketches(zip_sketches, counts.index.get_indexer(units), len(counts))
+        # An estimate can't exceed the records it was built from
+        result['Distinct_Subjects'] = np.minimum(np.rint(estimate_distinct(unit_sketches)), totals).astype(int)
+        result['Distinct_Suppressed'] = result['Total_Suppressed'] | (result['Distinct_Subjects'] < SUPPRESSION_THRESHOLD)
+    return result
+
+
+# --- Zoom-Dependent Display ---
+
+class ZoomLayerSwitch(MacroElement):
+    """
+    Adds each layer to the map only while the zoom level is inside its [min, max] range,
+    and shows the layer's legend element (by id, if it has one) only while the layer is.
+    """
+
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+        (function() {
+            var map = {{ this._parent.get_name() }};
+            var levels = [
+                {% for layer, min_zoom, max_zoom, legend_id in this.layer_zooms %}
+                {layer: {{ layer.get_name() }}, min: {{ min_zoom }}, max: {{ max_zoom }}, legend: {{ legend_id|tojson }}},
+                {% endfor %}
+            ];
+            function updateLayers() {
+                var zoom = map.getZoom();
+                levels.forEach(function(level) {
+                    var visible = zoom >= level.min && zoom <= level.max;
+                    if (visible && !map.hasLayer(level.layer)) { map.addLayer(level.layer); }
+                    if (!visible && map.hasLayer(level.layer)) { map.removeLayer(level.layer); }
+                    var legend = level.legend && document.getElementById(level.legend);
+                    if (legend) { legend.style.display = visible ? 'block' : 'none'; }
+                });
+            }
+            map.on('zoomend', updateLayers);
+            updateLayers();
+        })();
+        {% endmacro %}
+    """)
+
+    def __init__(self, layer_zooms):
+        super().__init__()
+        self._name = 'ZoomLayerSwitch'
+        # [(layer, min_zoom, max_zoom, legend element id or None), ...]
+        self.layer_zooms = layer_zooms
@@ -0,0 +1,332 @@
+"""
+Local JSON query service over the cleaned records.
+
+The workbook is read and cleaned once at startup; every query after that is answered
+from memory, and repeated queries come straight from an LRU cache.
+
+    python server.py                       # serve on http://127.0.0.1:8765
+    python server.py --bench               # start the server and measure requests/second
+
+Endpoints (all GET, all return JSON):
+    /crosstab?rows=race&cols=admits_gang   counts of one column against another (race.py, colors.py)
+    /timeseries?column=armed               records and flagged percentage per create year (escalation.py)
+    /zip?zip=60623                         race breakdown and flag rates for one ZIP (heatmap.py popups)
+    /zips                                  total records and dominant race for every ZIP (heatmap.py)
+    /stats                                 cache statistics
+Every data endpoint also accepts the filters zip=, race=, year= and flag=.
+
+Counts go through the same small-cell suppression as the published reports (suppression.py):
+a withheld count, and any figure derived from it, is returned as null. No other web origin
+can read the responses unless it is given with --allow-origin (e.g. a local dashboard).
+"""
+import argparse
+import asyncio
+import json
+import time
+from functools import lru_cache, partial
+from urllib.parse import parse_qsl, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from gang_data import FILE_PATH, FLAG_COLUMNS, clean_records, read_workbook
+from suppression import suppress_table, suppression_mask
+
+# --- Configuration ---
+HOST = '127.0.0.1'
+PORT = 8765
+QUERY_CACHE_SIZE = 1024
+ALLOWED_ORIGIN = None   # Web origin allowed to read responses cross-origin (e.g. 'http://localhost:3000'); None for none
+GROUPING_COLUMNS = ['race', 'zip', 'state', 'city', 'sex', 'gang', 'create_year'] + list(FLAG_COLUMNS.values())
+
+# Loaded once by load_records(); never modified afterwards, so reads from worker threads are safe
+records = None
+
+
+class QueryError(Exception):
+    """A request with missing or invalid parameters (answered with HTTP 400)."""
+
+
+# --- Queries ---
+
+def load_records(file_path=FILE_PATH):
+    global records
+    print(f"Attempting to read data from: {file_path}")
+    records = clean_records(read_workbook(file_path))
+    print(f"Data loaded successfully. Total records: {len(records)}")
+
+
+def filtered(params):
+    """Records matching the common zip/race/year/flag filters."""
+    mask = np.ones(len(records), dtype=bool)
+    if 'zip' in params:
+        mask &= (records['zip'] == params['zip']).to_numpy()
+    if 'race' in params:
+        mask &= (records['race'] == params['race']).to_numpy()
+    if 'year' in params:
+        mask &= (records['create_year'] == int(params['year'])).to_numpy(dtype=bool, na_value=False)
+    if 'flag' in params:
+        flag = params['flag']
+        if flag not in FLAG_COLUMNS.values():
+            raise QueryError(f"unknown flag '{flag}'")
+        mask &= (records[flag] == 1).to_numpy()
+    return records[mask]
+
+
+def published(value, hidden):
+    """`value`, or None when it is withheld."""
+    return None if hidden else value
+
+
+def crosstab_query(params):
+    """Counts with 'Total' margins; withheld cells and totals are null (suppress_table, as race.py prints)."""
+    rows, cols = params.get('rows', 'race'), params.get('cols', 'admits_gang')
+    if rows not in GROUPING_COLUMNS or cols not in GROUPING_COLUMNS:
+        raise QueryError(f'rows and cols must be one of {GROUPING_COLUMNS}')
+    selected = filtered(params)
+    table = suppress_table(pd.crosstab(selected[rows], selected[cols]))
+    return {
+        'rows': table.index.astype(str).tolist(),
+        'columns': table.columns.astype(str).tolist(),
+        'counts': [[None if np.isnan(value) else int(value) for value in row] for row in table.to_numpy()],
+    }
+
+
+def flag_suppression(counts, totals):
+    """
+    Which flag counts/percentages must be withheld, per group and flag column: each flag is
+    a (group x flagged / not flagged) table, checked like suppression.suppress_flag_trends.
+    """
+    flagged = counts.to_numpy().T
+    tables = np.stack([flagged, totals.to_numpy() - flagged], axis=-1)
+    withheld = suppression_mask(tables)
+    return pd.DataFrame((withheld[:, :-1, 0] | withheld[:, :-1, -1]).T, index=counts.index, columns=counts.columns)
+
+
+def timeseries_query(params):
+    column = params.get('column', 'armed')
+    if column not in FLAG_COLUMNS.values():
+        raise QueryError(f"unknown flag column '{column}'")
+    by_year = filtered(params).groupby('create_year')[column].agg(['size', 'sum'])
+    # A (year x flagged / not flagged) table, as suppression.suppress_flag_trends checks it
+    withheld = suppression_mask(np.column_stack([by_year['sum'], by_year['size'] - by_year['sum']]))
+    hidden = withheld[:-1, 0] | withheld[:-1, -1]
+    return {
+        'year': by_year.index.astype(int).tolist(),
+        'records': [published(int(n), h) for n, h in zip(by_year['size'], withheld[:-1, -1])],
+        'flagged': [published(int(n), h) for n, h in zip(by_year['sum'], hidden)],
+        'percent': [published(p, h) for p, h in zip((by_year['sum'] / by_year['size'] * 100).round(2), hidden)],
+    }
+
+
+def race_zip_table(selected):
+    """Race x ZIP counts of the selected records that have a ZIP, and their suppression_mask (heatmap.py's table)."""
+    selected = selected[selected['zip'] != '']
+    counts = pd.crosstab(selected['zip'], selected['race'])
+    return counts, suppression_mask(counts.to_numpy())
+
+
+def zip_query(params):
+    if 'zip' not in params:
+        raise QueryError('zip is required')
+    # Suppression is decided over every ZIP's race counts, so the other filters apply but not zip=
+    selected = filtered({key: value for key, value in params.items() if key != 'zip'})
+    counts, withheld = race_zip_table(selected)
+    if params['zip'] not in counts.index:
+        return {'zip': params['zip'], 'total_records': 0, 'races': {}, 'dominant_race': None, 'flag_percent': {}}
+
+    row = counts.index.get_loc(params['zip'])
+    race_counts = counts.iloc[row]
+    total_hidden = withheld[row, -1]
+    dominant = race_counts.to_numpy().argmax()
+
+    flag_names = [name for name in FLAG_COLUMNS.values() if name in selected.columns]
+    in_zips = selected[selected['zip'] != '']
+    flag_counts = in_zips.groupby('zip')[flag_names].sum().reindex(counts.index)
+    flag_hidden = flag_suppression(flag_counts, counts.sum(axis=1)).loc[params['zip']]
+    flag_percent = (flag_counts.loc[params['zip']] / race_counts.sum() * 100).round(2)
+    return {
+        'zip': params['zip'],
+        'total_records': published(int(race_counts.sum()), total_hidden),
+        # Every race is listed (zeros too), so a null doesn't reveal that its count is non-zero
+        'races': {race: published(int(count), withheld[row, i]) for i, (race, count) in enumerate(race_counts.items())},
+        'dominant_race': published(race_counts.index[dominant], total_hidden or withheld[row, dominant]),
+        'flag_percent': {name: published(flag_percent[name], flag_hidden[name]) for name in flag_names},
+    }
+
+
+def zips_query(params):
+    """Every ZIP's total and dominant race; withheld ones are null, as in heatmap.py's popups."""
+    counts, withheld = race_zip_table(filtered(params))
+    totals = counts.sum(axis=1)
+    rows = np.arange(len(counts))
+    total_hidden = withheld[:-1, -1]
+    dominant_hidden = total_hidden | withheld[rows, counts.to_numpy().argmax(axis=1)]
+    return {
+        'zip': counts.index.tolist(),
+        'total_records': [published(int(n), h) for n, h in zip(totals, total_hidden)],
+        'dominant_race': [published(race, h) for race, h in zip(counts.idxmax(axis=1), dominant_hidden)],
+        'dominant_percent': [published(p, h) for p, h in zip((counts.max(axis=1) / totals * 100).round(1), dominant_hidden)],
+    }
+
+
+ROUTES = {
+    '/crosstab': crosstab_query,
+    '/timeseries': timeseries_query,
+    '/zip': zip_query,
+    '/zips': zips_query,
+}
+
+
+@lru_cache(maxsize=QUERY_CACHE_SIZE)
+def cached_query(path, params):
+    """Run a query and serialize it. `params` is a sorted tuple of pairs so equivalent URLs share an entry."""
+    return json.dumps(ROUTES[path](dict(params))).encode()
+
+
+# --- HTTP ---
+
+def respond(status, body, cors_origin=None):
+    """
+    The HTTP response bytes. Browsers only let another origin's page read the body when
+    `cors_origin` (the one configured origin, and only if the request came from it) is set.
+    """
+    reason = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 500: 'Internal Server Error'}[status]
+    cors = f'Access-Control-Allow-Origin: {cors_origin}\r\nVary: Origin\r\n' if cors_origin else ''
+    headers = (f'HTTP/1.1 {status} {reason}\r\n'
+               'Content-Type: application/json\r\n'
+               f'Content-Length: {len(body)}\r\n'
+               f'{cors}\r\n')
+    return headers.encode() + body
+
+
+async def answer(target):
+    url = urlsplit(target)
+    params = tuple(sorted(parse_qsl(url.query)))
+
+    if url.path == '/stats':
+        info = cached_query.cache_info()
+        return 200, json.dumps({'records': len(records), **info._asdict()}).encode()
+    if url.path not in ROUTES:
+        return 404, json.dumps({'error': f'unknown endpoint {url.path}', 'endpoints': sorted(ROUTES)}).encode()
+
+    try:
+        # Work happens off the event loop, so slow (uncached) queries don't stall other clients
+        return 200, await asyncio.to_thread(cached_query, url.path, params)
+    except (QueryError, ValueError) as e:
+        return 400, json.dumps({'error': str(e)}).encode()
+    except Exception as e:
+        return 500, json.dumps({'error': repr(e)}).encode()
+
+
+async def handle_connection(reader, writer, allowed_origin=ALLOWED_ORIGIN):
+    """Serve requests on one (keep-alive) connection until the client closes it."""
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            headers = {}
+            while (line := await reader.readline()) not in (b'\r\n', b'\n', b''):
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+
+            method, target, _ = request_line.decode('latin-1').split(' ', 2)
+            if method != 'GET':
+                status, body = 400, b'{"error": "only GET is supported"}'
+            else:
+                status, body = await answer(target)
+
+            origin = headers.get('origin')
+            writer.write(respond(status, body, origin if allowed_origin and origin == allowed_origin else None))
+            await writer.drain()
+            if headers.get('connection', '').lower() == 'close':
+                break
+    except (ConnectionError, ValueError):
+        pass
+    finally:
+        writer.close()
+
+
+# --- Benchmark ---
+
+BENCH_TARGETS = [
+    '/crosstab?rows=race&cols=admits_gang',
+    '/crosstab?rows=wears_colors&cols=admits_gang',
+    '/crosstab?rows=race&cols=zip',
+    '/timeseries?column=armed',
+    '/timeseries?column=felon',
+    '/timeseries?column=probation&race=Black',
+    '/zip?zip=60623',
+    '/zip?zip=46312',
+    '/zips',
+    '/zips?year=2017',
+]
+
+
+async def bench_client(host, port, targets):
+    reader, writer = await asyncio.open_connection(host, port)
+    for target in targets:
+        writer.write(f'GET {target} HTTP/1.1\r\nHost: {host}\r\n\r\n'.encode())
+        await writer.drain()
+        length = 0
+        while (line := await reader.readline()) not in (b'\r\n', b''):
+            if line.lower().startswith(b'content-length:'):
+                length = int(line.split(b':')[1])
+        await reader.readexactly(length)
+    writer.close()
+
+
+def cache_busting(target, i):
+    """`target` with an extra `bench=<i>` parameter: same query, but its own cache entry."""
+    return f"{target}{'&' if '?' in target else '?'}bench={i}"
+
+
+async def run_bench(host, port, total_requests, concurrency):
+    targets = [BENCH_TARGETS[i % len(BENCH_TARGETS)] for i in range(total_requests)]
+    passes = {
+        # Every request is a distinct cache key (the queries ignore the extra parameter), so each one is computed
+        'cold cache': [cache_busting(target, i) for i, target in enumerate(targets)],
+        # The same few queries, answered from the cache after one priming request each
+        'warm cache': targets,
+    }
+
+    print(f"\n--- Benchmark: {total_requests} requests over {concurrency} connections ---")
+    for label, pass_targets in passes.items():
+        cached_query.cache_clear()
+        if label == 'warm cache':
+            await bench_client(host, port, BENCH_TARGETS)
+        chunks = [pass_targets[i::concurrency] for i in range(concurrency)]
+        start = time.perf_counter()
+        await asyncio.gather(*(bench_client(host, port, chunk) for chunk in chunks))
+        elapsed = time.perf_counter() - start
+        print(f"{label}: {total_requests / elapsed:,.0f} requests/second ({elapsed:.2f} s), {cached_query.cache_info()}")
+
+
+async def main(args):
+    load_records(args.file)
+    server = await asyncio.start_server(partial(handle_connection, allowed_origin=args.allow_origin), args.host, args.port)
+    print(f"Serving on http://{args.host}:{args.port}  (endpoints: {', '.join(sorted(ROUTES))}, /stats)")
+
+    async with server:
+        if args.bench:
+            await run_bench(args.host, args.port, args.requests, args.concurrency)
+        else:
+            await server.serve_forever()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve JSON queries over the cleaned gang database.')
+    parser.add_argument('--file', default=FILE_PATH)
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--allow-origin', default=ALLOWED_ORIGIN,
+                        help='the one web origin (e.g. http://localhost:3000) whose pages may read the responses')
+    parser.add_argument('--bench', action='store_true', help='run a load test against the server and exit')
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--concurrency', type=int, default=50)
+
+    try:
+        asyncio.run(main(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
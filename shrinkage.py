@@ -0,0 +1,51 @@
+import numpy as np
+from scipy import stats
+
+# --- Configuration ---
+CREDIBLE_LEVEL = 0.95
+MIN_RHO = 1e-6   # Keeps the estimated prior strength finite when ZIPs look perfectly homogeneous
+
+
+def estimate_prior(counts):
+    """
+    Empirical-Bayes Dirichlet prior for a (ZIP x race) count matrix.
+
+    The prior mean is the overall race share; the prior strength is a method-of-moments
+    estimate of the Dirichlet-multinomial overdispersion across ZIPs. Returns the
+    alpha vector (one entry per race) and its total, the prior strength.
+    """
+    counts = np.asarray(counts, dtype='float64')
+    totals = counts.sum(axis=1, keepdims=True)
+    overall_share = counts.sum(axis=0) / counts.sum()
+
+    # Var(x) = n p (1 - p) (1 + (n - 1) rho) under the Dirichlet-multinomial model
+    binomial_var = totals * overall_share * (1 - overall_share)
+    excess = ((counts - totals * overall_share) ** 2 - binomial_var).sum()
+    scale = ((totals - 1) * binomial_var).sum()
+    rho = np.clip(excess / scale if scale > 0 else 1.0, MIN_RHO, 1 - MIN_RHO)
+
+    prior_strength = 1 / rho - 1
+    return prior_strength * overall_share, prior_strength
+
+
+def shrink_race_shares(counts, credible_level=CREDIBLE_LEVEL):
+    """
+    Shrunk race shares and credible intervals for every ZIP at once.
+
+    Each row of `counts` gets the posterior Dirichlet(alpha + counts); the shares are
+    the posterior means and the intervals come from the Beta marginals. All outputs
+    are (ZIP x race) arrays of fractions in [0, 1].
+    """
+    counts = np.asarray(counts, dtype='float64')
+    alpha, prior_strength = estimate_prior(counts)
+
+    posterior = counts + alpha
+    posterior_total = posterior.sum(axis=1, keepdims=True)
+    tail = (1 - credible_level) / 2
+
+    return {
+        'mean': posterior / posterior_total,
+        'lower': stats.beta.ppf(tail, posterior, posterior_total - posterior),
+        'upper': stats.beta.ppf(1 - tail, posterior, posterior_total - posterior),
+        'prior_strength': prior_strength,
+    }
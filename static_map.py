@@ -0,0 +1,241 @@
+"""
+Static (PNG/SVG/PDF) copies of the ZIP choropleth, for briefings.
+
+    python static_map.py                         # output/static/all_records.png
+    python static_map.py --by year --format svg  # one map per create year
+    python static_map.py --by race               # one map per race; also --by flag
+
+The maps use the HTML map's class breaks, legend and colours (map_classes.py). The
+breaks come from the full map's ZIP totals, so every variant is shaded on the same scale.
+Together the maps of one --by option publish a (ZIP x variant) table of counts, so the
+cells suppression.py withholds from that table are drawn hatched instead of shaded.
+The boundaries are projected (spherical Web Mercator, as the web map) and turned into
+matplotlib paths once; the result is cached on disk (keyed by the boundary file's size
+and modification time, so later runs don't even parse the GeoJSON), and each further map
+only has to colour one PathCollection.
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+from matplotlib.collections import PathCollection
+from matplotlib.patches import Patch
+from matplotlib.path import Path
+
+from map_classes import (CLASS_COLORS, MISSING_COLOR, SUPPRESSED_COLOR, SUPPRESSED_HATCH, class_legend_title,
+                         class_ranges, classify, range_labels)
+from suppression import SUPPRESSED_TEXT, suppression_mask
+from zip_geometry import CACHE_DIR, feature_zips, load_zip_geojson, local_source, polygon_rings
+
+# --- Configuration ---
+GEOJSON_URL = 'https://raw.githubusercontent.com/OpenDataDE/State-zip-code-GeoJSON/master/il_illinois_zip_codes_geo.min.json'   # Same as heatmap.py
+PATH_CACHE_FILE = os.path.join(CACHE_DIR, 'zip_paths.npz')
+OUTPUT_DIR = os.path.join('output', 'static')
+EARTH_RADIUS_M = 6_378_137   # Web Mercator sphere
+FIGURE_SIZE = (8, 10)
+DPI = 200
+EDGE_COLOR = '#666666'
+EDGE_WIDTH = 0.1
+
+
+# --- Projected Geometry ---
+
+def project(lons, lats):
+    """Spherical Web Mercator x/y in metres (the projection the folium map is drawn in)."""
+    x = EARTH_RADIUS_M * np.radians(lons)
+    y = EARTH_RADIUS_M * np.log(np.tan(np.pi / 4 + np.radians(lats) / 2))
+    return x, y
+
+
+def build_paths(geojson):
+    """
+    Every feature's rings as one flat vertex/code array plus per-feature offsets into it.
+
+    Each ring becomes MOVETO, LINETO..., CLOSEPOLY, so a feature with holes or several
+    polygons is still a single compound path, holes included.
+    """
+    rings = [[np.asarray(ring, dtype=float)[:, :2] for ring in polygon_rings(feature['geometry'])]
+             for feature in geojson['features']]
+    ring_lengths = [len(ring) for feature_rings in rings for ring in feature_rings]
+    feature_lengths = np.array([sum(len(ring) for ring in feature_rings) for feature_rings in rings])
+
+    points = np.concatenate([ring for feature_rings in rings for ring in feature_rings]) if ring_lengths else np.zeros((0, 2))
+    vertices = np.column_stack(project(points[:, 0], points[:, 1]))
+
+    codes = np.full(len(vertices), Path.LINETO, dtype=np.uint8)
+    ring_ends = np.cumsum(ring_lengths)
+    codes[ring_ends - np.array(ring_lengths)] = Path.MOVETO
+    codes[ring_ends - 1] = Path.CLOSEPOLY
+    return {
+        'zips': np.array(feature_zips(geojson)),
+        'vertices': vertices,
+        'codes': codes,
+        'offsets': np.concatenate([[0], np.cumsum(feature_lengths)]),
+    }
+
+
+def source_key(url):
+    """Path, size and modification time of the boundary file behind `url` ('' until it has been downloaded)."""
+    path = local_source(url)
+    if not os.path.exists(path):
+        return ''
+    stat = os.stat(path)
+    return f'{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}'
+
+
+def load_paths(url, cache_file=PATH_CACHE_FILE, geojson=None):
+    """
+    ZIP codes and one projected matplotlib Path per boundary feature, built once and cached on disk.
+
+    The cache is keyed by the boundary file's path, size and modification time, so a hit
+    doesn't parse the GeoJSON at all (the slow part). `geojson` saves the parse on a miss
+    when the caller has already loaded `url`.
+    """
+    key = source_key(url)
+    cached = None
+    if key and os.path.exists(cache_file):
+        cached = dict(np.load(cache_file))
+        if str(cached.get('source', '')) != key:
+            cached = None
+
+    if cached is None:
+        cached = build_paths(geojson if geojson is not None else load_zip_geojson(url))
+        cached['source'] = np.array(source_key(url))
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        np.savez_compressed(cache_file, **cached)
+
+    vertices, codes, offsets = cached['vertices'], cached['codes'], cached['offsets']
+    paths = [Path(vertices[start:end], codes[start:end]) for start, end in zip(offsets[:-1], offsets[1:])]
+    return cached['zips'], paths
+
+
+# --- Rendering ---
+
+def zip_colors(zips, zip_classes, withheld=()):
+    """Fill colour of each boundary: its class colour, SUPPRESSED_COLOR if withheld, or MISSING_COLOR without records."""
+    classes = zip_classes.reindex(zips).to_numpy()
+    palette = np.array([MISSING_COLOR] + CLASS_COLORS + [SUPPRESSED_COLOR])
+    classes = np.where(np.isin(zips, list(withheld)), len(palette) - 1, np.nan_to_num(classes, nan=0))
+    return palette[classes.astype(int)]
+
+
+def render_choropleth(paths, colors, ranges, title, output_file, legend_caption):
+    """Draw the coloured boundaries with the HTML map's legend and save to `output_file` (format by extension)."""
+    fig, ax = plt.subplots(figsize=FIGURE_SIZE)
+    ax.add_collection(PathCollection(paths, facecolors=colors, edgecolors=EDGE_COLOR, linewidths=EDGE_WIDTH))
+    withheld = [path for path, color in zip(paths, colors) if color == SUPPRESSED_COLOR]
+    if withheld:
+        ax.add_collection(PathCollection(withheld, facecolors='none', edgecolors=EDGE_COLOR, linewidths=0,
+                                         hatch=SUPPRESSED_HATCH))
+    ax.autoscale_view()
+    ax.set_aspect('equal')
+    ax.set_axis_off()
+    ax.set_title(title, fontsize=14, fontweight='bold')
+
+    handles = [Patch(facecolor=color, edgecolor='none') for color in CLASS_COLORS]
+    labels = range_labels(ranges)
+    if withheld:
+        handles.append(Patch(facecolor=SUPPRESSED_COLOR, edgecolor=EDGE_COLOR, hatch=SUPPRESSED_HATCH))
+        labels.append(SUPPRESSED_TEXT)
+    legend = ax.legend(handles, labels, title=legend_caption, loc='upper left', bbox_to_anchor=(1.01, 1),
+                       facecolor='#1e1e1e', edgecolor='white', labelcolor='white', framealpha=0.85, fontsize=9)
+    legend.get_title().set_color('white')
+
+    os.makedirs(os.path.dirname(output_file) or '.', exist_ok=True)
+    fig.savefig(output_file, dpi=DPI, bbox_inches='tight')
+    plt.close(fig)
+    return output_file
+
+
+# --- Variants ---
+
+def mapped_zips(df):
+    """Each record's ZIP as heatmap.py maps it: the cleaned ZIP, else the gazetteer's placement ('' if neither)."""
+    from gang_data import COLUMN_CITY, COLUMN_STATE, COLUMN_ZIP
+    from gazetteer import Gazetteer
+
+    # heatmap.py keeps the raw text for the gazetteer and only drops non-5-character ZIPs
+    raw = df[COLUMN_ZIP].astype(str).str.replace(r'\..*', '', regex=True).str.strip().str[:5]
+    zips = raw.where(raw.str.len() == 5, '')
+    if COLUMN_CITY in df.columns and COLUMN_STATE in df.columns:
+        gazetteer = Gazetteer.from_records(df[COLUMN_CITY], df[COLUMN_STATE], raw)
+        missing = zips == ''
+        zips[missing] = gazetteer.resolve_many(df.loc[missing, COLUMN_CITY], df.loc[missing, COLUMN_STATE]).fillna('')
+    return zips
+
+
+def variant_groups(records, by):
+    """(label, boolean row mask) for each map of a --by option."""
+    from gang_data import FLAG_COLUMNS
+
+    if by == 'all':
+        return [('All records', np.ones(len(records), dtype=bool))]
+    if by == 'year':
+        return [(f'Created {year}', (records['create_year'] == year).fillna(False).to_numpy())
+                for year in sorted(records['create_year'].dropna().unique())]
+    if by == 'race':
+        return [(race, (records['race'] == race).to_numpy()) for race in sorted(records['race'].unique())]
+    if by == 'flag':
+        return [(column.replace('Subject_', '').replace('_', ' '), (records[name] == 1).to_numpy())
+                for column, name in FLAG_COLUMNS.items() if name in records.columns]
+    raise ValueError(f"Unknown variant: {by}")
+
+
+def variant_counts(records, groups):
+    """Records per ZIP (rows) for each (label, mask) variant (columns)."""
+    counts = pd.DataFrame({label: records.loc[mask, 'map_zip'].value_counts() for label, mask in groups})
+    return counts.fillna(0).astype(int)
+
+
+def withheld_zips(counts):
+    """
+    {variant label: ZIPs whose count that map must not show}.
+
+    The maps of one --by option together publish the (ZIP x variant) table of counts, so
+    its small cells (and the ones that would reveal them) are withheld with
+    suppression_mask, as race.py and facets.py do for their tables.
+    """
+    withheld = suppression_mask(counts.to_numpy())[:-1, :-1]
+    return {label: set(counts.index[withheld[:, i]]) for i, label in enumerate(counts.columns)}
+
+
+if __name__ == '__main__':
+    from gang_data import FILE_PATH, clean_records, read_workbook
+
+    parser = argparse.ArgumentParser(description='Render the ZIP choropleth to static images.')
+    parser.add_argument('--by', choices=['all', 'year', 'race', 'flag'], default='all')
+    parser.add_argument('--format', choices=['png', 'svg', 'pdf'], default='png')
+    parser.add_argument('--file', default=FILE_PATH)
+    parser.add_argument('--geojson', default=GEOJSON_URL, help='boundary file or URL')
+    parser.add_argument('--output-dir', default=OUTPUT_DIR)
+    args = parser.parse_args()
+
+    df = read_workbook(args.file)
+    records = clean_records(df)
+    records['map_zip'] = mapped_zips(df).to_numpy()
+    records = records[records['map_zip'] != '']
+
+    start = time.perf_counter()
+    zips, paths = load_paths(args.geojson)
+    print(f"Projected paths for {len(paths)} boundaries ready in {time.perf_counter() - start:.2f} s")
+
+    # Class breaks of the full interactive map, so every variant shares its legend
+    ranges = class_ranges('Total_Records', records['map_zip'].value_counts().max())
+    caption = class_legend_title('Total_Records')
+
+    start = time.perf_counter()
+    counts = variant_counts(records, variant_groups(records, args.by))
+    withheld = withheld_zips(counts)
+    for label in counts.columns:
+        totals = counts[label][counts[label] > 0]
+        hidden = withheld[label]
+        totals = totals[~totals.index.isin(list(hidden))]
+        classes = pd.Series(classify(totals, ranges), index=totals.index)
+        name = ''.join(c if c.isalnum() else '_' for c in label.lower()).strip('_')
+        output_file = render_choropleth(paths, zip_colors(zips, classes, hidden), ranges, label,
+                                        os.path.join(args.output_dir, f'{name}.{args.format}'), caption)
+        print(f"{output_file}: {int(counts[label].sum())} records, {len(totals)} ZIPs shaded, {len(hidden)} {SUPPRESSED_TEXT}")
+    print(f"Rendered in {time.perf_counter() - start:.2f} s")
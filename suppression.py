@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+
+# --- Configuration ---
+SUPPRESSION_THRESHOLD = 5   # Non-zero counts below this are never published
+SUPPRESSED_TEXT = 'suppressed'
+
+
+# --- Small-Cell Suppression ---
+
+def _with_margins(counts):
+    """Append row totals, column totals and the grand total along the last two axes."""
+    row_totals = counts.sum(axis=-1, keepdims=True)
+    with_rows = np.concatenate([counts, row_totals], axis=-1)
+    return np.concatenate([with_rows, with_rows.sum(axis=-2, keepdims=True)], axis=-2)
+
+
+def _protect_lone_cells(mask, values, axis):
+    """
+    In every line (row or column, per `axis`) with exactly one suppressed entry, also
+    suppress the smallest other entry, preferring non-zero ones. Returns whether any
+    line needed it.
+    """
+    lone = mask.sum(axis=axis, keepdims=True) == 1
+    if not lone.any():
+        return False
+    # Zeros are only picked when a line has no other non-zero entry left to hide
+    fallback = values.max() + 1
+    cost = np.where(mask, np.inf, np.where(values > 0, values, fallback))
+    pick = np.argmin(cost, axis=axis)
+    picked = np.zeros_like(mask)
+    np.put_along_axis(picked, np.expand_dims(pick, axis), True, axis=axis)
+    mask |= picked & lone
+    return True
+
+
+def suppression_mask(counts, threshold=SUPPRESSION_THRESHOLD):
+    """
+    Which cells and margins of a crosstab must be withheld.
+
+    `counts` is a (rows x columns) count array, or any stack of them (e.g. facets x rows x
+    columns); all tables are handled at once. The table is extended with its row totals,
+    column totals and grand total, since those are published too, and:
+
+    - primary suppression hides every non-zero entry below `threshold`, totals included;
+    - complementary suppression then hides the smallest other entry of any row or column
+      (of the extended table) left with exactly one hidden entry, repeating until none is,
+      so no hidden count can be recovered by subtracting the visible ones from a total.
+
+    Returns a boolean array shaped like the extended table: [..., :-1, :-1] is the cells,
+    [..., :-1, -1] the row totals, [..., -1, :-1] the column totals.
+    """
+    values = _with_margins(np.asarray(counts))
+    mask = (values > 0) & (values < threshold)
+    # Each pass fixes every lone cell at once; it converges in a handful of passes
+    while _protect_lone_cells(mask, values, axis=-1) | _protect_lone_cells(mask, values, axis=-2):
+        pass
+    return mask
+
+
+def suppress_table(table, threshold=SUPPRESSION_THRESHOLD):
+    """
+    A crosstab DataFrame with a 'Total' row and column added and every withheld entry
+    replaced by NaN (printing with na_rep=SUPPRESSED_TEXT shows which ones).
+    """
+    mask = suppression_mask(table.to_numpy(), threshold)
+    values = _with_margins(table.to_numpy()).astype(float)
+    values[mask] = np.nan
+    return pd.DataFrame(values,
+                        index=list(table.index) + ['Total'],
+                        columns=list(table.columns) + ['Total'])
+
+
+def suppress_flag_trends(trends, flag_columns, threshold=SUPPRESSION_THRESHOLD):
+    """
+    Withhold small cells of a gang_data.yearly_flag_trends table in place.
+
+    Each flag is a (year x flagged / not flagged) table whose row totals are the yearly
+    record counts; all flags are checked in one call over the stacked tables, and a
+    year's count and percentage are set to NaN where either is withheld.
+    """
+    flagged = np.stack([trends[f'{column}_Count'].to_numpy() for column in flag_columns])
+    tables = np.stack([flagged, trends['Total_Records'].to_numpy() - flagged], axis=-1)
+    withheld = suppression_mask(tables, threshold)
+    for i, column in enumerate(flag_columns):
+        hidden = withheld[i, :-1, 0] | withheld[i, :-1, -1]
+        trends.loc[hidden, [f'{column}_Count', f'{column}_Percent']] = np.nan
+    return trends
+
+
+def suppress_distinct(distinct, published, threshold=SUPPRESSION_THRESHOLD):
+    """
+    Withhold distinct-subject counts shown next to a suppress_table result: wherever the
+    record count is withheld (a subject count can't exceed its record count) and wherever
+    the distinct count itself is below `threshold`.
+    """
+    distinct = distinct.reindex(index=published.index, columns=published.columns).astype(float)
+    return distinct.where(published.notna() & ~((distinct > 0) & (distinct < threshold)))
@@ -0,0 +1,153 @@
+"""
+Re-run report scripts whenever the workbook or their code changes.
+
+    python watch.py                       # heatmap.py and race.py
+    python watch.py race.py colors.py     # any of the report scripts
+
+Everything runs in one long-lived process, so pandas, matplotlib and folium are imported
+once and the parsed workbook stays in memory (gang_data.read_workbook keeps it until the
+file's modification time changes). After an edit only the affected work is redone:
+
+    edited report script      -> that script re-runs against the in-memory workbook
+    edited helper module      -> local modules are re-imported, every script re-runs
+    replaced workbook         -> parsed once, every script re-runs
+
+Figures that would have opened in a window are saved to output/<script>.png instead.
+"""
+import argparse
+import importlib
+import os
+import runpy
+import sys
+import time
+import traceback
+import warnings
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+
+import gang_data
+
+# --- Configuration ---
+DEFAULT_SCRIPTS = ['heatmap.py', 'race.py']
+OUTPUT_DIR = 'output'
+POLL_INTERVAL = 0.5   # seconds between modification-time checks
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# plt.show() is a no-op under Agg; the figures are saved after each run instead
+warnings.filterwarnings('ignore', message='.*non-interactive.*')
+
+
+def modified_time(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def local_modules():
+    """Imported modules that live in this directory (gang_data, rollups, ...), by name."""
+    modules = {}
+    for name, module in list(sys.modules.items()):
+        path = getattr(module, '__file__', None)
+        if path and os.path.dirname(os.path.abspath(path)) == REPO_DIR and name != '__main__':
+            modules[name] = os.path.abspath(path)
+    return modules
+
+
+def forget_local_modules():
+    """Drop local modules so the next run imports the edited code, keeping the parsed workbook."""
+    global gang_data
+    workbook_cache = gang_data._workbook_cache
+    for name in local_modules():
+        del sys.modules[name]
+
+    gang_data = importlib.import_module('gang_data')
+    gang_data._workbook_cache.update(workbook_cache)
+
+
+def run_script(script):
+    """Run one report script as __main__ and save any figures it drew."""
+    print(f"\n{'=' * 20} {script} {'=' * 20}")
+    start = time.perf_counter()
+    try:
+        runpy.run_path(script, run_name='__main__')
+    except SystemExit:
+        print(f"{script} exited early (see the message above)")
+    except Exception:
+        traceback.print_exc()
+
+    figures = plt.get_fignums()
+    for number in figures:
+        suffix = '' if len(figures) == 1 else f'_{number}'
+        figure_file = os.path.join(OUTPUT_DIR, f'{os.path.splitext(script)[0]}{suffix}.png')
+        plt.figure(number).savefig(figure_file, dpi=150, bbox_inches='tight')
+        print(f"Saved {figure_file}")
+    plt.close('all')
+    print(f"--- {script} finished in {time.perf_counter() - start:.2f} s ---")
+
+
+def snapshot(scripts, workbook):
+    """Modification times of everything a change can come from."""
+    return {
+        'workbook': {workbook: modified_time(workbook)},
+        'scripts': {script: modified_time(script) for script in scripts},
+        'modules': {path: modified_time(path) for path in local_modules().values()},
+    }
+
+
+def changed(before, after, kind):
+    return [path for path, mtime in after[kind].items() if before[kind].get(path) != mtime]
+
+
+def add_new_modules(state):
+    """Start watching helper modules imported for the first time, keeping the times already recorded."""
+    for path in local_modules().values():
+        state['modules'].setdefault(path, modified_time(path))
+
+
+def watch(scripts, workbook):
+    # Snapshots are taken before each round of runs, so an edit made while a script is
+    # running is still seen as a change on the next poll
+    state = snapshot(scripts, workbook)
+    for script in scripts:
+        run_script(script)
+    add_new_modules(state)
+    print(f"\nWatching {workbook}, {', '.join(scripts)} and {len(state['modules'])} helper modules (Ctrl+C to stop)")
+
+    while True:
+        time.sleep(POLL_INTERVAL)
+        current = snapshot(scripts, workbook)
+        if current == state:
+            continue
+
+        if changed(state, current, 'modules'):
+            print(f"\nHelper module changed: {', '.join(map(os.path.basename, changed(state, current, 'modules')))}")
+            forget_local_modules()
+            to_run = scripts
+        elif changed(state, current, 'workbook'):
+            print(f"\nWorkbook changed: {workbook}")
+            to_run = scripts
+        else:
+            to_run = changed(state, current, 'scripts')
+
+        state = current
+        for script in to_run:
+            run_script(script)
+        add_new_modules(state)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Re-run report scripts when the workbook or their code changes.')
+    parser.add_argument('scripts', nargs='*', default=DEFAULT_SCRIPTS)
+    parser.add_argument('--file', default=gang_data.FILE_PATH, help='workbook to watch')
+    args = parser.parse_args()
+
+    os.chdir(REPO_DIR)
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    try:
+        watch(args.scripts, args.file)
+    except KeyboardInterrupt:
+        pass
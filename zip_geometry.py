@@ -0,0 +1,63 @@
+import json
+import os
+import urllib.request
+
+# --- Configuration ---
+CACHE_DIR = 'cache'
+ZIP_PROPERTY = 'ZCTA5CE10'
+
+
+def local_source(url, cache_dir=CACHE_DIR):
+    """The file load_zip_geojson reads for `url`: the path itself if local, else its downloaded copy."""
+    if os.path.exists(url):
+        return url
+    return os.path.join(cache_dir, os.path.basename(url))
+
+
+def load_zip_geojson(url, cache_dir=CACHE_DIR):
+    """Load the ZIP boundary GeoJSON, downloading it once and reusing the local copy afterwards."""
+    cache_file = local_source(url, cache_dir)
+    if not os.path.exists(cache_file):
+        os.makedirs(cache_dir, exist_ok=True)
+        print(f"Downloading ZIP boundaries from: {url}")
+        with urllib.request.urlopen(url) as response:
+            payload = response.read()
+        with open(cache_file, 'wb') as f:
+            f.write(payload)
+
+    with open(cache_file) as f:
+        return json.load(f)
+
+
+def feature_zips(geojson):
+    """ZIP code of every feature, in feature order."""
+    return [feature['properties'][ZIP_PROPERTY] for feature in geojson['features']]
+
+
+def polygon_rings(geometry):
+    """All linear rings (outer and holes) of a Polygon or MultiPolygon geometry."""
+    if geometry['type'] == 'Polygon':
+        return list(geometry['coordinates'])
+    if geometry['type'] == 'MultiPolygon':
+        return [ring for polygon in geometry['coordinates'] for ring in polygon]
+    return []
+
+
+def zip_centroids(geojson):
+    """
+    {ZIP: (lat, lon)} for every feature.
+
+    Uses the Census internal point (INTPTLAT10/INTPTLON10) when the file carries it,
+    otherwise the mean of the outer ring's vertices.
+    """
+    centroids = {}
+    for feature in geojson['features']:
+        properties = feature['properties']
+        if 'INTPTLAT10' in properties and 'INTPTLON10' in properties:
+            centroids[properties[ZIP_PROPERTY]] = (float(properties['INTPTLAT10']), float(properties['INTPTLON10']))
+            continue
+        rings = polygon_rings(feature['geometry'])
+        if rings:
+            lons, lats = zip(*[point[:2] for point in rings[0]])
+            centroids[properties[ZIP_PROPERTY]] = (sum(lats) / len(lats), sum(lons) / len(lons))
+    return centroids